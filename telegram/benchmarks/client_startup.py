@@ -0,0 +1,90 @@
+"""Startup time of TelegramClientManager.start_clients against a stub client.
+
+Every stub ``connect()`` sleeps for a random datacenter handshake latency, so
+the numbers show how startup scales with the number of accounts.
+
+    python -m benchmarks.client_startup --concurrency 50
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from src.core.telegram.config import TelegramConfig
+from src.domain.telegram.services import manager as manager_module
+from src.domain.telegram.services.manager import TelegramClientManager
+
+ACCOUNT_COUNTS = (10, 100, 500, 1000, 5000)
+
+
+class StubTelegramClient:
+    min_latency = 0.05
+    max_latency = 0.3
+
+    def __init__(self, session, api_id, api_hash) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self) -> None:
+        await asyncio.sleep(random.uniform(self.min_latency, self.max_latency))
+        self._connected = True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    def add_event_handler(self, callback, event=None) -> None:
+        pass
+
+    async def get_me(self):
+        return None
+
+
+class StubSessionContainer:
+    def __init__(self, accounts: int) -> None:
+        self._accounts = [
+            {"session_id": f"7{n:010d}", "api_id": n, "api_hash": "hash"}
+            for n in range(accounts)
+        ]
+
+    async def preload_sessions(self):
+        return self._accounts
+
+    async def load_session(self, session_id: str) -> str:
+        return session_id
+
+    def discard_snapshots(self) -> None:
+        pass
+
+
+async def run(accounts: int, concurrency: int) -> float:
+    manager = TelegramClientManager(
+        StubSessionContainer(accounts),
+        TelegramConfig(max_concurrent_starts=concurrency),
+    )
+    started = time.perf_counter()
+    await manager.start_clients()
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    manager_module.TelegramClient = StubTelegramClient
+    handshake = (StubTelegramClient.min_latency + StubTelegramClient.max_latency) / 2
+
+    print(f"{'accounts':>10}{'sequential, s':>16}{'concurrent, s':>16}")
+    for accounts in ACCOUNT_COUNTS:
+        # Sequential startup is estimated, running it for 5000 accounts takes
+        # the better part of half an hour.
+        sequential = accounts * handshake
+        concurrent = await run(accounts, args.concurrency)
+        print(f"{accounts:>10}{sequential:>16.2f}{concurrent:>16.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""Entity lookup latency with and without the entities secondary indexes.
+
+Seeds a scratch copy of the ``entities`` table in the configured database,
+times the username, phone and name lookups that ``AlchemyCoreSession`` runs,
+creates the indexes from the ``8c1d2e4f6a9b`` migration and times them again.
+
+    python -m benchmarks.entity_lookups --entities 1000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import and_, create_engine, func, make_url, select, text
+from sqlalchemy.orm import declarative_base
+from src.core.telegram.sessions.my_sqlalchemy import AlchemySessionContainer
+from src.infrastructure.config_loader import load_config
+from src.presentation.api.config import Config
+
+PREFIX = "bench_"
+SESSIONS = 10
+
+
+def seed(conn, entities: int) -> None:
+    conn.execute(text(f"""
+            INSERT INTO {PREFIX}entities (session_id, id, hash, username, phone, name)
+            SELECT
+                'session_' || (n % {SESSIONS}),
+                n,
+                n * 7,
+                'user_' || n,
+                79000000000 + n,
+                'User Name ' || n
+            FROM generate_series(1, {entities}) AS n
+            """))
+    conn.execute(text(f"ANALYZE {PREFIX}entities"))
+
+
+def measure(conn, table, entities: int, samples: int) -> dict[str, float]:
+    ids = [random.randint(1, entities) for _ in range(samples)]
+    lookups = {
+        "username": lambda n: table.c.username == f"user_{n}",
+        "phone": lambda n: table.c.phone == 79000000000 + n,
+        "name": lambda n: func.lower(table.c.name) == f"user name {n}",
+    }
+    results = {}
+    for kind, condition in lookups.items():
+        timings = []
+        for n in ids:
+            query = select(table.c.id, table.c.hash).where(
+                and_(table.c.session_id == f"session_{n % SESSIONS}", condition(n))
+            )
+            started = time.perf_counter()
+            conn.execute(query).first()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[kind] = statistics.median(timings)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entities", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    db = load_config(Config).db
+    engine = create_engine(make_url(db.full_url).set(drivername="postgresql+psycopg2"))
+    base = declarative_base()
+    entity = AlchemySessionContainer.create_table_classes(None, PREFIX, base)[2]
+    table = entity.__table__
+    indexes = set(table.indexes)
+    table.indexes.clear()
+
+    try:
+        with engine.begin() as conn:
+            table.create(conn)
+            seed(conn, args.entities)
+
+        with engine.connect() as conn:
+            before = measure(conn, table, args.entities, args.samples)
+
+        with engine.begin() as conn:
+            for index in indexes:
+                index.create(conn)
+            conn.execute(text(f"ANALYZE {PREFIX}entities"))
+
+        with engine.connect() as conn:
+            after = measure(conn, table, args.entities, args.samples)
+    finally:
+        with engine.begin() as conn:
+            table.drop(conn, checkfirst=True)
+
+    print(f"{args.entities} entities, median of {args.samples} lookups (ms)")
+    print(f"{'lookup':<10}{'before':>12}{'after':>12}")
+    for kind in before:
+        print(f"{kind:<10}{before[kind]:>12.3f}{after[kind]:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
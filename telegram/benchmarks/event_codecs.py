@@ -0,0 +1,69 @@
+"""Encode and decode rates of the integration events, per event type and codec.
+
+``orjson + fallback`` is the encoding before the event schemas, orjson with
+the generic ``additionally_serialize`` fallback. ``schema, no codec`` is the
+conversion to the flat payload and back alone.
+
+    python -m benchmarks.event_codecs --iterations 100000
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import orjson
+
+from src.infrastructure.event_bus import events
+from src.infrastructure.event_bus.codecs import CODECS
+from src.infrastructure.logs.processors import additionally_serialize
+
+SAMPLES = (
+    events.TelegramMessageReceived(
+        id=123456,
+        message="Hello, world! " * 10,
+        date=datetime(2025, 5, 1, 12, 30, 15, 123456),
+        peer_id="PeerChannel(channel_id=1234567890)",
+        from_id="PeerUser(user_id=987654321)",
+        is_outgoing=False,
+        media_type="MessageMediaPhoto",
+        reply_to_msg_id=123450,
+        seen_by=("79990000001", "79990000002"),
+    ),
+)
+
+
+def rate(func, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'event':>28}{'codec':>22}{'encode/s':>12}{'decode/s':>12}")
+    for event in SAMPLES:
+        name = f"{event.event_type} v{event.event_version}"
+        encoded = rate(
+            lambda: orjson.dumps(event, default=additionally_serialize),
+            args.iterations,
+        )
+        print(f"{name:>28}{'orjson + fallback':>22}{encoded:>12.0f}{'-':>12}")
+        schema = event._schema
+        payload = schema.encode(event)
+        encoded = rate(lambda: schema.encode(event), args.iterations)
+        decoded = rate(lambda: schema.decode(payload), args.iterations)
+        print(f"{name:>28}{'schema, no codec':>22}{encoded:>12.0f}{decoded:>12.0f}")
+        for content_type, codec in CODECS.items():
+            data = codec.encode(event)
+            assert codec.decode(data, event._schema) == event
+            encoded = rate(lambda: codec.encode(event), args.iterations)
+            decoded = rate(lambda: codec.decode(data, event._schema), args.iterations)
+            print(f"{name:>28}{content_type:>22}{encoded:>12.0f}{decoded:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
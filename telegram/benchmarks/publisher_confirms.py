@@ -0,0 +1,157 @@
+"""Publish throughput of AMQP transactions against publisher confirms.
+
+There's no broker here, a stub stands in for RabbitMQ: every frame round trip
+takes ``--rtt`` seconds and a disk write persisting messages ``--fsync``
+seconds, one write at a time. Every transaction commit needs a write of its
+own, while confirms are sent for all messages persisted by one write, like
+the broker groups them.
+The transaction numbers replay the previous publish path (select, publish,
+commit per request), the confirm numbers run MessageBrokerImpl.flush.
+
+    python -m benchmarks.publisher_confirms --rtt 0.002 --fsync 0.005
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+
+from src.infrastructure.message_broker.message import Message
+from src.infrastructure.message_broker.message_broker import MessageBrokerImpl
+
+BATCH_SIZES = (1, 10, 100, 500)
+
+
+class StubBroker:
+    def __init__(self, rtt: float, fsync: float) -> None:
+        self.rtt = rtt
+        self.fsync = fsync
+        self._disk = asyncio.Lock()
+        self._unconfirmed: List[asyncio.Future] = []
+        self._confirming = False
+
+    async def write(self) -> None:
+        """Persists the messages of a commit on their own."""
+        async with self._disk:
+            await asyncio.sleep(self.fsync)
+
+    async def confirm(self) -> None:
+        """Resolves once a shared write covered the message and its confirm
+        got back."""
+        future = asyncio.get_running_loop().create_future()
+        self._unconfirmed.append(future)
+        if not self._confirming:
+            self._confirming = True
+            asyncio.create_task(self._confirm())
+        await future
+
+    async def _confirm(self) -> None:
+        while self._unconfirmed:
+            batch, self._unconfirmed = self._unconfirmed, []
+            await self.write()
+            await asyncio.sleep(self.rtt)
+            for future in batch:
+                future.set_result(None)
+        self._confirming = False
+
+
+class StubExchange:
+    def __init__(self, broker: StubBroker, confirms: bool) -> None:
+        self._broker = broker
+        self._confirms = confirms
+
+    async def publish(self, message, routing_key: str, mandatory: bool = True):
+        # Writing the frames.
+        await asyncio.sleep(0)
+        if self._confirms:
+            await self._broker.confirm()
+
+
+class StubTransaction:
+    def __init__(self, broker: StubBroker) -> None:
+        self._broker = broker
+
+    async def select(self) -> None:
+        await asyncio.sleep(self._broker.rtt)
+
+    async def commit(self) -> None:
+        await self._broker.write()
+        await asyncio.sleep(self._broker.rtt)
+
+
+class StubChannel:
+    def __init__(self, broker: StubBroker, confirms: bool) -> None:
+        self._broker = broker
+        self._exchange = StubExchange(broker, confirms)
+
+    async def get_exchange(self, name: str, ensure: bool = True) -> StubExchange:
+        return self._exchange
+
+    def transaction(self) -> StubTransaction:
+        return StubTransaction(self._broker)
+
+
+def build_messages(count: int) -> List[Message]:
+    return [
+        Message(id=uuid.uuid4(), data=b'{"id": %d, "message": "text"}' % n)
+        for n in range(count)
+    ]
+
+
+async def publish_transactions(
+    broker: StubBroker, messages: List[Message], channels: int
+) -> None:
+    async def request(channel: StubChannel) -> None:
+        transaction = channel.transaction()
+        await transaction.select()
+        exchange = await channel.get_exchange("telegram", ensure=False)
+        for message in messages:
+            await exchange.publish(
+                MessageBrokerImpl.build_message(message), routing_key="telegram"
+            )
+        await transaction.commit()
+
+    await asyncio.gather(
+        *(request(StubChannel(broker, confirms=False)) for _ in range(channels))
+    )
+
+
+async def publish_confirms(
+    broker: StubBroker, messages: List[Message], channels: int
+) -> None:
+    async def request(channel: StubChannel) -> None:
+        message_broker = MessageBrokerImpl(channel)
+        for message in messages:
+            await message_broker.publish_message(message, "telegram", "telegram")
+        await message_broker.flush()
+
+    await asyncio.gather(
+        *(request(StubChannel(broker, confirms=True)) for _ in range(channels))
+    )
+
+
+async def run(publish, broker: StubBroker, batch: int, channels: int) -> float:
+    messages = build_messages(batch)
+    started = time.perf_counter()
+    await publish(broker, messages, channels)
+    return batch * channels / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt", type=float, default=0.002)
+    parser.add_argument("--fsync", type=float, default=0.005)
+    parser.add_argument("--channels", type=int, default=10)
+    args = parser.parse_args()
+
+    broker = StubBroker(args.rtt, args.fsync)
+    print(f"{'batch':>8}{'transactions, msg/s':>22}{'confirms, msg/s':>18}")
+    for batch in BATCH_SIZES:
+        transactions = await run(publish_transactions, broker, batch, args.channels)
+        confirms = await run(publish_confirms, broker, batch, args.channels)
+        print(f"{batch:>8}{transactions:>22.0f}{confirms:>18.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
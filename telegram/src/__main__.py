@@ -3,17 +3,19 @@ import logging
 
 from src.infrastructure.config_loader import load_config
 from src.infrastructure.db.main import build_sa_engine, build_sa_session_factory
-from src.infrastructure.event_bus.exchanges import declare_exchanges
 from src.infrastructure.logs.main import configure_logging
 from src.infrastructure.message_broker.main import (
     build_rq_channel_pool,
     build_rq_connection_pool,
 )
+from src.main.bootstrap import run_telegram
 from src.main.di.constants import DiScope
 from src.main.di.main import init_di_builder, setup_di_builder
 from src.main.mediator.main import init_mediator, setup_mediator
+from src.main.sharding import run_supervisor
 from src.presentation.api.config import Config
 from src.presentation.api.main import init_api, run_api
+from src.presentation.api.providers import setup_providers
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,10 @@ async def async_main() -> None:
 
     logger.info("Launch app")
 
+    if config.telegram.workers > 1:
+        await run_supervisor(config)
+        return
+
     async with (
         build_sa_engine(config.db) as db_engine,
         build_rq_connection_pool(config.event_bus) as rq_connection_pool,
@@ -32,21 +38,24 @@ async def async_main() -> None:
         session_factory = build_sa_session_factory(db_engine)
         di_builder = init_di_builder()
         setup_di_builder(
-            di_builder, db_engine, session_factory, rq_connection_pool, rq_channel_pool
+            di_builder,
+            db_engine,
+            session_factory,
+            rq_connection_pool,
+            rq_channel_pool,
+            config.event_bus,
+            config.telegram,
         )
 
         mediator = init_mediator(di_builder)
         setup_mediator(mediator)
 
-        async with di_builder.enter_scope(DiScope.APP) as di_state:
-            async with di_builder.enter_scope(
-                DiScope.REQUEST, state=di_state
-            ) as request_di_state:
-                await di_builder.execute(
-                    declare_exchanges, DiScope.REQUEST, state=request_di_state
-                )
-
+        async with (
+            di_builder.enter_scope(DiScope.APP) as di_state,
+            run_telegram(di_builder, mediator, di_state) as scoped_mediator,
+        ):
             app = init_api(config.api.debug)
+            setup_providers(app, scoped_mediator)
             await run_api(app, config.api)
 
 
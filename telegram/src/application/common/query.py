@@ -1,4 +1,5 @@
 from abc import ABC
+from collections.abc import AsyncIterator
 from typing import Generic, TypeVar
 
 import didiator
@@ -10,6 +11,10 @@ class Query(didiator.Query[QRes], ABC, Generic[QRes]):
     pass
 
 
+class StreamQuery(Query[AsyncIterator[QRes]], ABC, Generic[QRes]):
+    """Query answered with an async iterator of results instead of one value."""
+
+
 Q = TypeVar("Q", bound=Query)
 
 
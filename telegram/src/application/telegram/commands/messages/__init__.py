@@ -1 +1,9 @@
-from .start_listening import StartListening, StartListeningHandler
\ No newline at end of file
+from .publish_events import PublishEvents, PublishEventsHandler
+from .start_listening import StartListening, StartListeningHandler
+
+__all__ = (
+    PublishEvents,
+    PublishEventsHandler,
+    StartListening,
+    StartListeningHandler,
+)
@@ -0,0 +1,26 @@
+import logging
+from dataclasses import dataclass
+
+from didiator import EventMediator
+from src.application.common.command import Command, CommandHandler
+from src.application.common.interfaces.uow import UnitOfWork
+from src.domain.common.event import Event
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PublishEvents(Command[None]):
+    events: tuple[Event, ...]
+
+
+class PublishEventsHandler(CommandHandler[PublishEvents, None]):
+    def __init__(self, uow: UnitOfWork, mediator: EventMediator) -> None:
+        self._uow = uow
+        self._mediator = mediator
+
+    async def __call__(self, command: PublishEvents) -> None:
+        await self._mediator.publish(list(command.events))
+        await self._uow.commit()
+
+        logger.debug("Events published.", extra={"count": len(command.events)})
@@ -1,9 +1,7 @@
 import logging
 from dataclasses import dataclass
 
-from didiator import EventMediator
 from src.application.common.command import Command, CommandHandler
-from src.application.common.interfaces.uow import UnitOfWork
 from src.domain.telegram.services.listener import TelegramListener
 
 logger = logging.getLogger(__name__)
@@ -15,20 +13,11 @@ class StartListening(Command[None]):
 
 
 class StartListeningHandler(CommandHandler[StartListening, None]):
-    def __init__(
-        self,
-        listening_service: TelegramListener,
-        uow: UnitOfWork,
-        mediator: EventMediator,
-    ) -> None:
+    def __init__(self, listening_service: TelegramListener) -> None:
         self._listening_service = listening_service
-        self._uow = uow
-        self._mediator = mediator
 
     async def __call__(self, command: StartListening) -> None:
-
+        # Received messages are published by the event pipeline from now on.
         await self._listening_service.start_listening()
-        await self._mediator.publish(self._listening_service.pull_events())
-        await self._uow.commit()
 
         logger.info("Listening start.")
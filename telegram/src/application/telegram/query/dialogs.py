@@ -1,8 +1,9 @@
 import logging
 from dataclasses import dataclass
-from typing import List, Union
+from typing import List, Optional, Union
 
 from src.application.common.query import Query, QueryHandler
+from src.domain.telegram.services.dialogs import DialogsDelta
 from src.domain.telegram.services.operations import TelegramOperations
 from telethon.tl.types import Dialog
 
@@ -30,6 +31,37 @@ class GetTelegramDialogsByPhoneHandler(
         return dialogs
 
 
+@dataclass(frozen=True)
+class GetTelegramDialogsDelta(Query[DialogsDelta]):
+    phone: str
+    since_version: int = 0
+    # Of the delta since_version comes from, None for the first request.
+    epoch: Optional[str] = None
+
+
+class GetTelegramDialogsDeltaHandler(
+    QueryHandler[GetTelegramDialogsDelta, DialogsDelta]
+):
+    def __init__(self, telegram_operations: TelegramOperations):
+        self._telegram_operations = telegram_operations
+
+    async def __call__(self, query: GetTelegramDialogsDelta) -> DialogsDelta:
+        delta = await self._telegram_operations.get_dialogs_delta(
+            query.phone, query.since_version, query.epoch
+        )
+
+        logger.info(
+            "Get dialogs delta",
+            extra={
+                "account_phone": query.phone,
+                "since_version": query.since_version,
+                "version": delta.version,
+                "full": delta.full,
+            },
+        )
+        return delta
+
+
 @dataclass(frozen=True)
 class GetTelegramDialogByEntity(Query):
     phone: str
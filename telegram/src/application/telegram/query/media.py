@@ -0,0 +1,75 @@
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Optional
+
+from src.application.common.query import Query, QueryHandler, StreamQuery
+from src.core.telegram.media import MediaFile
+from src.domain.telegram.services.operations import TelegramOperations
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DownloadTelegramPhoto(StreamQuery[bytes]):
+    phone: str
+    photo_id: int
+    access_hash: int
+    dc_id: int
+    file_reference: bytes = b""
+    thumb_size: str = "y"
+    offset: int = 0
+    end: Optional[int] = None
+
+
+class DownloadTelegramPhotoHandler(
+    QueryHandler[DownloadTelegramPhoto, AsyncIterator[bytes]]
+):
+    def __init__(self, telegram_operations: TelegramOperations):
+        self._telegram_operations = telegram_operations
+
+    async def __call__(self, query: DownloadTelegramPhoto) -> AsyncIterator[bytes]:
+        logger.info(
+            "Download photo.",
+            extra={"account_phone": query.phone, "photo_id": query.photo_id},
+        )
+        return self._telegram_operations.iter_image_by_metadata(
+            query.phone,
+            query.photo_id,
+            query.access_hash,
+            query.dc_id,
+            query.file_reference,
+            query.thumb_size,
+            query.offset,
+            query.end,
+        )
+
+
+@dataclass(frozen=True)
+class GetCachedTelegramPhoto(Query[MediaFile]):
+    phone: str
+    photo_id: int
+    access_hash: int
+    dc_id: int
+    file_reference: bytes = b""
+    thumb_size: str = "y"
+
+
+class GetCachedTelegramPhotoHandler(QueryHandler[GetCachedTelegramPhoto, MediaFile]):
+    def __init__(self, telegram_operations: TelegramOperations):
+        self._telegram_operations = telegram_operations
+
+    async def __call__(self, query: GetCachedTelegramPhoto) -> MediaFile:
+        file = await self._telegram_operations.get_cached_image_by_metadata(
+            query.phone,
+            query.photo_id,
+            query.access_hash,
+            query.dc_id,
+            query.file_reference,
+            query.thumb_size,
+        )
+        logger.info(
+            "Get cached photo.",
+            extra={"account_phone": query.phone, "photo_id": query.photo_id},
+        )
+        return file
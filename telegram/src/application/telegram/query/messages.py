@@ -1,8 +1,9 @@
 import logging
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
-from typing import List, Union
+from typing import List, Optional, Union
 
-from src.application.common.query import Query, QueryHandler
+from src.application.common.query import Query, QueryHandler, StreamQuery
 from src.domain.telegram.services.operations import TelegramOperations
 from telethon.tl.types import Message
 
@@ -41,3 +42,30 @@ class GetTelegramMessagesByEntityByPhoneHandler(
             extra={"account_phone": query.phone, "entity": query.entity},
         )
         return messages
+
+
+@dataclass(frozen=True)
+class ExportTelegramMessages(StreamQuery[Message]):
+    entity: Union[str, int]
+    phone: str
+    offset_id: int = 0
+    limit: Optional[int] = None
+
+
+class ExportTelegramMessagesHandler(
+    QueryHandler[ExportTelegramMessages, AsyncIterator[Message]]
+):
+    def __init__(self, telegram_operations: TelegramOperations):
+        self._telegram_operations = telegram_operations
+
+    async def __call__(self, query: ExportTelegramMessages) -> AsyncIterator[Message]:
+        logger.info(
+            "Export messages.",
+            extra={"account_phone": query.phone, "entity": query.entity},
+        )
+        return self._telegram_operations.iter_messages_by_chat_entity_by_account_phone(
+            query.entity,
+            query.phone,
+            query.offset_id,
+            query.limit,
+        )
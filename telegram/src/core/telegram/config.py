@@ -0,0 +1,53 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class TelegramConfig:
+    max_concurrent_starts: int = 50
+    connect_timeout: float = 30.0
+    client_pool: bool = False
+    max_connections: int = 500
+    client_idle_timeout: float = 600.0
+    client_eviction_grace: float = 10.0
+    listen_accounts: list[str] = field(default_factory=list)
+    workers: int = 1
+    request_rate: float = 5.0
+    request_burst: int = 10
+    # Requests per second for single RPC types, e.g. {"get_dialogs": 0.5}.
+    rate_limits: dict[str, float] = field(default_factory=dict)
+    flood_max_wait: float = 60.0
+    flood_retries: int = 1
+    profile_ttl: float = 300.0
+    dialog_flush_interval: float = 5.0
+    # Removed dialogs remembered per account for deltas, a client behind the
+    # oldest one gets the full list.
+    dialog_delta_history: int = 10000
+    history_prefetch: int = 200
+    # Seconds stored messages are kept for, 0 keeps them for good.
+    message_retention: float = 30 * 24 * 3600.0
+    message_prune_interval: float = 3600.0
+    # Chunk requests of one account in flight, over all of its downloads.
+    download_concurrency: int = 8
+    # Chunk streams a single large download is split into.
+    download_parallel: int = 4
+    media_cache_dir: str = "media_cache"
+    media_cache_size: int = 1024**3
+    event_queue_size: int = 10000
+    event_batch_size: int = 100
+    event_batch_window: float = 0.05
+    # "block", "drop_newest" or "drop_oldest" once the event queue is full.
+    event_drop_policy: str = "block"
+    event_block_timeout: float = 1.0
+    event_drain_timeout: float = 10.0
+    # Accounts fetching their missed updates at the same time.
+    catch_up_concurrency: int = 4
+    # Updates asked for per difference request, Telegram may send fewer.
+    catch_up_batch: int = 1000
+    # Seconds a channel message is remembered to publish it once for all the
+    # accounts that receive it, 0 publishes it once per account.
+    dedup_ttl: float = 0.0
+    # Seconds the first copy is held to collect the accounts of the others.
+    dedup_window: float = 0.2
+    # Set by the supervisor for each worker process it starts.
+    worker_id: Optional[int] = None
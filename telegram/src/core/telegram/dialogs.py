@@ -0,0 +1,80 @@
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.infrastructure.db.models.telegram import Dialog
+
+# Postgres caps a statement at 32767 bind parameters, 11 per dialogs row.
+UPSERT_CHUNK_SIZE = 2000
+
+# Defined once, by the ORM model its migration is generated from.
+dialogs_table = Dialog.__table__
+
+
+@dataclass
+class DialogRow:
+    session_id: str
+    peer_id: int
+    title: Optional[str]
+    top_message_id: Optional[int]
+    top_message_date: Optional[int]
+    unread_count: int
+    pinned: bool
+    archived: bool
+    dialog: bytes
+    entity: bytes
+    message: Optional[bytes]
+
+
+class DialogStore:
+    """The ``dialogs`` table, a snapshot of each account's dialog list."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+
+    async def load(self) -> Dict[str, List[DialogRow]]:
+        t = dialogs_table
+        rows: Dict[str, List[DialogRow]] = {}
+        async with self.engine.connect() as conn:
+            result = await conn.execute(select(t))
+            for row in result:
+                rows.setdefault(row.session_id, []).append(DialogRow(*row))
+        return rows
+
+    async def save(self, rows: Iterable[DialogRow]) -> None:
+        t = dialogs_table
+        values = [asdict(row) for row in rows]
+        if not values:
+            return
+        async with self.engine.begin() as conn:
+            for i in range(0, len(values), UPSERT_CHUNK_SIZE):
+                ins = insert(t).values(values[i : i + UPSERT_CHUNK_SIZE])
+                await conn.execute(
+                    ins.on_conflict_do_update(
+                        constraint=t.primary_key,
+                        set_={
+                            column.name: ins.excluded[column.name]
+                            for column in t.columns
+                            if not column.primary_key
+                        },
+                    )
+                )
+
+    async def delete(self, keys: Iterable[Tuple[str, int]]) -> None:
+        t = dialogs_table
+        keys = list(keys)
+        if not keys:
+            return
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                delete(t).where(
+                    or_(
+                        *(
+                            and_(t.c.session_id == session_id, t.c.peer_id == peer_id)
+                            for session_id, peer_id in keys
+                        )
+                    )
+                )
+            )
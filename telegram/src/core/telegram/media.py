@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Subdirectory of the links files are served from.
+SERVING_DIR = "serving"
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    path: str
+    size: int
+
+    def release(self) -> None:
+        """Removes the link returned by ``MediaCache.fetch`` once served."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+@dataclass
+class MediaCacheStats:
+    files: int = 0
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    shared: int = 0
+    evictions: int = 0
+
+
+class MediaCache:
+    """Downloaded media files on disk, at most ``max_size`` bytes of them.
+
+    A file is addressed by the hash of its key, which has to identify the
+    content, e.g. a photo id and size type. Files are written to a temporary
+    file and renamed into place once complete, so a file under its final name
+    is always whole. The least recently used files are removed when the cache
+    grows past ``max_size``. Concurrent fetches of a missing key share a
+    single download.
+
+    ``fetch`` returns a hard link to the file of the caller's own, which is
+    released once served. Eviction only removes the cached name, so a file
+    that is being sent stays whole until its link is released.
+    """
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self._serving = os.path.join(directory, SERVING_DIR)
+        self._files: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._fetches: Dict[str, asyncio.Task[MediaFile]] = {}
+        self._stats = MediaCacheStats()
+
+    @property
+    def stats(self) -> MediaCacheStats:
+        self._stats.files = len(self._files)
+        self._stats.size = self._size
+        return self._stats
+
+    def load(self) -> None:
+        """Indexes the files left by a previous run, oldest used first."""
+        os.makedirs(self._serving, exist_ok=True)
+        for entry in os.scandir(self._serving):
+            # Links of responses cut short by the previous run.
+            os.unlink(entry.path)
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".tmp"):
+                # An interrupted write.
+                os.unlink(entry.path)
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._files[name] = size
+            self._size += size
+        self._evict()
+
+    def get(self, key: str) -> Optional[MediaFile]:
+        name = self._name(key)
+        size = self._files.get(name)
+        if size is None:
+            return None
+        path = os.path.join(self.directory, name)
+        self._files.move_to_end(name)
+        try:
+            # Keeps the order of use across restarts.
+            os.utime(path)
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+        return MediaFile(path, size)
+
+    async def fetch(
+        self, key: str, download: Callable[[], AsyncIterator[bytes]]
+    ) -> MediaFile:
+        """Returns a link to the cached file, downloading it first if it's
+        missing. The caller releases the link once done with it."""
+        while True:
+            file = await self._fetch(key, download)
+            try:
+                return self._link(file)
+            except FileNotFoundError:
+                # Evicted by another download meanwhile.
+                self._forget(self._name(key))
+
+    async def _fetch(
+        self, key: str, download: Callable[[], AsyncIterator[bytes]]
+    ) -> MediaFile:
+        file = self.get(key)
+        if file is not None:
+            self._stats.hits += 1
+            return file
+
+        task = self._fetches.get(key)
+        if task is None:
+            self._stats.misses += 1
+            task = asyncio.create_task(self._download(key, download))
+            self._fetches[key] = task
+            task.add_done_callback(lambda _: self._fetches.pop(key, None))
+        else:
+            self._stats.shared += 1
+        # A caller that goes away doesn't cancel the download of the others.
+        return await asyncio.shield(task)
+
+    async def _download(
+        self, key: str, download: Callable[[], AsyncIterator[bytes]]
+    ) -> MediaFile:
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as file:
+                async for chunk in download():
+                    await asyncio.to_thread(file.write, chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        if name in self._files:
+            self._size -= self._files[name]
+        self._files[name] = size
+        self._files.move_to_end(name)
+        self._size += size
+        self._evict(keep=name)
+        return MediaFile(path, size)
+
+    def _link(self, file: MediaFile) -> MediaFile:
+        path = os.path.join(self._serving, uuid.uuid4().hex)
+        os.link(file.path, path)
+        return MediaFile(path, file.size)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        while self._size > self.max_size and self._files:
+            name = next(iter(self._files))
+            if name == keep:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to evict media file {name}: {e}")
+            self._forget(name)
+            self._stats.evictions += 1
+
+    def _forget(self, name: str) -> None:
+        self._size -= self._files.pop(name, 0)
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
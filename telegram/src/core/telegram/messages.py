@@ -0,0 +1,207 @@
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from src.infrastructure.db.models.telegram import Message, MessageEntity, MessageRange
+
+# Postgres caps a statement at 32767 bind parameters, 5 per messages row.
+UPSERT_CHUNK_SIZE = 5000
+
+# Marked channel ids, see telethon.utils.get_peer_id.
+MIN_CHANNEL_PEER_ID = -1000000000000
+
+# Defined once, by the ORM models their migrations are generated from.
+messages_table = Message.__table__
+message_ranges_table = MessageRange.__table__
+message_entities_table = MessageEntity.__table__
+
+# (id, date, serialized TL message)
+MessageRow = Tuple[int, Optional[int], bytes]
+# (marked peer id, serialized TL user or chat)
+EntityRow = Tuple[int, bytes]
+
+
+class MessageStore:
+    """Message history of each account's peers in the ``messages`` table.
+
+    ``message_ranges`` records the id ranges known to be complete: every
+    message of the peer with an id in ``[low, high]`` is stored. Pages are only
+    answered from the store inside such a range. The users and chats the
+    messages refer to are kept in ``message_entities``, the latest version of
+    each. Messages older than the retention are removed by ``prune``.
+    """
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+
+    async def get_range(
+        self, session_id: str, peer_id: int, message_id: int
+    ) -> Optional[Tuple[int, int]]:
+        t = message_ranges_table
+        async with self.engine.connect() as conn:
+            row = (
+                await conn.execute(
+                    select(t.c.low, t.c.high).where(
+                        t.c.session_id == session_id,
+                        t.c.peer_id == peer_id,
+                        t.c.low <= message_id,
+                        t.c.high >= message_id,
+                    )
+                )
+            ).first()
+        return (row.low, row.high) if row else None
+
+    async def get_messages(
+        self, session_id: str, peer_id: int, low: int, high: int, limit: int
+    ) -> List[bytes]:
+        """Returns up to ``limit`` messages in ``[low, high]``, newest first."""
+        t = messages_table
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(t.c.data)
+                .where(
+                    t.c.session_id == session_id,
+                    t.c.peer_id == peer_id,
+                    t.c.id >= low,
+                    t.c.id <= high,
+                )
+                .order_by(t.c.id.desc())
+                .limit(limit)
+            )
+            return [row.data for row in result]
+
+    async def save(
+        self,
+        session_id: str,
+        peer_id: int,
+        rows: Iterable[MessageRow],
+        covered: Optional[Tuple[int, int]] = None,
+        entities: Iterable[EntityRow] = (),
+    ) -> None:
+        """Upserts messages and their entities and merges ``covered`` into the
+        peer's ranges."""
+        values = [
+            dict(session_id=session_id, peer_id=peer_id, id=id, date=date, data=data)
+            for id, date, data in rows
+        ]
+        async with self.engine.begin() as conn:
+            t = messages_table
+            for i in range(0, len(values), UPSERT_CHUNK_SIZE):
+                ins = insert(t).values(values[i : i + UPSERT_CHUNK_SIZE])
+                await conn.execute(
+                    ins.on_conflict_do_update(
+                        constraint=t.primary_key,
+                        set_={"date": ins.excluded.date, "data": ins.excluded.data},
+                    )
+                )
+            entity_values = [
+                dict(session_id=session_id, id=id, data=data) for id, data in entities
+            ]
+            if entity_values:
+                e = message_entities_table
+                ins = insert(e).values(entity_values)
+                await conn.execute(
+                    ins.on_conflict_do_update(
+                        constraint=e.primary_key, set_={"data": ins.excluded.data}
+                    )
+                )
+            if covered is not None:
+                await self._merge_range(conn, session_id, peer_id, *covered)
+
+    async def get_entities(self, session_id: str, ids: Iterable[int]) -> List[bytes]:
+        t = message_entities_table
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                select(t.c.data).where(t.c.session_id == session_id, t.c.id.in_(ids))
+            )
+            return [row.data for row in result]
+
+    async def extend_range(
+        self, session_id: str, peer_id: int, high: int, new_high: int
+    ) -> None:
+        """Extends the range ending at ``high`` up to ``new_high``."""
+        t = message_ranges_table
+        async with self.engine.begin() as conn:
+            row = (
+                await conn.execute(
+                    select(t.c.low).where(
+                        t.c.session_id == session_id,
+                        t.c.peer_id == peer_id,
+                        t.c.high == high,
+                    )
+                )
+            ).first()
+            if row is not None:
+                await self._merge_range(conn, session_id, peer_id, row.low, new_high)
+
+    async def delete(
+        self, session_id: str, ids: Iterable[int], peer_id: Optional[int] = None
+    ) -> None:
+        """Deletes messages, from every non-channel peer if ``peer_id`` is None.
+
+        Deleted messages no longer exist, so the ranges stay complete.
+        """
+        t = messages_table
+        condition = and_(t.c.session_id == session_id, t.c.id.in_(list(ids)))
+        if peer_id is None:
+            # Outside channels message ids are unique per account.
+            condition = and_(condition, t.c.peer_id > MIN_CHANNEL_PEER_ID)
+        else:
+            condition = and_(condition, t.c.peer_id == peer_id)
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(t).where(condition))
+
+    async def prune(self, before: int) -> int:
+        """Deletes the messages dated before ``before``, a unix timestamp, and
+        returns how many.
+
+        The ranges of a peer are cut above the newest message deleted, since
+        the ids below it are no longer all stored.
+        """
+        t, r = messages_table, message_ranges_table
+        deleted = (
+            delete(t)
+            .where(t.c.date < before)
+            .returning(t.c.session_id, t.c.peer_id, t.c.id)
+            .cte("deleted")
+        )
+        async with self.engine.begin() as conn:
+            tops = (
+                await conn.execute(
+                    select(
+                        deleted.c.session_id,
+                        deleted.c.peer_id,
+                        func.max(deleted.c.id).label("top"),
+                        func.count().label("count"),
+                    ).group_by(deleted.c.session_id, deleted.c.peer_id)
+                )
+            ).all()
+            for session_id, peer_id, top, _ in tops:
+                peer = and_(r.c.session_id == session_id, r.c.peer_id == peer_id)
+                await conn.execute(delete(r).where(peer, r.c.high <= top))
+                await conn.execute(
+                    update(r).where(peer, r.c.low <= top).values(low=top + 1)
+                )
+        return sum(row.count for row in tops)
+
+    @staticmethod
+    async def _merge_range(
+        conn: AsyncConnection, session_id: str, peer_id: int, low: int, high: int
+    ) -> None:
+        t = message_ranges_table
+        peer = and_(t.c.session_id == session_id, t.c.peer_id == peer_id)
+        overlapping = and_(peer, t.c.low <= high + 1, t.c.high >= low - 1)
+        rows = (
+            await conn.execute(
+                select(t.c.low, t.c.high).where(overlapping).with_for_update()
+            )
+        ).all()
+        for row in rows:
+            low, high = min(low, row.low), max(high, row.high)
+        await conn.execute(delete(t).where(overlapping))
+        await conn.execute(
+            t.insert().values(
+                session_id=session_id, peer_id=peer_id, low=low, high=high
+            )
+        )
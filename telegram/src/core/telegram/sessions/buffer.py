@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import Executable
+
+if TYPE_CHECKING:
+    from .my_sqlalchemy import AlchemySessionContainer
+
+logger = logging.getLogger(__name__)
+
+StateKey = Tuple[str, int]
+
+# Postgres caps a statement at 32767 bind parameters, 7 per update_state row.
+UPSERT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class UpdateStateBufferStats:
+    pending: int = 0
+    flushes: int = 0
+    flushed_rows: int = 0
+    coalesced_rows: int = 0
+    failed_flushes: int = 0
+    last_flush_latency: float = 0.0
+    max_flush_latency: float = 0.0
+
+
+class UpdateStateBuffer:
+    """Write-behind buffer for the update_state table.
+
+    Only the latest state per ``(session_id, entity_id)`` is kept, and all the
+    pending rows are written with one multi-row upsert when the flush interval
+    passes, the buffer reaches ``max_pending`` rows, or the container closes.
+    """
+
+    def __init__(
+        self,
+        container: "AlchemySessionContainer",
+        flush_interval: float = 1.0,
+        max_pending: int = 1000,
+    ) -> None:
+        self.container = container
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[StateKey, Dict[str, Any]] = {}
+        self._stats = UpdateStateBufferStats()
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+
+    @property
+    def stats(self) -> UpdateStateBufferStats:
+        self._stats.pending = len(self._pending)
+        return self._stats
+
+    def put(self, session_id: str, entity_id: int, state: Any) -> None:
+        key = (session_id, entity_id)
+        if key in self._pending:
+            self._stats.coalesced_rows += 1
+        self._pending[key] = dict(
+            session_id=session_id,
+            entity_id=entity_id,
+            pts=state.pts,
+            qts=state.qts,
+            date=state.date.timestamp(),
+            seq=state.seq,
+            unread_count=state.unread_count,
+        )
+        if len(self._pending) >= self.max_pending:
+            self.flush_soon()
+
+    def get(self, session_id: str, entity_id: int) -> Optional[Dict[str, Any]]:
+        return self._pending.get((session_id, entity_id))
+
+    def discard(self, session_id: str) -> None:
+        for key in [key for key in self._pending if key[0] == session_id]:
+            del self._pending[key]
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing is not None:
+            await self._flushing
+        await self.aflush()
+
+    def flush_soon(self) -> None:
+        """Flushes from a synchronous hook without blocking a running loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flushing is None or self._flushing.done():
+            self._flushing = loop.create_task(self.aflush())
+
+    def flush(self) -> None:
+        rows = self._drain()
+        if not rows:
+            return
+        started = time.perf_counter()
+        try:
+            with self.container.db_engine.begin() as conn:
+                for stmt in self._build_statements(rows):
+                    conn.execute(stmt)
+        except Exception as e:
+            self._restore(rows, e)
+        else:
+            self._record_flush(len(rows), time.perf_counter() - started)
+
+    async def aflush(self) -> None:
+        if not self.container.async_mode:
+            await asyncio.to_thread(self.flush)
+            return
+
+        rows = self._drain()
+        if not rows:
+            return
+        started = time.perf_counter()
+        try:
+            async with self.container.async_engine.begin() as conn:
+                for stmt in self._build_statements(rows):
+                    await conn.execute(stmt)
+        except Exception as e:
+            self._restore(rows, e)
+        else:
+            self._record_flush(len(rows), time.perf_counter() - started)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.aflush()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        rows = list(self._pending.values())
+        self._pending = {}
+        return rows
+
+    def _restore(self, rows: List[Dict[str, Any]], error: Exception) -> None:
+        # Keep the rows for the next flush unless a newer state arrived meanwhile.
+        for row in rows:
+            self._pending.setdefault((row["session_id"], row["entity_id"]), row)
+        self._stats.failed_flushes += 1
+        logger.error(
+            f"Failed to flush {len(rows)} update states: {error}", exc_info=True
+        )
+
+    def _record_flush(self, rows: int, latency: float) -> None:
+        self._stats.flushes += 1
+        self._stats.flushed_rows += rows
+        self._stats.last_flush_latency = latency
+        self._stats.max_flush_latency = max(self._stats.max_flush_latency, latency)
+
+    def _build_statements(self, rows: List[Dict[str, Any]]) -> List[Executable]:
+        t = self.container.UpdateState.__table__
+        engine = self.container.async_engine or self.container.db_engine
+        if engine.dialect.name == "postgresql":
+            statements = []
+            for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                ins = insert(t).values(rows[i : i + UPSERT_CHUNK_SIZE])
+                statements.append(
+                    ins.on_conflict_do_update(
+                        constraint=t.primary_key,
+                        set_={
+                            "pts": ins.excluded.pts,
+                            "qts": ins.excluded.qts,
+                            "date": ins.excluded.date,
+                            "seq": ins.excluded.seq,
+                            "unread_count": ins.excluded.unread_count,
+                        },
+                    )
+                )
+            return statements
+
+        return [
+            delete(t).where(
+                or_(
+                    *(
+                        and_(
+                            t.c.session_id == row["session_id"],
+                            t.c.entity_id == row["entity_id"],
+                        )
+                        for row in rows
+                    )
+                )
+            ),
+            t.insert().values(rows),
+        ]
@@ -0,0 +1,119 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+EntityRow = Tuple[int, int, Optional[str], Optional[int], Optional[str]]
+RowKey = Tuple[str, int]
+IndexKey = Tuple[str, str, Any]
+
+INDEXED_FIELDS = (("username", 2), ("phone", 3), ("name", 4))
+
+
+@dataclass
+class EntityCacheStats:
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EntityCache:
+    """Container-wide LRU cache of entity rows with a time to live.
+
+    Rows are stored once per ``(session_id, id)`` and indexed by username,
+    phone and name, so a changed username or name replaces the old key instead
+    of leaving it pointing at the entity.
+    """
+
+    def __init__(self, max_size: int = 100_000, ttl: float = 3600.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._rows: OrderedDict[RowKey, Tuple[EntityRow, float]] = OrderedDict()
+        self._index: Dict[IndexKey, int] = {}
+        self._stats = EntityCacheStats()
+
+    @property
+    def stats(self) -> EntityCacheStats:
+        self._stats.size = len(self._rows)
+        return self._stats
+
+    @staticmethod
+    def _normalize(field: str, value: Any) -> Any:
+        # Telethon looks phones up by string, the database returns BigInteger.
+        if field == "phone":
+            return str(value)
+        # Names are matched case-insensitively, like the lower(name) index.
+        if field == "name":
+            return value.lower()
+        return value
+
+    def get_by_id(self, session_id: str, *ids: int) -> Optional[Tuple[int, int]]:
+        """Returns ``(id, hash)`` of the first cached entity among ``ids``."""
+        for id in ids:
+            row = self._get_row((session_id, id))
+            if row is not None:
+                self._stats.hits += 1
+                return row[0], row[1]
+        self._stats.misses += 1
+        return None
+
+    def get_by(
+        self, session_id: str, field: str, key: Any
+    ) -> Optional[Tuple[int, int]]:
+        id = self._index.get((session_id, field, self._normalize(field, key)))
+        if id is None:
+            self._stats.misses += 1
+            return None
+        return self.get_by_id(session_id, id)
+
+    def put(self, session_id: str, rows: Iterable[EntityRow]) -> None:
+        expires = time.monotonic() + self.ttl
+        for row in rows:
+            key = (session_id, row[0])
+            self._remove(key)
+            self._rows[key] = (tuple(row), expires)
+            for field, position in INDEXED_FIELDS:
+                if row[position] is not None:
+                    index_key = (
+                        session_id,
+                        field,
+                        self._normalize(field, row[position]),
+                    )
+                    self._index[index_key] = row[0]
+
+        while len(self._rows) > self.max_size:
+            self._remove(next(iter(self._rows)))
+            self._stats.evictions += 1
+
+    def discard(self, session_id: str) -> None:
+        for key in [key for key in self._rows if key[0] == session_id]:
+            self._remove(key)
+
+    def _get_row(self, key: RowKey) -> Optional[EntityRow]:
+        item = self._rows.get(key)
+        if item is None:
+            return None
+        row, expires = item
+        if expires < time.monotonic():
+            self._remove(key)
+            return None
+        self._rows.move_to_end(key)
+        return row
+
+    def _remove(self, key: RowKey) -> None:
+        item = self._rows.pop(key, None)
+        if item is None:
+            return
+        row = item[0]
+        for field, position in INDEXED_FIELDS:
+            if row[position] is None:
+                continue
+            index_key = (key[0], field, self._normalize(field, row[position]))
+            if self._index.get(index_key) == key[1]:
+                del self._index[index_key]
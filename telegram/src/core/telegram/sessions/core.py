@@ -1,7 +1,7 @@
 import datetime
 from typing import Any, Optional, Tuple, Union
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, func, select
 from telethon import utils
 from telethon.crypto import AuthKey
 from telethon.sessions.memory import _SentFileType
@@ -43,6 +43,10 @@ class AlchemyCoreSession(AlchemySession):
         return AuthKey(data=ak) if ak else None
 
     def get_update_state(self, entity_id: int) -> Optional[updates.State]:
+        state = self._get_pending_update_state(entity_id)
+        if state:
+            return state
+
         t = self.UpdateState.__table__
         rows = self.engine.execute(
             select([t]).where(
@@ -56,25 +60,6 @@ class AlchemyCoreSession(AlchemySession):
         except StopIteration:
             return None
 
-    def set_update_state(self, entity_id: int, row: Any) -> None:
-        t = self.UpdateState.__table__
-        self.engine.execute(
-            t.delete().where(
-                and_(t.c.session_id == self.session_id, t.c.entity_id == entity_id)
-            )
-        )
-        self.engine.execute(
-            t.insert().values(
-                session_id=self.session_id,
-                entity_id=entity_id,
-                pts=row.pts,
-                qts=row.qts,
-                date=row.date.timestamp(),
-                seq=row.seq,
-                unread_count=row.unread_count,
-            )
-        )
-
     def _update_session_table(self) -> None:
         with self.engine.begin() as conn:
             conn.execute(
@@ -96,6 +81,8 @@ class AlchemyCoreSession(AlchemySession):
         pass
 
     def delete(self) -> None:
+        self.container.update_state_buffer.discard(self.session_id)
+        self.container.entity_cache.discard(self.session_id)
         with self.engine.begin() as conn:
             conn.execute(
                 self.Session.__table__.delete().where(
@@ -152,56 +139,59 @@ class AlchemyCoreSession(AlchemySession):
                     for row in rows
                 ],
             )
+        self.container.entity_cache.put(self.session_id, rows)
 
     def get_entity_rows_by_phone(self, key: str) -> Optional[Tuple[int, int]]:
-        return self._get_entity_rows_by_condition(self.Entity.__table__.c.phone == key)
+        # Compare against an integer so the (session_id, phone) index is used.
+        return self.container.entity_cache.get_by(
+            self.session_id, "phone", key
+        ) or self._get_entity_rows_by_condition(
+            self.Entity.__table__.c.phone == int(key)
+        )
 
     def get_entity_rows_by_username(self, key: str) -> Optional[Tuple[int, int]]:
-        return self._get_entity_rows_by_condition(
-            self.Entity.__table__.c.username == key
-        )
+        return self.container.entity_cache.get_by(
+            self.session_id, "username", key
+        ) or self._get_entity_rows_by_condition(self.Entity.__table__.c.username == key)
 
     def get_entity_rows_by_name(self, key: str) -> Optional[Tuple[int, int]]:
-        return self._get_entity_rows_by_condition(self.Entity.__table__.c.name == key)
+        # Matches the (session_id, lower(name)) expression index.
+        return self.container.entity_cache.get_by(
+            self.session_id, "name", key
+        ) or self._get_entity_rows_by_condition(
+            func.lower(self.Entity.__table__.c.name) == key.lower()
+        )
 
     def _get_entity_rows_by_condition(self, condition) -> Optional[Tuple[int, int]]:
         t = self.Entity.__table__
         rows = self.engine.execute(
-            select([t.c.id, t.c.hash]).where(
+            select([t.c.id, t.c.hash, t.c.username, t.c.phone, t.c.name]).where(
                 and_(t.c.session_id == self.session_id, condition)
             )
         )
         try:
-            return next(rows)
+            row = next(rows)
         except StopIteration:
             return None
+        self.container.entity_cache.put(self.session_id, [row])
+        return row[0], row[1]
 
     def get_entity_rows_by_id(
         self, key: int, exact: bool = True
     ) -> Optional[Tuple[int, int]]:
-        t = self.Entity.__table__
         if exact:
-            rows = self.engine.execute(
-                select([t.c.id, t.c.hash]).where(
-                    and_(t.c.session_id == self.session_id, t.c.id == key)
-                )
-            )
+            ids = (key,)
         else:
             ids = (
                 utils.get_peer_id(PeerUser(key)),
                 utils.get_peer_id(PeerChat(key)),
                 utils.get_peer_id(PeerChannel(key)),
             )
-            rows = self.engine.execute(
-                select([t.c.id, t.c.hash]).where(
-                    and_(t.c.session_id == self.session_id, t.c.id.in_(ids))
-                )
-            )
 
-        try:
-            return next(rows)
-        except StopIteration:
-            return None
+        cached = self.container.entity_cache.get_by_id(self.session_id, *ids)
+        if cached:
+            return cached
+        return self._get_entity_rows_by_condition(self.Entity.__table__.c.id.in_(ids))
 
     def get_file(
         self, md5_digest: str, file_size: int, cls: Any
@@ -0,0 +1,262 @@
+import datetime
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from telethon import utils
+from telethon.crypto import AuthKey
+from telethon.sessions.memory import MemorySession, _SentFileType
+from telethon.tl.types import (
+    InputDocument,
+    InputPhoto,
+    PeerChannel,
+    PeerChat,
+    PeerUser,
+    updates,
+)
+
+if TYPE_CHECKING:
+    from .my_sqlalchemy import AlchemySessionContainer
+
+EntityRow = Tuple[int, int, Optional[str], Optional[int], Optional[str]]
+
+
+@dataclass
+class SessionSnapshot:
+    """Rows of a single session loaded from the database."""
+
+    session_id: str
+    dc_id: int = 0
+    server_address: Optional[str] = None
+    port: Optional[int] = None
+    auth_key: Optional[bytes] = None
+    entities: List[EntityRow] = field(default_factory=list)
+    update_states: List[Tuple[int, int, int, int, int, int]] = field(
+        default_factory=list
+    )
+    files: List[Tuple[bytes, int, int, int, int]] = field(default_factory=list)
+
+
+class AlchemyAsyncCoreSession(MemorySession):
+    """Session answered from memory and persisted through AsyncSessionWriter.
+
+    Reads never touch the database: the whole session is loaded once by
+    ``AlchemySessionContainer.load_session`` and every change is applied in
+    memory first, then queued as a statement for the container's writer.
+    """
+
+    def __init__(
+        self, container: "AlchemySessionContainer", snapshot: SessionSnapshot
+    ) -> None:
+        super().__init__()
+        self.container = container
+        self.writer = container.writer
+        self.Session, self.Entity, self.SentFile, self.UpdateState = (
+            container.Session,
+            container.Entity,
+            container.SentFile,
+            container.UpdateState,
+        )
+        self.session_id = snapshot.session_id
+
+        self._entities_by_id: Dict[int, EntityRow] = {}
+        self._ids_by_username: Dict[str, int] = {}
+        self._ids_by_phone: Dict[int, int] = {}
+        self._ids_by_name: Dict[str, int] = {}
+        self._apply_snapshot(snapshot)
+
+    def _apply_snapshot(self, snapshot: SessionSnapshot) -> None:
+        if snapshot.auth_key is not None:
+            self._dc_id = snapshot.dc_id
+            self._server_address = snapshot.server_address
+            self._port = snapshot.port
+            self._auth_key = AuthKey(data=snapshot.auth_key)
+
+        for row in snapshot.entities:
+            self._index_entity(tuple(row))
+
+        for entity_id, pts, qts, date, seq, unread_count in snapshot.update_states:
+            self._update_states[entity_id] = updates.State(
+                pts,
+                qts,
+                datetime.datetime.utcfromtimestamp(date),
+                seq,
+                unread_count,
+            )
+
+        for md5_digest, file_size, file_type, id, hash in snapshot.files:
+            key = (md5_digest, file_size, _SentFileType(file_type))
+            self._files[key] = (id, hash)
+
+    def clone(self, to_instance=None) -> MemorySession:
+        return super().clone(MemorySession())
+
+    def set_dc(self, dc_id: int, server_address: str, port: int) -> None:
+        super().set_dc(dc_id, server_address, port)
+        self._update_session_table()
+
+    @MemorySession.auth_key.setter
+    def auth_key(self, value: AuthKey) -> None:
+        self._auth_key = value
+        self._update_session_table()
+
+    def _update_session_table(self) -> None:
+        t = self.Session.__table__
+        self.writer.submit(delete(t).where(t.c.session_id == self.session_id))
+        self.writer.submit(
+            t.insert().values(
+                session_id=self.session_id,
+                dc_id=self._dc_id,
+                server_address=self._server_address,
+                port=self._port,
+                auth_key=(self._auth_key.key if self._auth_key else b""),
+            )
+        )
+
+    def set_update_state(self, entity_id: int, row: Any) -> None:
+        if not row:
+            return
+        super().set_update_state(entity_id, row)
+        self.container.update_state_buffer.put(self.session_id, entity_id, row)
+
+    def save(self) -> None:
+        # Writes are flushed by the container's AsyncSessionWriter.
+        pass
+
+    def close(self) -> None:
+        # The writer is managed by AlchemySessionContainer, only make sure the
+        # buffered update states of this session reach the database.
+        self.container.update_state_buffer.flush_soon()
+
+    def delete(self) -> None:
+        self.container.update_state_buffer.discard(self.session_id)
+        for table in (self.Session, self.Entity, self.SentFile, self.UpdateState):
+            t = table.__table__
+            self.writer.submit(delete(t).where(t.c.session_id == self.session_id))
+
+        self._auth_key = None
+        self._files.clear()
+        self._update_states.clear()
+        self._entities_by_id.clear()
+        self._ids_by_username.clear()
+        self._ids_by_phone.clear()
+        self._ids_by_name.clear()
+
+    def _entity_values_to_row(
+        self, id: int, hash: int, username: str, phone: str, name: str
+    ) -> EntityRow:
+        # Phones are stored as BigInteger, keep the in-memory rows comparable.
+        return id, hash, username, int(phone) if phone else None, name
+
+    def _index_entity(self, row: EntityRow) -> None:
+        id, _, username, phone, name = row
+        old = self._entities_by_id.get(id)
+        if old is not None:
+            self._unindex(self._ids_by_username, old[2], id)
+            self._unindex(self._ids_by_phone, old[3], id)
+            self._unindex(self._ids_by_name, old[4] and old[4].lower(), id)
+
+        self._entities_by_id[id] = row
+        if username is not None:
+            self._ids_by_username[username] = id
+        if phone is not None:
+            self._ids_by_phone[phone] = id
+        if name is not None:
+            self._ids_by_name[name.lower()] = id
+
+    @staticmethod
+    def _unindex(index: Dict[Any, int], key: Any, id: int) -> None:
+        if key is not None and index.get(key) == id:
+            del index[key]
+
+    def process_entities(self, tlo: Any) -> None:
+        # The same peer may appear several times in one update, and a single
+        # upsert statement can't touch a row twice.
+        rows = [
+            row
+            for row in {row[0]: row for row in self._entities_to_rows(tlo)}.values()
+            if self._entities_by_id.get(row[0]) != row
+        ]
+        if not rows:
+            return
+
+        for row in rows:
+            self._index_entity(row)
+
+        t = self.Entity.__table__
+        ins = insert(t).values(
+            [
+                dict(
+                    session_id=self.session_id,
+                    id=row[0],
+                    hash=row[1],
+                    username=row[2],
+                    phone=row[3],
+                    name=row[4],
+                )
+                for row in rows
+            ]
+        )
+        self.writer.submit(
+            ins.on_conflict_do_update(
+                constraint=t.primary_key,
+                set_={
+                    "hash": ins.excluded.hash,
+                    "username": ins.excluded.username,
+                    "phone": ins.excluded.phone,
+                    "name": ins.excluded.name,
+                },
+            )
+        )
+
+    def _get_entity_rows(self, id: Optional[int]) -> Optional[Tuple[int, int]]:
+        row = self._entities_by_id.get(id) if id is not None else None
+        return (row[0], row[1]) if row else None
+
+    def get_entity_rows_by_phone(self, key: str) -> Optional[Tuple[int, int]]:
+        return self._get_entity_rows(self._ids_by_phone.get(int(key)))
+
+    def get_entity_rows_by_username(self, key: str) -> Optional[Tuple[int, int]]:
+        return self._get_entity_rows(self._ids_by_username.get(key))
+
+    def get_entity_rows_by_name(self, key: str) -> Optional[Tuple[int, int]]:
+        return self._get_entity_rows(self._ids_by_name.get(key.lower()))
+
+    def get_entity_rows_by_id(
+        self, key: int, exact: bool = True
+    ) -> Optional[Tuple[int, int]]:
+        if exact:
+            return self._get_entity_rows(key)
+
+        for id in (
+            utils.get_peer_id(PeerUser(key)),
+            utils.get_peer_id(PeerChat(key)),
+            utils.get_peer_id(PeerChannel(key)),
+        ):
+            rows = self._get_entity_rows(id)
+            if rows:
+                return rows
+        return None
+
+    def cache_file(
+        self,
+        md5_digest: str,
+        file_size: int,
+        instance: Union[InputDocument, InputPhoto],
+    ) -> None:
+        super().cache_file(md5_digest, file_size, instance)
+
+        t = self.SentFile.__table__
+        values = dict(id=instance.id, hash=instance.access_hash)
+        self.writer.submit(
+            insert(t)
+            .values(
+                session_id=self.session_id,
+                md5_digest=md5_digest,
+                type=_SentFileType.from_type(type(instance)).value,
+                file_size=file_size,
+                **values,
+            )
+            .on_conflict_do_update(constraint=t.primary_key, set_=values)
+        )
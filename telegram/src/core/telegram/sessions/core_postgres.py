@@ -8,22 +8,6 @@ from .core import AlchemyCoreSession
 
 
 class AlchemyPostgresCoreSession(AlchemyCoreSession):
-    def set_update_state(self, entity_id: int, row: Any) -> None:
-        t = self.UpdateState.__table__
-        values = dict(
-            pts=row.pts,
-            qts=row.qts,
-            date=row.date.timestamp(),
-            seq=row.seq,
-            unread_count=row.unread_count,
-        )
-        with self.engine.begin() as conn:
-            conn.execute(
-                insert(t)
-                .values(session_id=self.session_id, entity_id=entity_id, **values)
-                .on_conflict_do_update(constraint=t.primary_key, set_=values)
-            )
-
     def process_entities(self, tlo: Any) -> None:
         rows = self._entities_to_rows(tlo)
         if not rows:
@@ -55,6 +39,7 @@ class AlchemyPostgresCoreSession(AlchemyCoreSession):
                     for row in rows
                 ],
             )
+        self.container.entity_cache.put(self.session_id, rows)
 
     def cache_file(
         self,
@@ -1,9 +1,12 @@
-from typing import Any, Dict, Optional, Tuple, Union
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import sqlalchemy as sql
 from sqlalchemy import (
     BigInteger,
     Column,
+    Index,
     Integer,
     LargeBinary,
     String,
@@ -12,12 +15,17 @@ from sqlalchemy import (
     orm,
     select,
 )
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm.scoping import scoped_session
 
+from .buffer import UpdateStateBuffer
+from .cache import EntityCache
 from .core import AlchemyCoreSession
+from .core_async import AlchemyAsyncCoreSession, SessionSnapshot
 from .core_postgres import AlchemyPostgresCoreSession
 from .orm import AlchemySession
+from .writer import AsyncSessionWriter
 
 LATEST_VERSION = 2
 
@@ -30,11 +38,32 @@ class AlchemySessionContainer:
         table_prefix: str = "",
         table_base: Optional[declarative_base] = None,
         manage_tables: bool = True,
+        async_engine: Optional[AsyncEngine] = None,
+        update_state_flush_interval: float = 1.0,
+        update_state_max_pending: int = 1000,
+        entity_cache_size: int = 100_000,
+        entity_cache_ttl: float = 3600.0,
+        snapshot_ttl: float = 300.0,
     ) -> None:
         if isinstance(engine, str):
             engine = sql.create_engine(engine)
 
         self.db_engine = engine
+        self.async_engine = async_engine
+        self.writer = AsyncSessionWriter(async_engine) if async_engine else None
+        if async_engine and async_engine.dialect.name != "postgresql":
+            raise ValueError("Async mode is only supported for PostgreSQL.")
+        self.update_state_buffer = UpdateStateBuffer(
+            self,
+            flush_interval=update_state_flush_interval,
+            max_pending=update_state_max_pending,
+        )
+        self.entity_cache = EntityCache(
+            max_size=entity_cache_size, ttl=entity_cache_ttl
+        )
+        self._snapshots: Dict[str, SessionSnapshot] = {}
+        self.snapshot_ttl = snapshot_ttl
+        self._snapshots_expire = 0.0
         if session is None:
             db_factory = orm.sessionmaker(bind=self.db_engine)
             self.db = orm.scoping.scoped_session(db_factory)
@@ -90,6 +119,10 @@ class AlchemySessionContainer:
                 raise ValueError("Can't use ORM mode without an ORM session.")
             self.alchemy_session_class = AlchemySession
 
+    @property
+    def async_mode(self) -> bool:
+        return self.async_engine is not None
+
     @staticmethod
     def create_table_classes(
         db: scoped_session, prefix: str, base: declarative_base
@@ -128,7 +161,13 @@ class AlchemySessionContainer:
         class Entity(base):
             query = qp
             __tablename__ = f"{prefix}entities"
-            __table_args__ = {"extend_existing": True}
+            __table_args__ = (
+                Index(
+                    f"ix_{prefix}entities_session_id_username", "session_id", "username"
+                ),
+                Index(f"ix_{prefix}entities_session_id_phone", "session_id", "phone"),
+                {"extend_existing": True},
+            )
 
             session_id = Column(String(20), primary_key=True)
             id = Column(BigInteger, primary_key=True)
@@ -147,6 +186,12 @@ class AlchemySessionContainer:
                     self.name,
                 )
 
+        Index(
+            f"ix_{prefix}entities_session_id_lower_name",
+            Entity.session_id,
+            func.lower(Entity.name),
+        )
+
         class SentFile(base):
             query = qp
             __tablename__ = f"{prefix}sent_files"
@@ -230,8 +275,143 @@ class AlchemySessionContainer:
         self.db.commit()
 
     def new_session(self, session_id: str) -> "AlchemySession":
+        if self.async_mode:
+            raise ValueError("Use load_session() in async mode.")
         return self.alchemy_session_class(self, session_id)
 
+    async def load_session(
+        self, session_id: str
+    ) -> Union["AlchemySession", AlchemyAsyncCoreSession]:
+        """Returns a session, loading it through the AsyncEngine in async mode.
+
+        Sessions loaded beforehand by ``preload_sessions`` are built from memory.
+        """
+        if not self.async_mode:
+            return self.new_session(session_id)
+
+        snapshot = self.pop_snapshot(session_id)
+        if snapshot is None:
+            snapshots = await self._load_snapshots(session_id)
+            snapshot = snapshots.get(session_id, SessionSnapshot(session_id))
+        return AlchemyAsyncCoreSession(self, snapshot)
+
+    async def preload_sessions(self) -> List[Dict[str, Union[str, int]]]:
+        """Loads every account and session with a single query per table.
+
+        Returns the accounts and keeps the session rows in memory, so the
+        following ``load_session``/``new_session`` calls don't hit the database.
+        The rows are kept for the startup only: until ``discard_snapshots`` or
+        for ``snapshot_ttl`` seconds, later sessions are loaded from the
+        database again as the rows may have changed meanwhile.
+        """
+        a = self.Account.__table__
+        accounts_query = select(a.c.session_id, a.c.api_id, a.c.api_hash)
+        if self.async_mode:
+            async with self.async_engine.connect() as conn:
+                accounts = (await conn.execute(accounts_query)).all()
+        else:
+            accounts = await asyncio.to_thread(self._execute_sync, accounts_query)
+
+        self._snapshots = await self._load_snapshots()
+        self._snapshots_expire = time.monotonic() + self.snapshot_ttl
+        return [
+            {"session_id": session_id, "api_id": api_id, "api_hash": api_hash}
+            for session_id, api_id, api_hash in accounts
+        ]
+
+    def pop_snapshot(self, session_id: str) -> Optional[SessionSnapshot]:
+        if self._snapshots and time.monotonic() >= self._snapshots_expire:
+            self.discard_snapshots()
+        return self._snapshots.pop(session_id, None)
+
+    def discard_snapshots(self) -> None:
+        """Drops the session rows preloaded and not used by the startup."""
+        self._snapshots = {}
+
+    def _execute_sync(self, query: Any) -> List[Any]:
+        with self.db_engine.connect() as conn:
+            return conn.execute(query).all()
+
+    async def _load_snapshots(
+        self, session_id: Optional[str] = None
+    ) -> Dict[str, SessionSnapshot]:
+        s, e, f, u = (
+            self.Session.__table__,
+            self.Entity.__table__,
+            self.SentFile.__table__,
+            self.UpdateState.__table__,
+        )
+        queries = [
+            select(
+                s.c.session_id, s.c.dc_id, s.c.server_address, s.c.port, s.c.auth_key
+            )
+        ]
+        if self.async_mode:
+            # Async sessions answer everything from memory, so the remaining
+            # tables are loaded too.
+            queries += [
+                select(
+                    e.c.session_id, e.c.id, e.c.hash, e.c.username, e.c.phone, e.c.name
+                ),
+                select(
+                    u.c.session_id,
+                    u.c.entity_id,
+                    u.c.pts,
+                    u.c.qts,
+                    u.c.date,
+                    u.c.seq,
+                    u.c.unread_count,
+                ),
+                select(
+                    f.c.session_id,
+                    f.c.md5_digest,
+                    f.c.file_size,
+                    f.c.type,
+                    f.c.id,
+                    f.c.hash,
+                ),
+            ]
+        if session_id is not None:
+            queries = [
+                query.where(query.selected_columns.session_id == session_id)
+                for query in queries
+            ]
+
+        if self.async_mode:
+            results = []
+            async with self.async_engine.connect() as conn:
+                for query in queries:
+                    results.append((await conn.execute(query)).all())
+        else:
+            results = [
+                await asyncio.to_thread(self._execute_sync, query) for query in queries
+            ]
+        results += [[]] * (4 - len(results))
+
+        snapshots: Dict[str, SessionSnapshot] = {}
+        sessions, entities, update_states, files = results
+        for id, dc_id, server_address, port, auth_key in sessions:
+            snapshots[id] = SessionSnapshot(id, dc_id, server_address, port, auth_key)
+        for attr, rows in (
+            ("entities", entities),
+            ("update_states", update_states),
+            ("files", files),
+        ):
+            for id, *row in rows:
+                snapshot = snapshots.setdefault(id, SessionSnapshot(id))
+                getattr(snapshot, attr).append(tuple(row))
+        return snapshots
+
+    async def start(self) -> None:
+        await self.update_state_buffer.start()
+        if self.writer:
+            await self.writer.start()
+
+    async def close(self) -> None:
+        await self.update_state_buffer.close()
+        if self.writer:
+            await self.writer.close()
+
     def has_session(self, session_id: str) -> bool:
         if self.core_mode:
             query = select([func.count()]).where(
@@ -261,6 +441,8 @@ class AlchemySessionContainer:
 
     def delete(self, session_id: str) -> None:
         """Удаляет все данные, связанные с указанным session_id, из всех таблиц."""
+        self.update_state_buffer.discard(session_id)
+        self.entity_cache.discard(session_id)
         try:
             if self.core_mode:
                 # Режим без ORM - используем прямое выполнение SQL
@@ -15,6 +15,7 @@ from telethon.tl.types import (
 )
 
 if TYPE_CHECKING:
+    from .core_async import SessionSnapshot
     from .my_sqlalchemy import AlchemySessionContainer
 
 
@@ -32,7 +33,20 @@ class AlchemySession(MemorySession):
             container.UpdateState,
         )
         self.session_id = session_id
-        self._load_session()
+
+        snapshot = container.pop_snapshot(session_id)
+        self._from_snapshot = snapshot is not None
+        if self._from_snapshot:
+            self._apply_snapshot(snapshot)
+        else:
+            self._load_session()
+
+    def _apply_snapshot(self, snapshot: "SessionSnapshot") -> None:
+        if snapshot.auth_key is not None:
+            self._dc_id = snapshot.dc_id
+            self._server_address = snapshot.server_address
+            self._port = snapshot.port
+            self._auth_key = AuthKey(data=snapshot.auth_key)
 
     def _load_session(self) -> None:
         sessions = self._db_query(self.Session).all()
@@ -56,9 +70,24 @@ class AlchemySession(MemorySession):
     def set_dc(self, dc_id: str, server_address: str, port: int) -> None:
         super().set_dc(dc_id, server_address, port)
         self._update_session_table()
-        self._auth_key = self._get_auth_key()
+        if not self._from_snapshot:
+            # A preloaded session already holds the key it has just written.
+            self._auth_key = self._get_auth_key()
+
+    def _get_pending_update_state(self, entity_id: int) -> Optional[updates.State]:
+        row = self.container.update_state_buffer.get(self.session_id, entity_id)
+        if row:
+            date = datetime.datetime.utcfromtimestamp(row["date"])
+            return updates.State(
+                row["pts"], row["qts"], date, row["seq"], row["unread_count"]
+            )
+        return None
 
     def get_update_state(self, entity_id: int) -> Optional[updates.State]:
+        state = self._get_pending_update_state(entity_id)
+        if state:
+            return state
+
         row = self.UpdateState.query.get((self.session_id, entity_id))
         if row:
             date = datetime.datetime.utcfromtimestamp(row.date)
@@ -67,18 +96,7 @@ class AlchemySession(MemorySession):
 
     def set_update_state(self, entity_id: int, row: Any) -> None:
         if row:
-            self.db.merge(
-                self.UpdateState(
-                    session_id=self.session_id,
-                    entity_id=entity_id,
-                    pts=row.pts,
-                    qts=row.qts,
-                    date=row.date.timestamp(),
-                    seq=row.seq,
-                    unread_count=row.unread_count,
-                )
-            )
-            self.save()
+            self.container.update_state_buffer.put(self.session_id, entity_id, row)
 
     @MemorySession.auth_key.setter
     def auth_key(self, value: AuthKey) -> None:
@@ -104,10 +122,12 @@ class AlchemySession(MemorySession):
         self.container.save()
 
     def close(self) -> None:
-        # Nothing to do here, connection is managed by AlchemySessionContainer.
-        pass
+        # The connection is managed by AlchemySessionContainer, only make sure
+        # the buffered update states of this session reach the database.
+        self.container.update_state_buffer.flush_soon()
 
     def delete(self) -> None:
+        self.container.update_state_buffer.discard(self.session_id)
         self._db_query(self.Session).delete()
         self._db_query(self.Entity).delete()
         self._db_query(self.SentFile).delete()
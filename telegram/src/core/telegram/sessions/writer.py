@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Executable
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSessionWriter:
+    """Executes session writes in the background on an AsyncEngine.
+
+    Telethon calls the session hooks synchronously, so they can't await the
+    database.  Statements are queued instead and a single task runs them in
+    submission order, grouping everything queued so far into one transaction.
+
+    A batch that fails on the connection is retried with backoff until the
+    database is back.  A batch that fails on a statement is written again one
+    statement at a time, each retried ``max_retries`` times, so only the
+    statements that keep failing are dropped.
+    """
+
+    def __init__(
+        self, engine: AsyncEngine, max_batch: int = 500, max_retries: int = 3
+    ) -> None:
+        self._engine = engine
+        self._max_batch = max_batch
+        self._max_retries = max_retries
+        self._queue: asyncio.Queue[Optional[Executable]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, statement: Executable) -> None:
+        self._queue.put_nowait(statement)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        await self._queue.join()
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        # Connection errors aren't retried for good anymore, so a database
+        # that is down doesn't block the shutdown.
+        self._closing = True
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+        self._closing = False
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            statements = [stmt for stmt in batch if stmt is not None]
+            if statements:
+                await self._execute(statements)
+            for _ in batch:
+                self._queue.task_done()
+
+            if len(statements) != len(batch):
+                return
+
+    async def _execute(self, statements: List[Any]) -> None:
+        # A batch of several statements is split up rather than retried.
+        retries = self._max_retries if len(statements) == 1 else 0
+        try:
+            await self._retry(statements, retries)
+            return
+        except Exception as e:
+            # Connection errors only get here while closing.
+            if _is_transient(e) or len(statements) == 1:
+                self._drop(statements, e)
+                return
+            logger.warning(
+                f"Failed to write {len(statements)} session statements, "
+                f"writing them one by one: {e}"
+            )
+        for n, stmt in enumerate(statements):
+            try:
+                await self._retry([stmt], retries=self._max_retries)
+            except Exception as e:
+                if _is_transient(e):
+                    self._drop(statements[n:], e)
+                    return
+                self._drop([stmt], e)
+
+    async def _retry(self, statements: List[Any], retries: int) -> None:
+        """Writes the statements in one transaction.  Connection errors are
+        retried until the writer closes, other errors ``retries`` times."""
+        delay = 1.0
+        attempt = 0
+        while True:
+            try:
+                async with self._engine.begin() as conn:
+                    for stmt in statements:
+                        await conn.execute(stmt)
+                return
+            except Exception as e:
+                attempt += 1
+                if (self._closing or not _is_transient(e)) and attempt > retries:
+                    raise
+                logger.error(
+                    f"Failed to write {len(statements)} session statements, "
+                    f"retrying in {delay}s: {e}",
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    @staticmethod
+    def _drop(statements: List[Any], error: Exception) -> None:
+        logger.error(
+            f"Dropped {len(statements)} session statements that keep failing: "
+            f"{error}",
+            exc_info=error,
+        )
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether the error is one of the connection rather than the statements."""
+    if getattr(error, "connection_invalidated", False):
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, OSError))
@@ -16,3 +16,5 @@ class TelegramMessageReceived(Event):
     media_type: Optional[str] = None
     reply_to_msg_id: Optional[int] = None
     forwarded_from: Optional[str] = None
+    # Sessions of the accounts that received the message.
+    seen_by: tuple[str, ...] = ()
@@ -0,0 +1,165 @@
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+from src.core.telegram.config import TelegramConfig
+from src.domain.telegram.services.scheduler import RequestScheduler
+from telethon import TelegramClient, utils
+from telethon.tl import functions, types
+from telethon.tl.custom import Message
+
+logger = logging.getLogger(__name__)
+
+# The update_state row of the common message box, others are channels.
+COMMON_STATE_ID = 0
+
+
+@dataclass
+class CatchUpStats:
+    accounts: int = 0
+    requests: int = 0
+    messages: int = 0
+    channels: int = 0
+    too_long: int = 0
+
+
+class UpdateCatchUp:
+    """Fetches the messages an account received while the service was down.
+
+    Starts from the ``update_state`` rows of the account's session, persisted
+    when its client last disconnected, and follows ``updates.getDifference``
+    and ``updates.getChannelDifference`` until the account is caught up,
+    ``catch_up_batch`` updates per request.
+    """
+
+    def __init__(self, scheduler: RequestScheduler, config: TelegramConfig) -> None:
+        self.scheduler = scheduler
+        self.config = config
+        self._stats = CatchUpStats()
+
+    @property
+    def stats(self) -> CatchUpStats:
+        return self._stats
+
+    async def iter_missed(
+        self,
+        session_id: str,
+        client: TelegramClient,
+        states: Dict[int, types.updates.State],
+    ) -> AsyncIterator[Message]:
+        """Yields the missed messages, oldest first within each box."""
+        self._stats.accounts += 1
+        common = states.get(COMMON_STATE_ID)
+        if common is None:
+            logger.info(f"No update state stored for {session_id}, nothing to catch up")
+            return
+
+        async for message in self._iter_common(session_id, client, common):
+            yield message
+        for channel_id, state in states.items():
+            if channel_id == COMMON_STATE_ID:
+                continue
+            async for message in self._iter_channel(
+                session_id, client, channel_id, state.pts
+            ):
+                yield message
+
+    async def _iter_common(
+        self, session_id: str, client: TelegramClient, state: types.updates.State
+    ) -> AsyncIterator[Message]:
+        pts, qts, date = state.pts, state.qts, state.date
+        while True:
+            self._stats.requests += 1
+            diff = await self.scheduler.call(
+                session_id,
+                "get_difference",
+                client,
+                functions.updates.GetDifferenceRequest(
+                    pts=pts, date=date, qts=qts, pts_limit=self.config.catch_up_batch
+                ),
+            )
+            if isinstance(diff, types.updates.DifferenceEmpty):
+                return
+            if isinstance(diff, types.updates.DifferenceTooLong):
+                # Telegram won't replay a gap this long, the messages in it
+                # are only reachable through the history.
+                self._stats.too_long += 1
+                logger.warning(f"Update gap of {session_id} is too long to catch up")
+                return
+
+            messages = list(diff.new_messages)
+            messages.extend(
+                update.message
+                for update in diff.other_updates
+                if isinstance(update, types.UpdateNewChannelMessage)
+            )
+            for message in self._finish(client, messages, diff.users, diff.chats):
+                yield message
+
+            if isinstance(diff, types.updates.Difference):
+                return
+            pts = diff.intermediate_state.pts
+            qts = diff.intermediate_state.qts
+            date = diff.intermediate_state.date
+
+    async def _iter_channel(
+        self, session_id: str, client: TelegramClient, channel_id: int, pts: int
+    ) -> AsyncIterator[Message]:
+        try:
+            channel = utils.get_input_channel(
+                client.session.get_input_entity(channel_id)
+            )
+        except (ValueError, TypeError):
+            logger.warning(f"No access hash of channel {channel_id}, can't catch up")
+            return
+
+        self._stats.channels += 1
+        while True:
+            self._stats.requests += 1
+            diff = await self.scheduler.call(
+                session_id,
+                "get_channel_difference",
+                client,
+                functions.updates.GetChannelDifferenceRequest(
+                    channel=channel,
+                    filter=types.ChannelMessagesFilterEmpty(),
+                    pts=pts,
+                    limit=self.config.catch_up_batch,
+                ),
+            )
+            if isinstance(diff, types.updates.ChannelDifferenceEmpty):
+                return
+            if isinstance(diff, types.updates.ChannelDifferenceTooLong):
+                # Only the latest messages of the channel are sent back.
+                self._stats.too_long += 1
+                messages = sorted(diff.messages, key=lambda m: m.id)
+                for message in self._finish(client, messages, diff.users, diff.chats):
+                    yield message
+                return
+
+            for message in self._finish(
+                client, diff.new_messages, diff.users, diff.chats
+            ):
+                yield message
+            if diff.final:
+                return
+            pts = diff.pts
+
+    def _finish(
+        self,
+        client: TelegramClient,
+        messages: Iterable[Any],
+        users: List[Any],
+        chats: List[Any],
+    ) -> List[Message]:
+        entities = {utils.get_peer_id(x): x for x in [*users, *chats]}
+        finished = []
+        for message in messages:
+            # Service messages aren't NewMessage events either.
+            if not isinstance(message, types.Message):
+                continue
+            message._finish_init(client, entities, None)
+            finished.append(message)
+        self._stats.messages += len(finished)
+        return finished
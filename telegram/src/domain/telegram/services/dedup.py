@@ -0,0 +1,66 @@
+import time
+from dataclasses import dataclass
+from typing import List, Set
+
+# Message ids fit in 32 bits, so a peer id and a message id pack into one int.
+MESSAGE_ID_BITS = 32
+
+
+@dataclass
+class DedupStats:
+    checked: int = 0
+    hits: int = 0
+    keys: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.checked if self.checked else 0.0
+
+
+class MessageDeduplicator:
+    """Remembers the (peer id, message id) pairs seen in the last ``ttl`` seconds.
+
+    Keys are packed into ints and kept in ``buckets`` sets, each covering an
+    equal slice of ``ttl``. When the newest bucket is older than its slice a new
+    one replaces the oldest, so memory is bounded by the traffic of ``ttl``
+    seconds and a key is remembered between ``ttl * (buckets - 1) / buckets``
+    and ``ttl`` seconds.
+    """
+
+    def __init__(self, ttl: float = 60.0, buckets: int = 6) -> None:
+        self.ttl = ttl
+        self._span = ttl / buckets
+        self._buckets: List[Set[int]] = [set() for _ in range(buckets)]
+        self._started = time.monotonic()
+        self._stats = DedupStats()
+
+    @property
+    def stats(self) -> DedupStats:
+        self._stats.keys = sum(len(bucket) for bucket in self._buckets)
+        return self._stats
+
+    @staticmethod
+    def key(peer_id: int, message_id: int) -> int:
+        return (peer_id << MESSAGE_ID_BITS) | message_id
+
+    def seen(self, key: int) -> bool:
+        """Returns True if the key was seen already, remembers it otherwise."""
+        self._rotate()
+        self._stats.checked += 1
+        if any(key in bucket for bucket in self._buckets):
+            self._stats.hits += 1
+            return True
+        self._buckets[-1].add(key)
+        return False
+
+    def _rotate(self) -> None:
+        now = time.monotonic()
+        while now - self._started >= self._span:
+            self._buckets.pop(0)
+            self._buckets.append(set())
+            self._started += self._span
+            if now - self._started >= self.ttl:
+                # Idle for longer than ttl, every bucket is stale.
+                for bucket in self._buckets:
+                    bucket.clear()
+                self._started = now
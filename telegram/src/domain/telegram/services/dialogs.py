@@ -0,0 +1,469 @@
+import asyncio
+import itertools
+import logging
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.core.telegram.config import TelegramConfig
+from src.core.telegram.dialogs import DialogRow, DialogStore
+from src.domain.telegram.services.scheduler import RequestScheduler
+from telethon import TelegramClient, events, utils
+from telethon.extensions import BinaryReader
+from telethon.tl.custom import Dialog
+from telethon.tl.functions.messages import GetPeerDialogsRequest
+from telethon.tl.types import (
+    ChatEmpty,
+    InputDialogPeer,
+    PeerChannel,
+    UpdateReadChannelInbox,
+    UpdateReadHistoryInbox,
+    UserEmpty,
+)
+
+logger = logging.getLogger(__name__)
+
+READ_UPDATES = (UpdateReadHistoryInbox, UpdateReadChannelInbox)
+
+
+@dataclass
+class DialogsDelta:
+    """Dialogs changed after ``since`` and the peer ids dropped since then.
+
+    Versions only compare within an ``epoch``, a new one starts whenever the
+    account's dialogs are loaded anew, e.g. after a restart. A delta asked for
+    with another epoch, a version it never reached or one older than the
+    removals still remembered, is ``full``: it has every dialog and the caller
+    replaces what it has.
+    """
+
+    version: int
+    epoch: str
+    dialogs: List[Dialog] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    full: bool = False
+
+
+@dataclass
+class _AccountDialogs:
+    dialogs: Dict[int, Dialog] = field(default_factory=dict)
+    changed: Dict[int, int] = field(default_factory=dict)
+    removed: Dict[int, int] = field(default_factory=dict)
+    # Peer ids of the dialogs outside channels by their top message id.
+    tops: Dict[int, int] = field(default_factory=dict)
+    version: int = 0
+    # Oldest version a delta can start from, removals before it are dropped.
+    floor: int = 0
+    epoch: str = field(default_factory=lambda: uuid.uuid4().hex)
+    complete: bool = False
+    # Peers to write to or delete from the dialogs table on the next flush.
+    dirty: Set[int] = field(default_factory=set)
+    deleted: Set[int] = field(default_factory=set)
+
+
+class DialogIndex:
+    """Dialogs of every account keyed by peer id.
+
+    Dialogs are added from full ``get_dialogs()`` results and from targeted
+    ``GetPeerDialogsRequest`` lookups, then kept current from the client's
+    new message, edit, delete and read updates. Every change bumps the
+    account's version, so callers can ask for the dialogs changed since the
+    version they already have.
+
+    The lists are persisted to the ``dialogs`` table and restored when the
+    account's client is attached after a restart. A restored or reconnected
+    account missed updates, so it is reconciled in the background: dialogs are
+    crawled from the newest until the stored top message date is reached.
+    """
+
+    def __init__(
+        self,
+        store: DialogStore,
+        scheduler: RequestScheduler,
+        config: TelegramConfig,
+    ) -> None:
+        self.store = store
+        self.scheduler = scheduler
+        self.flush_interval = config.dialog_flush_interval
+        self.delta_history = config.dialog_delta_history
+        self._accounts: Dict[str, _AccountDialogs] = {}
+        self._clients: Dict[str, TelegramClient] = {}
+        self._snapshots: Dict[str, List[DialogRow]] = {}
+        self._reconciling: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._snapshots = await self.store.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        tasks = [task for task in (self._task, *self._reconciling.values()) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._reconciling.clear()
+        await self.flush()
+
+    def attach(self, session_id: str, client: TelegramClient) -> None:
+        if self._clients.get(session_id) is client:
+            return
+        self._clients[session_id] = client
+        snapshot = self._snapshots.pop(session_id, None)
+        if snapshot:
+            self._restore(session_id, client, snapshot)
+        account = self._accounts.get(session_id)
+        if account is not None and account.complete:
+            self._reconcile_soon(session_id, client)
+
+        async def on_new_message(event: events.NewMessage.Event) -> None:
+            await self._on_new_message(session_id, event)
+
+        async def on_edit(event: events.MessageEdited.Event) -> None:
+            self._on_edit(session_id, event.message)
+
+        async def on_delete(event: events.MessageDeleted.Event) -> None:
+            await self._on_delete(session_id, event)
+
+        async def on_read(update: Any) -> None:
+            self._on_read(session_id, update)
+
+        client.add_event_handler(on_new_message, events.NewMessage())
+        client.add_event_handler(on_edit, events.MessageEdited())
+        client.add_event_handler(on_delete, events.MessageDeleted())
+        client.add_event_handler(on_read, events.Raw(types=READ_UPDATES))
+
+    def get(self, session_id: str, peer_id: int) -> Optional[Dialog]:
+        account = self._accounts.get(session_id)
+        return account.dialogs.get(peer_id) if account else None
+
+    def put(self, session_id: str, dialogs: Iterable[Dialog]) -> None:
+        account = self._accounts.setdefault(session_id, _AccountDialogs())
+        for dialog in dialogs:
+            old = account.dialogs.get(dialog.id)
+            if old is not None:
+                self._untrack(account, old)
+            account.dialogs[dialog.id] = dialog
+            self._track(account, dialog)
+            account.removed.pop(dialog.id, None)
+            account.deleted.discard(dialog.id)
+            self._changed(account, dialog.id)
+
+    def load(self, session_id: str, dialogs: Iterable[Dialog]) -> None:
+        """Replaces the dialogs of the account with a full dialog list."""
+        account = self._accounts.setdefault(session_id, _AccountDialogs())
+        dialogs = list(dialogs)
+        for peer_id in account.dialogs.keys() - {dialog.id for dialog in dialogs}:
+            self._remove(account, peer_id)
+        self.put(session_id, dialogs)
+        account.complete = True
+
+    def list(self, session_id: str) -> Optional[List[Dialog]]:
+        """Returns the dialogs in Telegram's order, or None if not loaded yet."""
+        account = self._accounts.get(session_id)
+        if account is None or not account.complete:
+            return None
+        return self._sorted(account.dialogs.values())
+
+    def delta(
+        self, session_id: str, since: int, epoch: Optional[str] = None
+    ) -> Optional[DialogsDelta]:
+        account = self._accounts.get(session_id)
+        if account is None or not account.complete:
+            return None
+        if epoch != account.epoch or since > account.version or since < account.floor:
+            return DialogsDelta(
+                version=account.version,
+                epoch=account.epoch,
+                dialogs=self._sorted(account.dialogs.values()),
+                full=True,
+            )
+        return DialogsDelta(
+            version=account.version,
+            epoch=account.epoch,
+            dialogs=self._sorted(
+                account.dialogs[peer_id]
+                for peer_id, version in account.changed.items()
+                if version > since
+            ),
+            removed=[
+                peer_id
+                for peer_id, version in account.removed.items()
+                if version > since
+            ],
+        )
+
+    async def fetch(
+        self, session_id: str, client: TelegramClient, entity: Any
+    ) -> Optional[Dialog]:
+        """Loads the dialog of a single peer and adds it to the index."""
+        input_peer = await client.get_input_entity(entity)
+        # The client stores the users and chats of the result in its session,
+        # get_input_entity resolves them from there.
+        r = await client(GetPeerDialogsRequest([InputDialogPeer(input_peer)]))
+
+        entities = {
+            utils.get_peer_id(x): x
+            for x in itertools.chain(r.users, r.chats)
+            if not isinstance(x, (UserEmpty, ChatEmpty))
+        }
+
+        messages = {}
+        for m in r.messages:
+            m._finish_init(client, entities, None)
+            messages[(utils.get_peer_id(m.peer_id), m.id)] = m
+
+        dialogs = [
+            Dialog(
+                client,
+                d,
+                entities,
+                messages.get((utils.get_peer_id(d.peer), d.top_message)),
+            )
+            for d in r.dialogs
+            if utils.get_peer_id(d.peer) in entities
+        ]
+        self.put(session_id, dialogs)
+        return dialogs[0] if dialogs else None
+
+    @staticmethod
+    def _sorted(dialogs: Iterable[Dialog]) -> List[Dialog]:
+        return sorted(
+            dialogs,
+            key=lambda d: (not d.pinned, -(d.date.timestamp() if d.date else 0)),
+        )
+
+    async def flush(self) -> None:
+        rows: List[DialogRow] = []
+        deleted: List[Tuple[str, int]] = []
+        for session_id, account in self._accounts.items():
+            for peer_id in account.dirty:
+                rows.append(self._to_row(session_id, account.dialogs[peer_id]))
+            deleted.extend((session_id, peer_id) for peer_id in account.deleted)
+        if not rows and not deleted:
+            return
+
+        drained = {
+            session_id: (account.dirty, account.deleted)
+            for session_id, account in self._accounts.items()
+        }
+        for account in self._accounts.values():
+            account.dirty, account.deleted = set(), set()
+        try:
+            await self.store.save(rows)
+            await self.store.delete(deleted)
+        except Exception as e:
+            logger.error(f"Failed to save {len(rows)} dialogs: {e}", exc_info=True)
+            for session_id, (dirty, removed) in drained.items():
+                account = self._accounts.get(session_id)
+                if account is None:
+                    continue
+                account.dirty |= {peer for peer in dirty if peer in account.dialogs}
+                account.deleted |= removed - account.dialogs.keys()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    @staticmethod
+    def _to_row(session_id: str, dialog: Dialog) -> DialogRow:
+        return DialogRow(
+            session_id=session_id,
+            peer_id=dialog.id,
+            title=(dialog.name or "")[:255],
+            top_message_id=dialog.dialog.top_message,
+            top_message_date=int(dialog.date.timestamp()) if dialog.date else None,
+            unread_count=dialog.unread_count,
+            pinned=dialog.pinned,
+            archived=dialog.archived,
+            dialog=dialog.dialog._bytes(),
+            entity=dialog.entity._bytes(),
+            message=dialog.message._bytes() if dialog.message else None,
+        )
+
+    @staticmethod
+    def _from_row(client: TelegramClient, row: DialogRow) -> Dialog:
+        entities = {row.peer_id: BinaryReader(row.entity).tgread_object()}
+        message = None
+        if row.message is not None:
+            message = BinaryReader(row.message).tgread_object()
+            message._finish_init(client, entities, None)
+        return Dialog(
+            client, BinaryReader(row.dialog).tgread_object(), entities, message
+        )
+
+    def _restore(
+        self, session_id: str, client: TelegramClient, rows: List[DialogRow]
+    ) -> None:
+        account = self._accounts.setdefault(session_id, _AccountDialogs())
+        for row in rows:
+            try:
+                dialog = self._from_row(client, row)
+            except Exception as e:
+                # Rows written by another TL layer are simply crawled again.
+                logger.warning(f"Can't restore dialog {row.peer_id}: {e}")
+                continue
+            account.dialogs[dialog.id] = dialog
+            self._track(account, dialog)
+            self._changed(account, dialog.id)
+        account.dirty.clear()
+        account.complete = True
+        logger.info(f"Restored {len(account.dialogs)} dialogs of {session_id}")
+
+    def _reconcile_soon(self, session_id: str, client: TelegramClient) -> None:
+        task = self._reconciling.get(session_id)
+        if task is None or task.done():
+            self._reconciling[session_id] = asyncio.create_task(
+                self._reconcile(session_id, client)
+            )
+
+    async def _reconcile(self, session_id: str, client: TelegramClient) -> None:
+        account = self._accounts[session_id]
+        newest = max(
+            (d.date for d in account.dialogs.values() if d.date and not d.pinned),
+            default=None,
+        )
+        changed: List[Dialog] = []
+
+        async def crawl() -> None:
+            # Dialogs come newest first, the rest didn't change since the
+            # stored snapshot was taken.
+            async for dialog in client.iter_dialogs():
+                if (
+                    newest is not None
+                    and not dialog.pinned
+                    and dialog.date is not None
+                    and dialog.date <= newest
+                ):
+                    break
+                changed.append(dialog)
+
+        try:
+            await self.scheduler.call(session_id, "get_dialogs", crawl)
+        except Exception as e:
+            logger.warning(f"Failed to reconcile dialogs of {session_id}: {e}")
+            return
+        self.put(session_id, changed)
+        logger.info(f"Reconciled {len(changed)} dialogs of {session_id}")
+
+    @staticmethod
+    def _changed(account: _AccountDialogs, peer_id: int) -> None:
+        account.version += 1
+        account.changed[peer_id] = account.version
+        account.dirty.add(peer_id)
+
+    @staticmethod
+    def _track(account: _AccountDialogs, dialog: Dialog) -> None:
+        if dialog.message is not None and not isinstance(
+            dialog.dialog.peer, PeerChannel
+        ):
+            account.tops[dialog.message.id] = dialog.id
+
+    @staticmethod
+    def _untrack(account: _AccountDialogs, dialog: Dialog) -> None:
+        if dialog.message is not None:
+            if account.tops.get(dialog.message.id) == dialog.id:
+                del account.tops[dialog.message.id]
+
+    def _remove(self, account: _AccountDialogs, peer_id: int) -> None:
+        dialog = account.dialogs.pop(peer_id, None)
+        if dialog is not None:
+            self._untrack(account, dialog)
+        account.changed.pop(peer_id, None)
+        account.dirty.discard(peer_id)
+        account.deleted.add(peer_id)
+        account.version += 1
+        # Kept in version order, the oldest removal first.
+        account.removed.pop(peer_id, None)
+        account.removed[peer_id] = account.version
+        while len(account.removed) > self.delta_history:
+            oldest = next(iter(account.removed))
+            account.floor = account.removed.pop(oldest)
+
+    async def _refetch(self, session_id: str, dialog: Dialog) -> None:
+        client = self._clients[session_id]
+        try:
+            if await self.fetch(session_id, client, dialog.input_entity) is None:
+                self._remove(self._accounts[session_id], dialog.id)
+        except Exception as e:
+            logger.warning(f"Failed to refresh dialog {dialog.id} of {session_id}: {e}")
+
+    async def _on_new_message(
+        self, session_id: str, event: events.NewMessage.Event
+    ) -> None:
+        account = self._accounts.get(session_id)
+        if account is None:
+            return
+        message = event.message
+        dialog = account.dialogs.get(message.chat_id)
+        if dialog is None:
+            # A new chat, only worth a request when the full list is served.
+            if account.complete:
+                try:
+                    await self.fetch(
+                        session_id, self._clients[session_id], event.input_chat
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"Failed to load new dialog {message.chat_id} of "
+                        f"{session_id}: {e}"
+                    )
+            return
+
+        self._untrack(account, dialog)
+        dialog.message = message
+        self._track(account, dialog)
+        dialog.date = message.date
+        dialog.dialog.top_message = message.id
+        if not message.out:
+            dialog.unread_count += 1
+            dialog.dialog.unread_count = dialog.unread_count
+        self._changed(account, dialog.id)
+
+    def _on_edit(self, session_id: str, message: Any) -> None:
+        account = self._accounts.get(session_id)
+        dialog = account.dialogs.get(message.chat_id) if account else None
+        if dialog is None or dialog.message is None:
+            return
+        if dialog.message.id == message.id:
+            dialog.message = message
+            self._changed(account, dialog.id)
+
+    async def _on_delete(
+        self, session_id: str, event: events.MessageDeleted.Event
+    ) -> None:
+        account = self._accounts.get(session_id)
+        if account is None:
+            return
+        deleted = set(event.deleted_ids)
+        if event.chat_id is not None:
+            dialog = account.dialogs.get(event.chat_id)
+            candidates = [dialog] if dialog is not None else []
+        else:
+            # Outside channels message ids are unique per account and the
+            # update doesn't say which chat they belonged to.
+            candidates = [
+                account.dialogs[account.tops[message_id]]
+                for message_id in deleted
+                if message_id in account.tops
+            ]
+        for dialog in candidates:
+            if dialog.message is not None and dialog.message.id in deleted:
+                # The new top message is only known to Telegram.
+                await self._refetch(session_id, dialog)
+
+    def _on_read(self, session_id: str, update: Any) -> None:
+        if isinstance(update, UpdateReadChannelInbox):
+            peer_id = utils.get_peer_id(PeerChannel(update.channel_id))
+        else:
+            peer_id = utils.get_peer_id(update.peer)
+        account = self._accounts.get(session_id)
+        dialog = account.dialogs.get(peer_id) if account else None
+        if dialog is None:
+            return
+        dialog.unread_count = update.still_unread_count
+        dialog.dialog.unread_count = update.still_unread_count
+        dialog.dialog.read_inbox_max_id = update.max_id
+        self._changed(account, dialog.id)
@@ -0,0 +1,150 @@
+import asyncio
+import itertools
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from src.core.telegram.config import TelegramConfig
+from src.domain.telegram.services.scheduler import RequestScheduler
+from src.domain.telegram.services.streams import prefetch
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+# The largest upload.getFile request. Offsets that are multiples of it keep
+# every request inside one megabyte, as Telegram requires.
+CHUNK_SIZE = 512 * 1024
+
+
+@dataclass
+class DownloadStats:
+    downloads: int = 0
+    chunks: int = 0
+    bytes: int = 0
+    in_flight: int = 0
+
+
+class MediaDownloader:
+    """Streams files from Telegram chunk by chunk.
+
+    A download whose byte range is known to span several chunks is split into
+    up to ``download_parallel`` interleaved ``iter_download`` streams, so that
+    many chunk requests are in flight at once. Every chunk request holds the
+    account's semaphore: an account never has more than
+    ``download_concurrency`` of them in flight, over all of its downloads.
+    Each download takes one ``download_file`` token from the scheduler, its
+    chunk requests only wait out flood waits, so the rate limit caps how many
+    downloads start rather than the throughput of one.
+    """
+
+    def __init__(self, scheduler: RequestScheduler, config: TelegramConfig) -> None:
+        self.scheduler = scheduler
+        self.config = config
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats = DownloadStats()
+
+    @property
+    def stats(self) -> DownloadStats:
+        return self._stats
+
+    async def iter_file(
+        self,
+        session_id: str,
+        client: TelegramClient,
+        location: Any,
+        dc_id: Optional[int] = None,
+        offset: int = 0,
+        end: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """Yields the bytes from ``offset`` to ``end`` inclusive, or to the end
+        of the file if ``end`` is None."""
+        await self.scheduler.acquire(session_id, "download_file")
+        base = offset - offset % CHUNK_SIZE
+        count = None if end is None else -(-(end + 1 - base) // CHUNK_SIZE)
+        streams = (
+            1 if count is None else max(1, min(self.config.download_parallel, count))
+        )
+        chunks = [
+            prefetch(
+                self._iter_stream(
+                    session_id,
+                    client,
+                    location,
+                    dc_id,
+                    base + i * CHUNK_SIZE,
+                    streams,
+                    None if count is None else -(-(count - i) // streams),
+                ),
+                1,
+            )
+            for i in range(streams)
+        ]
+
+        self._stats.downloads += 1
+        position = base
+        try:
+            for i in itertools.count() if count is None else range(count):
+                chunk = await anext(chunks[i % streams], b"")
+                start = max(offset - position, 0)
+                stop = (
+                    len(chunk) if end is None else min(len(chunk), end + 1 - position)
+                )
+                position += len(chunk)
+                if start < stop:
+                    yield chunk[start:stop]
+                # A short chunk is the last one of the file.
+                if len(chunk) < CHUNK_SIZE:
+                    return
+        finally:
+            for stream in chunks:
+                await stream.aclose()
+
+    async def _iter_stream(
+        self,
+        session_id: str,
+        client: TelegramClient,
+        location: Any,
+        dc_id: Optional[int],
+        offset: int,
+        streams: int,
+        limit: Optional[int],
+    ) -> AsyncIterator[bytes]:
+        # Without a limit Telethon can request the chunks directly, the limit is
+        # enforced here instead.
+        download = client.iter_download(
+            location,
+            offset=offset,
+            stride=streams * CHUNK_SIZE,
+            request_size=CHUNK_SIZE,
+            dc_id=dc_id,
+        )
+        semaphore = self._semaphore(session_id)
+        received = 0
+        try:
+            while limit is None or received < limit:
+                async with semaphore:
+                    self._stats.in_flight += 1
+                    try:
+                        chunk = await self.scheduler.call_unpaced(
+                            session_id, "download_file", anext, download
+                        )
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        self._stats.in_flight -= 1
+                received += 1
+                self._stats.chunks += 1
+                self._stats.bytes += len(chunk)
+                yield chunk
+        finally:
+            # Gives back the sender borrowed for another DC, if one was.
+            if getattr(download, "_sender", None) is not None:
+                await download.close()
+
+    def _semaphore(self, session_id: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(session_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.config.download_concurrency)
+            self._semaphores[session_id] = semaphore
+        return semaphore
@@ -1,44 +1,146 @@
+import asyncio
 import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from src.domain.common.service import BaseService
 from src.domain.telegram.events.message import (
     TelegramMessageReceived,
 )
+from src.domain.telegram.services.catchup import UpdateCatchUp
+from src.domain.telegram.services.dedup import MessageDeduplicator
 from src.domain.telegram.services.manager import TelegramClientManager
-from telethon import events
+from src.domain.telegram.services.pipeline import EventPipeline
+from telethon import TelegramClient, events
+from telethon.tl.types import PeerChannel
 
 logger = logging.getLogger(__name__)
 
 
 class TelegramListener(BaseService):
-    def __init__(self, manager: TelegramClientManager):
+    def __init__(
+        self,
+        manager: TelegramClientManager,
+        pipeline: EventPipeline,
+        catch_up: UpdateCatchUp,
+    ):
         super().__init__()
         self.manager = manager
+        self.pipeline = pipeline
+        self.catch_up = catch_up
+        # Live messages of the accounts still catching up, published after the
+        # missed ones.
+        self._held: Dict[str, List[Any]] = {}
+        config = manager.config
+        # Only channel message ids are shared by the accounts in the channel.
+        self.dedup: Optional[MessageDeduplicator] = (
+            MessageDeduplicator(config.dedup_ttl) if config.dedup_ttl > 0 else None
+        )
+        # Channel messages held for dedup_window and the accounts of each.
+        self._pending: Dict[int, Tuple[Any, List[str]]] = {}
+        self._pending_tasks: Dict[int, asyncio.Task] = {}
+        self._closed = False
 
     async def start_listening(self) -> None:
-        clients = await self.manager.get_connected_clients()
-        for client in clients.values():
+        clients = await self.manager.pin_clients(self.manager.config.listen_accounts)
+        semaphore = asyncio.Semaphore(self.manager.config.catch_up_concurrency)
+
+        async def listen(session_id: str, client: TelegramClient) -> None:
+            # Read before anything can replace the state stored at shutdown.
+            states = dict(client.session.get_update_states())
+            self._held[session_id] = []
 
-            @client.on(events.NewMessage)
             async def handle_new_message(event: events.NewMessage.Event):
-                message = event.message
-
-                telegram_event = TelegramMessageReceived(
-                    id=message.id,
-                    message=message.text,
-                    date=message.date,
-                    peer_id=str(message.peer_id),
-                    from_id=str(message.from_id) if message.from_id else None,
-                    is_outgoing=message.out,
-                    media_type=(
-                        message.media.__class__.__name__ if message.media else None
-                    ),
-                    reply_to_msg_id=(
-                        message.reply_to.reply_to_msg_id if message.reply_to else None
-                    ),
-                    forwarded_from=(
-                        str(message.fwd_from.from_id) if message.fwd_from else None
-                    ),
-                )
-
-                await self._record_event(telegram_event)
+                held = self._held.get(session_id)
+                if held is not None:
+                    held.append(event.message)
+                else:
+                    await self._publish(session_id, event.message)
+
+            client.add_event_handler(handle_new_message, events.NewMessage)
+            async with semaphore:
+                seen = await self._catch_up(session_id, client, states)
+
+            while held := self._held.pop(session_id):
+                # Publishing yields, so more messages may be held meanwhile.
+                self._held[session_id] = []
+                for message in held:
+                    if (message.chat_id, message.id) not in seen:
+                        await self._publish(session_id, message)
+
+        await asyncio.gather(
+            *(listen(session_id, client) for session_id, client in clients.items())
+        )
+
+    async def close(self) -> None:
+        """Publishes the channel messages still held for ``dedup_window``,
+        before the pipeline stops."""
+        self._closed = True
+        for key, task in list(self._pending_tasks.items()):
+            if key in self._pending:
+                # Still waiting out the window.
+                task.cancel()
+                await self._publish_pending(key)
+        await asyncio.gather(*self._pending_tasks.values(), return_exceptions=True)
+
+    async def _catch_up(
+        self, session_id: str, client: TelegramClient, states: Dict[int, Any]
+    ) -> Set[Tuple[int, int]]:
+        seen: Set[Tuple[int, int]] = set()
+        try:
+            async for message in self.catch_up.iter_missed(session_id, client, states):
+                key = (message.chat_id, message.id)
+                if key not in seen:
+                    seen.add(key)
+                    await self._publish(session_id, message)
+        except Exception as e:
+            logger.error(f"Catch-up of {session_id} failed: {e}", exc_info=True)
+        logger.info(f"Caught up {len(seen)} missed messages of {session_id}")
+        return seen
+
+    async def _publish(self, session_id: str, message: Any) -> None:
+        if self.dedup is None or not isinstance(message.peer_id, PeerChannel):
+            await self.pipeline.put(self._to_event(message, (session_id,)))
+            return
+
+        key = self.dedup.key(message.chat_id, message.id)
+        if self.dedup.seen(key):
+            accounts = self._pending.get(key, (None, None))[1]
+            if accounts is not None and session_id not in accounts:
+                accounts.append(session_id)
+            return
+        window = self.manager.config.dedup_window
+        if window <= 0 or self._closed:
+            await self.pipeline.put(self._to_event(message, (session_id,)))
+            return
+
+        self._pending[key] = (message, [session_id])
+        task = asyncio.create_task(self._publish_later(key, window))
+        self._pending_tasks[key] = task
+        task.add_done_callback(lambda _: self._pending_tasks.pop(key, None))
+
+    async def _publish_later(self, key: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._publish_pending(key)
+
+    async def _publish_pending(self, key: int) -> None:
+        message, accounts = self._pending.pop(key)
+        await self.pipeline.put(self._to_event(message, tuple(accounts)))
+
+    @staticmethod
+    def _to_event(message: Any, seen_by: Tuple[str, ...]) -> TelegramMessageReceived:
+        return TelegramMessageReceived(
+            id=message.id,
+            message=message.text,
+            date=message.date,
+            peer_id=str(message.peer_id),
+            from_id=str(message.from_id) if message.from_id else None,
+            is_outgoing=message.out,
+            media_type=(message.media.__class__.__name__ if message.media else None),
+            reply_to_msg_id=(
+                message.reply_to.reply_to_msg_id if message.reply_to else None
+            ),
+            forwarded_from=(
+                str(message.fwd_from.from_id) if message.fwd_from else None
+            ),
+            seen_by=seen_by,
+        )
@@ -1,23 +1,62 @@
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Union
 
+from src.core.telegram.config import TelegramConfig
 from src.core.telegram.sessions.my_sqlalchemy import AlchemySessionContainer
 from src.domain.common.service import BaseService
-from telethon import TelegramClient
+from src.domain.telegram.services.pool import TelegramClientPool
+from src.domain.telegram.services.profiles import PROFILE_UPDATES, AccountProfileCache
+from src.domain.telegram.services.sharding import HashRing
+from telethon import TelegramClient, events
 from telethon.errors import RPCError
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ClientStartupReport:
+    started: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+
 class TelegramClientManager(BaseService):
-    def __init__(self, session_container: AlchemySessionContainer):
+    def __init__(
+        self, session_container: AlchemySessionContainer, config: TelegramConfig
+    ):
         super().__init__()
         self.session_container = session_container
-        self._telegram_clients: Dict[str, TelegramClient] | None = None
+        self.config = config
+        self._telegram_clients: Dict[str, TelegramClient] = {}
+        self._accounts: Dict[str, Dict[str, Union[str, int]]] = {}
+        self.profiles = AccountProfileCache(config.profile_ttl)
+        self.pool: Optional[TelegramClientPool] = None
+        if config.client_pool:
+            self.pool = TelegramClientPool(
+                self._connect_account,
+                self._telegram_clients,
+                max_connections=config.max_connections,
+                idle_timeout=config.client_idle_timeout,
+                eviction_grace=config.client_eviction_grace,
+            )
 
     async def _load_data_from_db(self) -> List[Dict[str, str | int]]:
         try:
-            accounts_data = await self.session_container.get_accounts()
+            accounts_data = await self.session_container.preload_sessions()
+            if self.config.worker_id is not None:
+                # In supervisor mode every worker only runs the accounts it owns.
+                ring = HashRing(self.config.workers)
+                owned = []
+                for account in accounts_data:
+                    if ring.owner(account["session_id"]) == self.config.worker_id:
+                        owned.append(account)
+                    else:
+                        self.session_container.pop_snapshot(account["session_id"])
+                accounts_data = owned
             if not accounts_data:
                 logger.warning("No accounts found in the database")
                 raise Exception("No accounts found in the database")
@@ -27,16 +66,21 @@ class TelegramClientManager(BaseService):
             raise e
 
     async def start_client(
-        self, account: Dict[str, Union[str, int]]
+        self, account: Dict[str, Union[str, int]], timeout: Optional[float] = None
     ) -> Optional[TelegramClient]:
         try:
-            session = self.session_container.new_session(account["session_id"])
+            session = await self.session_container.load_session(account["session_id"])
             client = TelegramClient(
                 session=session, api_id=account["api_id"], api_hash=account["api_hash"]
             )
 
             if not client.is_connected():
-                await client.connect()
+                try:
+                    await asyncio.wait_for(client.connect(), timeout)
+                except BaseException:
+                    await client.disconnect()
+                    raise
+            await self._cache_profile(account["session_id"], client)
             return client
 
         except RPCError as e:
@@ -51,23 +95,141 @@ class TelegramClientManager(BaseService):
             )
             raise e
 
-    async def start_clients(self) -> Dict[str, TelegramClient]:
-        accounts_data = self._load_data_from_db()
+    async def start_clients(self) -> ClientStartupReport:
+        """Connects all accounts concurrently, at most max_concurrent_starts at once.
+
+        A failed or timed out account is reported and doesn't abort the others.
+        """
+        accounts_data = await self._load_data_from_db()
+        self._accounts = {account["session_id"]: account for account in accounts_data}
+        if self.pool:
+            # Clients are connected on first use, see TelegramClientPool.
+            await self.pool.start()
+            return ClientStartupReport()
+
+        report = ClientStartupReport()
+        semaphore = asyncio.Semaphore(self.config.max_concurrent_starts)
+
+        async def start(account: Dict[str, Union[str, int]]) -> None:
+            session_id = account["session_id"]
+            async with semaphore:
+                try:
+                    client = await self.start_client(
+                        account, timeout=self.config.connect_timeout
+                    )
+                except Exception as e:
+                    report.failed[session_id] = repr(e)
+                    return
 
+            self._telegram_clients[session_id] = client
+            report.started.append(session_id)
+            logger.info(f"Successfully started client for {session_id}")
+
+        pending = []
         for account in accounts_data:
             if account["session_id"] in self._telegram_clients:
-                continue
-
-            client = await self.start_client(account)
-            if client:
-                self._telegram_clients[account["session_id"]] = client
-                logger.info(f"Successfully started client for {account['session_id']}")
-        if self._telegram_clients:
-            return self._telegram_clients
-        else:
+                report.skipped.append(account["session_id"])
+            else:
+                pending.append(start(account))
+        await asyncio.gather(*pending)
+        # Sessions are loaded from the database from now on.
+        self.session_container.discard_snapshots()
+
+        logger.info(
+            "Telegram clients started",
+            extra={
+                "started": len(report.started),
+                "skipped": len(report.skipped),
+                "failed": len(report.failed),
+            },
+        )
+        if not self._telegram_clients:
             raise Exception("No telegram clisent to start.")
+        return report
+
+    async def _cache_profile(self, session_id: str, client: TelegramClient) -> None:
+        async def on_profile_update(update: object) -> None:
+            self.profiles.on_update(session_id, update)
+
+        client.add_event_handler(on_profile_update, events.Raw(types=PROFILE_UPDATES))
+        await self._load_profile(session_id, client)
+
+    async def _load_profile(self, session_id: str, client: TelegramClient) -> None:
+        try:
+            me = await client.get_me()
+        except RPCError as e:
+            logger.warning(f"Can't load the profile of {session_id}: {e}")
+            return
+        if me is not None:
+            self.profiles.put(session_id, me)
+
+    async def _connect_account(self, session_id: str) -> TelegramClient:
+        try:
+            account = self._accounts[session_id]
+        except KeyError:
+            raise Exception(f"Account {session_id} not found")
+        client = self._telegram_clients.get(session_id)
+        if client is not None:
+            return await self._reconnect(session_id, client)
+        return await self.start_client(account, timeout=self.config.connect_timeout)
+
+    async def _reconnect(
+        self, session_id: str, client: TelegramClient
+    ) -> TelegramClient:
+        """Reconnects a client whose connection dropped.
+
+        The client object is kept, a new one would lose the event handlers the
+        listener and the caches attached to it.
+        """
+        try:
+            await asyncio.wait_for(client.connect(), self.config.connect_timeout)
+        except BaseException:
+            await client.disconnect()
+            raise
+        # Telegram only sends updates again after a high level request.
+        await self._load_profile(session_id, client)
+        logger.info(f"Reconnected client for {session_id}")
+        return client
+
+    @property
+    def session_ids(self) -> List[str]:
+        if self.pool:
+            return list(self._accounts)
+        return list(self._telegram_clients)
+
+    async def get_client(self, session_id: str) -> TelegramClient:
+        if self.pool:
+            return await self.pool.acquire(session_id)
+        return self._telegram_clients[session_id]
+
+    @asynccontextmanager
+    async def lease_client(self, session_id: str) -> AsyncIterator[TelegramClient]:
+        """Like ``get_client``, for long running requests: the pool doesn't
+        disconnect the client until the block exits."""
+        if not self.pool:
+            yield self._telegram_clients[session_id]
+            return
+        async with self.pool.lease(session_id) as client:
+            yield client
+
+    async def pin_clients(
+        self, session_ids: Optional[List[str]] = None
+    ) -> Dict[str, TelegramClient]:
+        """Returns the clients to listen to, pinned so the pool never evicts them."""
+        session_ids = session_ids or self.session_ids
+        if not self.pool:
+            return {
+                session_id: self._telegram_clients[session_id]
+                for session_id in session_ids
+                if session_id in self._telegram_clients
+            }
+        return {
+            session_id: await self.pool.pin(session_id) for session_id in session_ids
+        }
 
     async def close_all(self):
+        if self.pool:
+            await self.pool.close()
         for client in self._telegram_clients.values():
             await client.disconnect()
         self._telegram_clients.clear()
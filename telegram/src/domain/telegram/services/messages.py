@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.core.telegram.config import TelegramConfig
+from src.core.telegram.messages import EntityRow, MessageRow, MessageStore
+from src.domain.telegram.services.scheduler import RequestScheduler
+from telethon import TelegramClient, events, utils
+from telethon.extensions import BinaryReader
+from telethon.tl.custom import Message
+from telethon.tl.types import PeerChannel
+
+logger = logging.getLogger(__name__)
+
+PeerKey = Tuple[str, int]
+
+
+@dataclass
+class MessageHistoryStats:
+    hits: int = 0
+    partial_hits: int = 0
+    misses: int = 0
+
+
+class MessageHistory:
+    """Read-through store for paginated message history.
+
+    Pages are answered from ``MessageStore`` when its ranges cover them, and
+    only the part below the covered range is requested from Telegram. Fetched
+    pages extend the ranges. While the client of an account stays attached,
+    new messages of peers whose newest page was fetched extend the covered
+    range as well, so polling the newest page stays local. A new message only
+    extends the range if no message can have been missed in between, see
+    ``_follows``, otherwise it's stored as a range of its own. Messages older
+    than ``message_retention`` are pruned every ``message_prune_interval``.
+    """
+
+    def __init__(
+        self,
+        store: MessageStore,
+        scheduler: RequestScheduler,
+        config: TelegramConfig,
+    ) -> None:
+        self.store = store
+        self.scheduler = scheduler
+        self.config = config
+        self._task: Optional[asyncio.Task] = None
+        self._clients: Dict[str, TelegramClient] = {}
+        # Newest message id of each peer, known only while the client that
+        # saw it is attached and receiving updates.
+        self._tops: Dict[PeerKey, int] = {}
+        # Last message id received in each id sequence, see _sequence, and
+        # the highest id received after a gap in it.
+        self._last_ids: Dict[PeerKey, int] = {}
+        self._gaps: Dict[PeerKey, int] = {}
+        self._locks: Dict[PeerKey, asyncio.Lock] = {}
+        self._stats = MessageHistoryStats()
+
+    @property
+    def stats(self) -> MessageHistoryStats:
+        return self._stats
+
+    async def start(self) -> None:
+        if self._task is None and self.config.message_retention > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def prune(self) -> int:
+        """Deletes the stored messages older than ``message_retention``."""
+        before = int(time.time() - self.config.message_retention)
+        pruned = await self.store.prune(before)
+        if pruned:
+            logger.info(f"Pruned {pruned} stored messages")
+        return pruned
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.error(f"Failed to prune stored messages: {e}", exc_info=True)
+            await asyncio.sleep(self.config.message_prune_interval)
+
+    def attach(self, session_id: str, client: TelegramClient) -> None:
+        if self._clients.get(session_id) is client:
+            return
+        self._clients[session_id] = client
+        for tracked in (self._tops, self._last_ids, self._gaps):
+            for key in [key for key in tracked if key[0] == session_id]:
+                del tracked[key]
+
+        async def on_new_message(event: events.NewMessage.Event) -> None:
+            await self._on_new_message(session_id, event.message)
+
+        async def on_edit(event: events.MessageEdited.Event) -> None:
+            await self._on_edit(session_id, event.message)
+
+        async def on_delete(event: events.MessageDeleted.Event) -> None:
+            await self._on_delete(session_id, event)
+
+        client.add_event_handler(on_new_message, events.NewMessage())
+        client.add_event_handler(on_edit, events.MessageEdited())
+        client.add_event_handler(on_delete, events.MessageDeleted())
+
+    async def get_page(
+        self,
+        session_id: str,
+        client: TelegramClient,
+        entity: Union[str, int],
+        offset_id: int,
+        limit: int,
+    ) -> List[Message]:
+        """Same page as ``client.get_messages(entity, limit, offset_id)``."""
+        peer_id = utils.get_peer_id(await client.get_input_entity(entity))
+        key = (session_id, peer_id)
+        high = offset_id - 1 if offset_id > 0 else self._tops.get(key)
+
+        messages: List[Message] = []
+        fetch_offset = offset_id
+        covered = None
+        if high is not None and high > 0:
+            covered = await self.store.get_range(session_id, peer_id, high)
+        if covered is not None:
+            low = covered[0]
+            messages = await self._decode(
+                session_id,
+                client,
+                await self.store.get_messages(session_id, peer_id, low, high, limit),
+            )
+            if len(messages) == limit or low <= 1:
+                self._stats.hits += 1
+                return messages
+            # Everything down to the start of the range is already served.
+            fetch_offset = low
+            self._stats.partial_hits += 1
+        else:
+            self._stats.misses += 1
+
+        fetched = await self.scheduler.call(
+            session_id,
+            "get_messages",
+            client.get_messages,
+            entity=entity,
+            limit=limit - len(messages),
+            offset_id=fetch_offset,
+        )
+        await self._save_page(key, fetched, fetch_offset, limit - len(messages))
+        return messages + list(fetched)
+
+    async def _save_page(
+        self, key: PeerKey, fetched: Sequence[Any], offset_id: int, limit: int
+    ) -> None:
+        ids = [message.id for message in fetched]
+        # A short page means the beginning of the history was reached.
+        low = min(ids) if ids and len(ids) >= limit else 1
+        if offset_id > 0:
+            high: Optional[int] = offset_id - 1
+        else:
+            high = max(ids) if ids else None
+            if high is not None:
+                self._tops[key] = max(high, self._tops.get(key, 0))
+
+        covered = (low, high) if high is not None and high >= low else None
+        async with self._lock(key):
+            await self.store.save(
+                key[0],
+                key[1],
+                [self._encode(m) for m in fetched],
+                covered,
+                self._entities(fetched),
+            )
+
+    def _lock(self, key: PeerKey) -> asyncio.Lock:
+        return self._locks.setdefault(key, asyncio.Lock())
+
+    @staticmethod
+    def _encode(message: Any) -> MessageRow:
+        date = int(message.date.timestamp()) if message.date else None
+        return message.id, date, message._bytes()
+
+    @staticmethod
+    def _entities(messages: Iterable[Any]) -> List[EntityRow]:
+        """The users and chats a message resolves its sender, chat, bot and
+        forward from."""
+        entities = {}
+        for message in messages:
+            found = [message.sender, message.chat, message.via_bot]
+            if message.forward is not None:
+                found.extend((message.forward.sender, message.forward.chat))
+            for entity in found:
+                if entity is not None:
+                    entities[utils.get_peer_id(entity)] = entity._bytes()
+        return list(entities.items())
+
+    async def _decode(
+        self, session_id: str, client: TelegramClient, rows: List[bytes]
+    ) -> List[Message]:
+        messages = [BinaryReader(data).tgread_object() for data in rows]
+        ids = set()
+        for message in messages:
+            ids.add(utils.get_peer_id(message.peer_id))
+            for peer in (
+                message.from_id,
+                message.fwd_from.from_id if message.fwd_from else None,
+            ):
+                if peer is not None:
+                    ids.add(utils.get_peer_id(peer))
+            if getattr(message, "via_bot_id", None):
+                ids.add(message.via_bot_id)
+        entities = {}
+        if ids:
+            for data in await self.store.get_entities(session_id, ids):
+                entity = BinaryReader(data).tgread_object()
+                entities[utils.get_peer_id(entity)] = entity
+        # The same entities Telegram sends with the messages, so stored pages
+        # look like fetched ones.
+        for message in messages:
+            message._finish_init(client, entities, None)
+        return messages
+
+    @staticmethod
+    def _sequence(session_id: str, message: Any) -> PeerKey:
+        """Channels number their messages, other chats share the account's
+        numbering."""
+        if isinstance(message.peer_id, PeerChannel):
+            return session_id, message.chat_id
+        return session_id, 0
+
+    def _follows(self, session_id: str, message: Any, top: Optional[int]) -> bool:
+        """Whether every message of the chat between ``top`` and the message
+        was received, called for each new message in the order received."""
+        sequence = self._sequence(session_id, message)
+        last = self._last_ids.get(sequence)
+        if last is None and sequence[1] != 0:
+            last = top
+        if last is None or message.id != last + 1:
+            # Updates were missed, e.g. while disconnected, or the numbering
+            # is unknown yet.
+            self._gaps[sequence] = max(self._gaps.get(sequence, 0), message.id)
+        self._last_ids[sequence] = max(last or 0, message.id)
+        return top is not None and self._gaps.get(sequence, 0) <= top
+
+    async def _on_new_message(self, session_id: str, message: Any) -> None:
+        key = (session_id, message.chat_id)
+        top = self._tops.get(key)
+        follows = self._follows(session_id, message, top)
+        if top is None:
+            return
+        try:
+            async with self._lock(key):
+                covered = None
+                if message.id > top and not follows:
+                    covered = (message.id, message.id)
+                await self.store.save(
+                    session_id,
+                    message.chat_id,
+                    [self._encode(message)],
+                    covered,
+                    self._entities([message]),
+                )
+                if message.id > top:
+                    if follows:
+                        await self.store.extend_range(
+                            session_id, message.chat_id, top, message.id
+                        )
+                    self._tops[key] = message.id
+        except Exception as e:
+            # The range can't be trusted past the last stored message.
+            self._tops.pop(key, None)
+            logger.warning(f"Failed to store message {message.id}: {e}")
+
+    async def _on_edit(self, session_id: str, message: Any) -> None:
+        key = (session_id, message.chat_id)
+        if key not in self._tops:
+            return
+        try:
+            async with self._lock(key):
+                await self.store.save(
+                    session_id,
+                    message.chat_id,
+                    [self._encode(message)],
+                    entities=self._entities([message]),
+                )
+        except Exception as e:
+            logger.warning(f"Failed to store edited message {message.id}: {e}")
+
+    async def _on_delete(
+        self, session_id: str, event: events.MessageDeleted.Event
+    ) -> None:
+        try:
+            await self.store.delete(session_id, event.deleted_ids, event.chat_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete messages {event.deleted_ids}: {e}")
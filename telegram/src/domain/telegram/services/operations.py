@@ -1,68 +1,135 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional, Union
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import List, Optional, Union
 
+from src.core.telegram.media import MediaCache, MediaFile
 from src.domain.common.service import BaseService
+from src.domain.telegram.services.dialogs import DialogIndex, DialogsDelta
+from src.domain.telegram.services.downloads import MediaDownloader
 from src.domain.telegram.services.manager import TelegramClientManager
-from telethon import TelegramClient
+from src.domain.telegram.services.messages import MessageHistory
+from src.domain.telegram.services.scheduler import RequestScheduler
+from src.domain.telegram.services.streams import prefetch
+from telethon import TelegramClient, utils
 from telethon.errors import PeerIdInvalidError
-from telethon.tl.types import Dialog, InputPhoto, Message, User
+from telethon.tl.types import Dialog, InputPhotoFileLocation, Message, User
 
 logger = logging.getLogger(__name__)
 
 
 class TelegramOperations(BaseService):
-    def __init__(self, manager: TelegramClientManager):
+    def __init__(
+        self,
+        manager: TelegramClientManager,
+        scheduler: RequestScheduler,
+        dialogs: DialogIndex,
+        history: MessageHistory,
+        downloads: MediaDownloader,
+        media: MediaCache,
+    ):
         super().__init__()
         self.manager = manager
-        self._clients: Dict[str, TelegramClient] = self.manager._telegram_clients
+        self.scheduler = scheduler
+        self.dialogs = dialogs
+        self.history = history
+        self.downloads = downloads
+        self.media = media
 
     async def _get_client(self, phone: str) -> Optional[TelegramClient]:
         try:
-            return self._clients[phone]
+            client = await self.manager.get_client(phone)
+            self.dialogs.attach(phone, client)
+            self.history.attach(phone, client)
+            return client
         except Exception as e:
             logger.error(f"Error in _get_client for {phone}: {e}", exc_info=True)
             raise e
 
+    @asynccontextmanager
+    async def _lease_client(self, phone: str) -> AsyncIterator[TelegramClient]:
+        """Like ``_get_client``, for streams: the client stays connected until
+        the block exits, however long it runs."""
+        async with self.manager.lease_client(phone) as client:
+            self.dialogs.attach(phone, client)
+            self.history.attach(phone, client)
+            yield client
+
     async def get_account_by_phone(self, phone: str) -> Optional[User]:
+        account = self.manager.profiles.get(phone)
+        if account is not None:
+            return account
         try:
             client = await self._get_client(phone)
-            return await client.get_me()
+            account = await self.scheduler.call(phone, "get_me", client.get_me)
         except Exception as e:
             logger.error(
                 f"Error in get_account_by_phone for {phone}: {e}", exc_info=True
             )
             raise e
+        if account is not None:
+            self.manager.profiles.put(phone, account)
+        return account
 
     async def get_accounts(self) -> Optional[List[User]]:
-        accounts = []
-        for phone, client in self._clients.items():
-            try:
-                account = await client.get_me()
-                accounts.append(account)
-            except Exception as e:
-                logger.error(f"Error in get_accounts: {phone} {e}", exc_info=True)
-                raise e
-        return accounts
+        """Serves the profiles from the cache, fetching the missing concurrently."""
+        phones = self.manager.session_ids
+        accounts = {phone: self.manager.profiles.get(phone) for phone in phones}
+        semaphore = asyncio.Semaphore(self.manager.config.max_concurrent_starts)
+
+        async def fetch(phone: str) -> None:
+            async with semaphore:
+                accounts[phone] = await self.get_account_by_phone(phone)
+
+        try:
+            await asyncio.gather(
+                *(fetch(phone) for phone, account in accounts.items() if not account)
+            )
+        except Exception as e:
+            logger.error(f"Error in get_accounts: {e}", exc_info=True)
+            raise e
+        return [accounts[phone] for phone in phones]
 
     async def get_dialogs_by_phone(self, phone: str) -> Optional[List[Dialog]]:
         try:
             client = await self._get_client(phone)
-            return await client.get_dialogs()
+            dialogs = self.dialogs.list(phone)
+            if dialogs is None:
+                dialogs = await self.scheduler.call(
+                    phone, "get_dialogs", client.get_dialogs
+                )
+                self.dialogs.load(phone, dialogs)
+            return dialogs
         except Exception as e:
             logger.error(f"Error getting dialogs for {phone}: {e}", exc_info=True)
             raise e
 
+    async def get_dialogs_delta(
+        self, phone: str, since_version: int, epoch: Optional[str] = None
+    ) -> DialogsDelta:
+        await self.get_dialogs_by_phone(phone)
+        return self.dialogs.delta(phone, since_version, epoch)
+
     async def get_account_dialog_by_entity(
         self, entity: Union[str, int], phone: str
     ) -> Optional[Dialog]:
         try:
             client = await self._get_client(phone)
-            chat_entity = await client.get_entity(entity)
-            dialogs = await client.get_dialogs()
-            for chat in dialogs:
-                if chat.entity.id == chat_entity.id:
-                    return chat
-            return None
+            chat_entity = await self.scheduler.call(
+                phone, "get_entity", client.get_entity, entity
+            )
+            dialog = self.dialogs.get(phone, utils.get_peer_id(chat_entity))
+            if dialog is not None:
+                return dialog
+            return await self.scheduler.call(
+                phone,
+                "get_peer_dialogs",
+                self.dialogs.fetch,
+                phone,
+                client,
+                chat_entity,
+            )
 
         except PeerIdInvalidError as e:
             logger.warning(
@@ -78,10 +145,8 @@ class TelegramOperations(BaseService):
     ) -> Optional[List[Message]]:
         try:
             client = await self._get_client(phone)
-            return await client.get_messages(
-                entity=entity,
-                limit=min(limit, 100),
-                offset_id=offset_id,
+            return await self.history.get_page(
+                phone, client, entity, offset_id=offset_id, limit=min(limit, 100)
             )
         except PeerIdInvalidError as e:
             logger.warning(
@@ -95,33 +160,90 @@ class TelegramOperations(BaseService):
             logger.error(f"Error getting messages: {e}")
             raise e
 
-    async def download_image_by_metadata(
+    async def iter_messages_by_chat_entity_by_account_phone(
+        self,
+        entity: Union[str, int],
+        phone: str,
+        offset_id: int = 0,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[Message]:
+        """Yields the chat history newest first, without the page size cap.
+
+        Telethon requests the history in chunks of 100 messages, at most
+        ``history_prefetch`` messages are buffered ahead of the consumer.
+        """
+        count = 0
+        try:
+            async with self._lease_client(phone) as client:
+                messages = client.iter_messages(
+                    entity, limit=limit, offset_id=offset_id
+                )
+                async for message in prefetch(
+                    messages, self.manager.config.history_prefetch
+                ):
+                    count += 1
+                    yield message
+        except PeerIdInvalidError as e:
+            logger.warning(f"Peer ID {entity} is invalid in iter_messages.")
+            raise e
+        except Exception as e:
+            logger.error(f"Error streaming messages after {count}: {e}", exc_info=True)
+            raise e
+
+    async def iter_image_by_metadata(
         self,
         phone: str,
         photo_id: int,
         access_hash: int,
         dc_id: int,
         file_reference: bytes = b"",
-        mime_type: str = "image/jpeg",
-    ) -> Optional[bytes]:
+        thumb_size: str = "y",
+        offset: int = 0,
+        end: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """Yields the photo in chunks, from ``offset`` to ``end`` inclusive."""
+        location = InputPhotoFileLocation(
+            id=photo_id,
+            access_hash=access_hash,
+            file_reference=file_reference,
+            thumb_size=thumb_size,
+        )
         try:
-            client = await self._get_client(phone)
-            photo = InputPhoto(
-                id=photo_id,
-                access_hash=access_hash,
-                file_reference=file_reference,
-                version=0,
-            )
-
-            return await client.download_file(
-                photo,
-                file=bytes,
-                dc_id=dc_id,
-            )
-
+            async with self._lease_client(phone) as client:
+                async for chunk in self.downloads.iter_file(
+                    phone, client, location, dc_id, offset, end
+                ):
+                    yield chunk
         except Exception as e:
             logger.warning(
-                f"Error downloading image in download_image_by_metadata: {e}",
+                f"Error downloading image in iter_image_by_metadata: {e}",
                 exc_info=True,
             )
             raise e
+
+    async def get_cached_image_by_metadata(
+        self,
+        phone: str,
+        photo_id: int,
+        access_hash: int,
+        dc_id: int,
+        file_reference: bytes = b"",
+        thumb_size: str = "y",
+    ) -> MediaFile:
+        """Returns the photo from the media cache, downloading it if missing.
+
+        A photo size never changes, the same file serves every account. It's
+        downloaded to the end of the file, a size given by the caller could
+        store a cut off file for everyone.
+        """
+        return await self.media.fetch(
+            f"photo:{photo_id}:{thumb_size}",
+            lambda: self.iter_image_by_metadata(
+                phone,
+                photo_id,
+                access_hash,
+                dc_id,
+                file_reference,
+                thumb_size,
+            ),
+        )
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from src.core.telegram.config import TelegramConfig
+from src.domain.common.event import Event
+
+logger = logging.getLogger(__name__)
+
+BLOCK = "block"
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+DROP_POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+Publish = Callable[[List[Event]], Awaitable[None]]
+
+
+@dataclass
+class PipelineStats:
+    depth: int = 0
+    max_depth: int = 0
+    received: int = 0
+    published: int = 0
+    dropped: int = 0
+    batches: int = 0
+    failures: int = 0
+    # Seconds, of the last batch: publishing it and the wait of its oldest event.
+    publish_latency: float = 0.0
+    max_publish_latency: float = 0.0
+    event_latency: float = 0.0
+
+
+class EventPipeline:
+    """Bounded queue between the update handlers and the message broker.
+
+    Handlers ``put`` events, a single task drains the queue in batches of up to
+    ``event_batch_size`` events, waiting at most ``event_batch_window`` seconds
+    for a batch to fill. A batch that fails to publish is retried until it
+    succeeds, the queue fills up meanwhile and ``event_drop_policy`` decides:
+
+    - ``block``: ``put`` waits for room, up to ``event_block_timeout`` seconds,
+      then drops the event.
+    - ``drop_newest``: the new event is dropped.
+    - ``drop_oldest``: the oldest queued event is dropped for the new one.
+    """
+
+    def __init__(self, config: TelegramConfig) -> None:
+        if config.event_drop_policy not in DROP_POLICIES:
+            raise Exception(f"Unknown event drop policy {config.event_drop_policy}.")
+        self.config = config
+        self._queue: asyncio.Queue[Tuple[Event, float]] = asyncio.Queue(
+            maxsize=config.event_queue_size
+        )
+        self._task: Optional[asyncio.Task] = None
+        self._stats = PipelineStats()
+
+    @property
+    def stats(self) -> PipelineStats:
+        self._stats.depth = self._queue.qsize()
+        return self._stats
+
+    async def put(self, event: Event) -> bool:
+        """Queues the event, returns False if the drop policy discarded it."""
+        self._stats.received += 1
+        item = (event, time.monotonic())
+        policy = self.config.event_drop_policy
+        if policy == BLOCK:
+            try:
+                await asyncio.wait_for(
+                    self._queue.put(item), self.config.event_block_timeout
+                )
+            except asyncio.TimeoutError:
+                return self._drop(event)
+        elif self._queue.full():
+            if policy == DROP_NEWEST:
+                return self._drop(event)
+            dropped, _ = self._queue.get_nowait()
+            self._queue.task_done()
+            self._drop(dropped)
+            self._queue.put_nowait(item)
+        else:
+            self._queue.put_nowait(item)
+        self._stats.max_depth = max(self._stats.max_depth, self._queue.qsize())
+        return True
+
+    def start(self, publish: Publish) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(publish))
+
+    async def close(self) -> None:
+        """Stops the publisher once the queue is drained, or after
+        ``event_drain_timeout`` seconds."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        try:
+            await asyncio.wait_for(self._queue.join(), self.config.event_drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} unpublished events")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    def _drop(self, event: Event) -> bool:
+        self._stats.dropped += 1
+        if self._stats.dropped % 1000 == 1:
+            logger.warning(
+                f"Event queue is full, dropped {self._stats.dropped} events",
+                extra={"event_type": type(event).__name__},
+            )
+        return False
+
+    async def _run(self, publish: Publish) -> None:
+        while True:
+            batch = await self._next_batch()
+            events = [event for event, _ in batch]
+            delay = 1.0
+            while True:
+                started = time.monotonic()
+                try:
+                    await publish(events)
+                    break
+                except Exception as e:
+                    self._stats.failures += 1
+                    logger.error(
+                        f"Failed to publish {len(events)} events, "
+                        f"retrying in {delay}s: {e}",
+                        exc_info=True,
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 30.0)
+
+            now = time.monotonic()
+            self._stats.batches += 1
+            self._stats.published += len(events)
+            self._stats.publish_latency = now - started
+            self._stats.max_publish_latency = max(
+                self._stats.max_publish_latency, self._stats.publish_latency
+            )
+            self._stats.event_latency = now - batch[0][1]
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _next_batch(self) -> List[Tuple[Event, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.config.event_batch_window
+        while len(batch) < self.config.event_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Optional
+
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+
+class ClientState(Enum):
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    FAILED = "failed"
+
+
+@dataclass
+class ClientPoolStats:
+    states: Dict[str, ClientState] = field(default_factory=dict)
+    pinned: int = 0
+    leased: int = 0
+    connected: int = 0
+    evictions: int = 0
+
+
+class TelegramClientPool:
+    """Connects clients on first use and disconnects them once they go idle.
+
+    Connected clients are kept in LRU order.  When more than
+    ``max_connections`` are open, the least recently used unpinned clients are
+    disconnected, skipping the ones used within ``eviction_grace`` seconds so a
+    request in flight keeps its connection.  Pinned clients (the ones being
+    listened to) are never evicted, nor are clients with a ``lease`` held, so
+    a stream that outlives ``idle_timeout`` keeps its connection.  A client
+    whose connection dropped is reconnected by ``connect``, which keeps the
+    client object and with it the event handlers attached to it.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[str], Awaitable[TelegramClient]],
+        clients: Dict[str, TelegramClient],
+        max_connections: int = 500,
+        idle_timeout: float = 600.0,
+        eviction_grace: float = 10.0,
+    ) -> None:
+        self._connect = connect
+        self._clients = clients
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.eviction_grace = eviction_grace
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        self._states: Dict[str, ClientState] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pinned: set[str] = set()
+        self._leases: Dict[str, int] = {}
+        self._evictions = 0
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def stats(self) -> ClientPoolStats:
+        return ClientPoolStats(
+            states=dict(self._states),
+            pinned=len(self._pinned),
+            leased=len(self._leases),
+            connected=len(self._clients),
+            evictions=self._evictions,
+        )
+
+    async def acquire(self, session_id: str) -> TelegramClient:
+        client = self._clients.get(session_id)
+        if client is None or not client.is_connected():
+            lock = self._locks.setdefault(session_id, asyncio.Lock())
+            async with lock:
+                client = self._clients.get(session_id)
+                if client is None or not client.is_connected():
+                    client = await self._open(session_id)
+
+        self._touch(session_id)
+        await self._evict_overflow()
+        return client
+
+    @asynccontextmanager
+    async def lease(self, session_id: str) -> AsyncIterator[TelegramClient]:
+        """Acquires the client, which isn't evicted until the block exits."""
+        self._leases[session_id] = self._leases.get(session_id, 0) + 1
+        try:
+            client = await self.acquire(session_id)
+            try:
+                yield client
+            finally:
+                # Idle from now on.
+                self._touch(session_id)
+        finally:
+            self._leases[session_id] -= 1
+            if not self._leases[session_id]:
+                del self._leases[session_id]
+
+    async def pin(self, session_id: str) -> TelegramClient:
+        self._pinned.add(session_id)
+        return await self.acquire(session_id)
+
+    def unpin(self, session_id: str) -> None:
+        self._pinned.discard(session_id)
+
+    async def start(self) -> None:
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        for session_id in list(self._clients):
+            await self._disconnect(session_id)
+
+    async def _open(self, session_id: str) -> TelegramClient:
+        self._states[session_id] = ClientState.CONNECTING
+        try:
+            client = await self._connect(session_id)
+        except Exception:
+            self._states[session_id] = ClientState.FAILED
+            raise
+        self._clients[session_id] = client
+        self._states[session_id] = ClientState.CONNECTED
+        logger.info(f"Pool connected client for {session_id}")
+        return client
+
+    def _touch(self, session_id: str) -> None:
+        self._last_used[session_id] = time.monotonic()
+        self._last_used.move_to_end(session_id)
+
+    async def _disconnect(self, session_id: str) -> None:
+        client = self._clients.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        self._states[session_id] = ClientState.DISCONNECTED
+        if client is not None:
+            try:
+                await client.disconnect()
+            except Exception as e:
+                logger.warning(f"Failed to disconnect client for {session_id}: {e}")
+
+    def _held(self, session_id: str) -> bool:
+        return session_id in self._pinned or session_id in self._leases
+
+    async def _evict_overflow(self) -> None:
+        overflow = len(self._clients) - self.max_connections
+        if overflow <= 0:
+            return
+
+        now = time.monotonic()
+        for session_id, last_used in list(self._last_used.items()):
+            if overflow <= 0 or now - last_used < self.eviction_grace:
+                break
+            if session_id not in self._clients or self._held(session_id):
+                continue
+            await self._disconnect(session_id)
+            self._evictions += 1
+            overflow -= 1
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 60.0))
+            now = time.monotonic()
+            for session_id, last_used in list(self._last_used.items()):
+                if now - last_used < self.idle_timeout:
+                    break
+                if not self._held(session_id):
+                    await self._disconnect(session_id)
+                    self._evictions += 1
@@ -0,0 +1,60 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from telethon.tl.types import (
+    UpdateUser,
+    UpdateUserEmojiStatus,
+    UpdateUserName,
+    UpdateUserPhone,
+    User,
+)
+
+# Updates that change what get_me() returns for the account itself.
+PROFILE_UPDATES = (UpdateUser, UpdateUserEmojiStatus, UpdateUserName, UpdateUserPhone)
+
+
+@dataclass
+class ProfileCacheStats:
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+
+class AccountProfileCache:
+    """The ``get_me()`` result of every account, kept for ``ttl`` seconds.
+
+    Filled when a client connects and dropped when Telegram reports a change
+    to the account's own profile.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self.ttl = ttl
+        self._profiles: Dict[str, Tuple[User, float]] = {}
+        self._stats = ProfileCacheStats()
+
+    @property
+    def stats(self) -> ProfileCacheStats:
+        self._stats.size = len(self._profiles)
+        return self._stats
+
+    def get(self, session_id: str) -> Optional[User]:
+        item = self._profiles.get(session_id)
+        if item is None or item[1] < time.monotonic():
+            self._stats.misses += 1
+            return None
+        self._stats.hits += 1
+        return item[0]
+
+    def put(self, session_id: str, user: User) -> None:
+        self._profiles[session_id] = (user, time.monotonic() + self.ttl)
+
+    def invalidate(self, session_id: str) -> None:
+        if self._profiles.pop(session_id, None) is not None:
+            self._stats.invalidations += 1
+
+    def on_update(self, session_id: str, update: object) -> None:
+        item = self._profiles.get(session_id)
+        if item is not None and getattr(update, "user_id", None) == item[0].id:
+            self.invalidate(session_id)
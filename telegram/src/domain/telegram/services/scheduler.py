@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple, TypeVar
+
+from src.core.telegram.config import TelegramConfig
+from telethon.errors import FloodWaitError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class RequestStats:
+    calls: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    flood_waits: int = 0
+    rejected: int = 0
+
+
+class RequestLimiter:
+    """Token bucket for one RPC type of one account, plus its flood deadline.
+
+    Callers are served in arrival order: the first one holds the lock while it
+    sleeps through the flood wait or until a token is refilled.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._flood_deadline = 0.0
+        self._lock = asyncio.Lock()
+
+    def flood_remaining(self) -> float:
+        return max(0.0, self._flood_deadline - time.monotonic())
+
+    def flood(self, seconds: float) -> None:
+        self._flood_deadline = max(self._flood_deadline, time.monotonic() + seconds)
+
+    async def wait(self, paced: bool = True) -> None:
+        async with self._lock:
+            while (remaining := self.flood_remaining()) > 0:
+                await asyncio.sleep(remaining)
+            if not paced:
+                return
+
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.burst), self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+class RequestScheduler:
+    """Paces Telegram requests per account and RPC type.
+
+    A ``FloodWaitError`` blocks that method of the account until the deadline
+    passes; concurrent callers queue behind it instead of hitting Telegram
+    again. Callers that would wait longer than ``flood_max_wait`` get a
+    ``FloodWaitError`` right away. An operation made of many requests, a
+    download, is paced once with ``acquire`` and its requests go through
+    ``call_unpaced``, which only honours the flood waits.
+    """
+
+    def __init__(self, config: TelegramConfig) -> None:
+        self.rate = config.request_rate
+        self.burst = config.request_burst
+        self.rate_limits = config.rate_limits
+        self.max_wait = config.flood_max_wait
+        self.retries = config.flood_retries
+        self._limiters: Dict[Tuple[str, str], RequestLimiter] = {}
+        self._stats: Dict[Tuple[str, str], RequestStats] = {}
+
+    def stats(self) -> Dict[str, Dict[str, RequestStats]]:
+        result: Dict[str, Dict[str, RequestStats]] = {}
+        for (session_id, method), stats in self._stats.items():
+            result.setdefault(session_id, {})[method] = stats
+        return result
+
+    def _limiter(self, session_id: str, method: str) -> RequestLimiter:
+        key = (session_id, method)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            rate = self.rate_limits.get(method, self.rate)
+            limiter = self._limiters[key] = RequestLimiter(rate, self.burst)
+            self._stats[key] = RequestStats()
+        return limiter
+
+    async def acquire(self, session_id: str, method: str, paced: bool = True) -> None:
+        """Waits for the end of a flood wait and, if ``paced``, for a token."""
+        limiter = self._limiter(session_id, method)
+        stats = self._stats[(session_id, method)]
+        remaining = limiter.flood_remaining()
+        if remaining > self.max_wait:
+            stats.rejected += 1
+            raise FloodWaitError(None, capture=math.ceil(remaining))
+
+        stats.queued += 1
+        stats.max_queued = max(stats.max_queued, stats.queued)
+        try:
+            await asyncio.wait_for(limiter.wait(paced), self.max_wait)
+        except asyncio.TimeoutError:
+            stats.rejected += 1
+            raise FloodWaitError(
+                None, capture=math.ceil(max(limiter.flood_remaining(), 1))
+            )
+        finally:
+            stats.queued -= 1
+
+    async def call(
+        self,
+        session_id: str,
+        method: str,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        return await self._call(session_id, method, True, func, *args, **kwargs)
+
+    async def call_unpaced(
+        self,
+        session_id: str,
+        method: str,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """Like ``call`` without taking a token."""
+        return await self._call(session_id, method, False, func, *args, **kwargs)
+
+    async def _call(
+        self,
+        session_id: str,
+        method: str,
+        paced: bool,
+        func: Callable[..., Awaitable[T]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        limiter = self._limiter(session_id, method)
+        stats = self._stats[(session_id, method)]
+
+        attempt = 0
+        while True:
+            await self.acquire(session_id, method, paced)
+
+            stats.calls += 1
+            try:
+                return await func(*args, **kwargs)
+            except FloodWaitError as e:
+                limiter.flood(e.seconds)
+                stats.flood_waits += 1
+                logger.warning(
+                    f"Flood wait of {e.seconds}s for {method} on {session_id}",
+                    extra={"queued": stats.queued, "attempt": attempt},
+                )
+                if attempt >= self.retries or e.seconds > self.max_wait:
+                    raise e
+                attempt += 1
@@ -63,7 +63,7 @@ class SessionMaker(BaseService):
             client_info = self.session_container.get_info_by_phone(phone=valid_phone)
 
             if client_info:
-                session = self.session_container.new_session(valid_phone)
+                session = await self.session_container.load_session(valid_phone)
                 client = TelegramClient(
                     session, client_info["api_id"], client_info["api_hash"]
                 )
@@ -74,7 +74,7 @@ class SessionMaker(BaseService):
                 self.session_container.add_account(
                     session_id=valid_phone, api_hash=api_hash, api_id=api_id
                 )
-                session = self.session_container.new_session(f"{valid_phone}")
+                session = await self.session_container.load_session(f"{valid_phone}")
                 client = TelegramClient(session, api_id, api_hash)
 
             return client
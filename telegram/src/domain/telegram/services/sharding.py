@@ -0,0 +1,30 @@
+import bisect
+import hashlib
+
+
+class HashRing:
+    """Consistent hashing of session ids onto worker indexes.
+
+    Each worker gets ``replicas`` virtual nodes, so changing the number of
+    workers only moves the accounts of the affected slices of the ring.
+    """
+
+    def __init__(self, workers: int, replicas: int = 128) -> None:
+        if workers < 1:
+            raise ValueError("HashRing needs at least one worker.")
+        self.workers = workers
+        points = sorted(
+            (self._hash(f"worker-{worker}-{replica}"), worker)
+            for worker in range(workers)
+            for replica in range(replicas)
+        )
+        self._keys = [key for key, _ in points]
+        self._owners = [worker for _, worker in points]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def owner(self, session_id: str) -> int:
+        index = bisect.bisect(self._keys, self._hash(session_id)) % len(self._keys)
+        return self._owners[index]
@@ -0,0 +1,40 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+async def prefetch(iterator: AsyncIterator[T], size: int) -> AsyncIterator[T]:
+    """Pulls up to ``size`` items ahead of the consumer in a background task."""
+    queue: asyncio.Queue[tuple[bool, Any]] = asyncio.Queue(maxsize=size)
+    closed = False
+
+    async def produce() -> None:
+        # Checks ``closed`` too, because the iterator may swallow the
+        # cancellation and the queue is no longer read then.
+        try:
+            async for item in iterator:
+                if closed:
+                    return
+                await queue.put((True, item))
+        except Exception as e:
+            end: tuple[bool, Any] = (False, e)
+        else:
+            end = (False, None)
+        if not closed:
+            await queue.put(end)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            ok, item = await queue.get()
+            if not ok:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        closed = True
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,32 @@
+"""entities lookup indexes
+
+Revision ID: 8c1d2e4f6a9b
+Revises: 3347940f716c
+Create Date: 2026-10-18 10:12:41.118524
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d2e4f6a9b'
+down_revision: Union[str, None] = '3347940f716c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_entities_session_id_username', 'entities', ['session_id', 'username'], unique=False)
+    op.create_index('ix_entities_session_id_phone', 'entities', ['session_id', 'phone'], unique=False)
+    op.create_index('ix_entities_session_id_lower_name', 'entities', ['session_id', sa.text('lower(name)')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_entities_session_id_lower_name', table_name='entities')
+    op.drop_index('ix_entities_session_id_phone', table_name='entities')
+    op.drop_index('ix_entities_session_id_username', table_name='entities')
@@ -0,0 +1,41 @@
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Identity,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Uuid,
+    func,
+)
+
+from .base import Base
+
+
+class OutboxMessage(Base):
+    """A message to publish, written in the transaction of the command that
+    produced it and removed once the relay published it."""
+
+    __tablename__ = "outbox"
+    __table_args__ = (Index("ix_outbox_partition_id", "partition", "id"),)
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    # See EventBusConfig.partitions, 0 when events aren't partitioned.
+    partition = Column(Integer, nullable=False, server_default="0")
+    message_id = Column(Uuid, nullable=False)
+    exchange = Column(String(255), nullable=False)
+    routing_key = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False)
+    message_type = Column(String(255), nullable=False)
+    type = Column(String(255))
+    timestamp = Column(DateTime)
+    headers = Column(JSON, nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __str__(self):
+        return f"OutboxMessage({self.id}, '{self.message_id}', '{self.exchange}', \
+            '{self.routing_key}', '{self.type}')"
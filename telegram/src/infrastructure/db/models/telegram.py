@@ -1,4 +1,13 @@
-from sqlalchemy import BigInteger, Column, Integer, LargeBinary, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    func,
+)
 
 from .base import Base
 
@@ -28,6 +37,10 @@ class Session(Base):
 
 class Entity(Base):
     __tablename__ = "entities"
+    __table_args__ = (
+        Index("ix_entities_session_id_username", "session_id", "username"),
+        Index("ix_entities_session_id_phone", "session_id", "phone"),
+    )
 
     session_id = Column(String(255), primary_key=True)
     id = Column(BigInteger, primary_key=True)
@@ -41,6 +54,9 @@ class Entity(Base):
             '{self.username}', '{self.phone}', '{self.name}')"
 
 
+Index("ix_entities_session_id_lower_name", Entity.session_id, func.lower(Entity.name))
+
+
 class SentFile(Base):
     __tablename__ = "sent_files"
 
@@ -78,3 +94,63 @@ class Account(Base):
     session_id = Column(String(255), primary_key=True)
     api_id = Column(BigInteger, nullable=False)
     api_hash = Column(String(255), nullable=False)
+
+
+class Dialog(Base):
+    __tablename__ = "dialogs"
+
+    session_id = Column(String(255), primary_key=True)
+    peer_id = Column(BigInteger, primary_key=True)
+    title = Column(String(255))
+    top_message_id = Column(BigInteger)
+    top_message_date = Column(BigInteger)
+    unread_count = Column(Integer, nullable=False, default=0)
+    pinned = Column(Boolean, nullable=False, default=False)
+    archived = Column(Boolean, nullable=False, default=False)
+    # Serialized TL objects the telethon Dialog is rebuilt from.
+    dialog = Column(LargeBinary, nullable=False)
+    entity = Column(LargeBinary, nullable=False)
+    message = Column(LargeBinary)
+
+    def __str__(self):
+        return f"Dialog('{self.session_id}', {self.peer_id}, '{self.title}', \
+            {self.top_message_id}, {self.top_message_date}, {self.unread_count})"
+
+
+class Message(Base):
+    __tablename__ = "messages"
+
+    session_id = Column(String(255), primary_key=True)
+    peer_id = Column(BigInteger, primary_key=True)
+    id = Column(BigInteger, primary_key=True)
+    date = Column(BigInteger)
+    # Serialized TL message.
+    data = Column(LargeBinary, nullable=False)
+
+    def __str__(self):
+        return f"Message('{self.session_id}', {self.peer_id}, {self.id}, {self.date})"
+
+
+class MessageRange(Base):
+    __tablename__ = "message_ranges"
+
+    session_id = Column(String(255), primary_key=True)
+    peer_id = Column(BigInteger, primary_key=True)
+    low = Column(BigInteger, primary_key=True)
+    high = Column(BigInteger, nullable=False)
+
+    def __str__(self):
+        return f"MessageRange('{self.session_id}', {self.peer_id}, \
+            {self.low}, {self.high})"
+
+
+class MessageEntity(Base):
+    __tablename__ = "message_entities"
+
+    session_id = Column(String(255), primary_key=True)
+    id = Column(BigInteger, primary_key=True)
+    # Serialized TL user or chat.
+    data = Column(LargeBinary, nullable=False)
+
+    def __str__(self):
+        return f"MessageEntity('{self.session_id}', {self.id})"
@@ -0,0 +1,73 @@
+from typing import Any, Dict, Protocol
+from uuid import UUID
+
+import orjson
+
+from .events.base import IntegrationEvent
+from .events.schema import EventSchema
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+
+class Codec(Protocol):
+    """Encodes the flat payloads of event schemas, see ``EventSchema``."""
+
+    content_type: str
+
+    def encode(self, event: IntegrationEvent) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes, schema: EventSchema) -> IntegrationEvent:
+        raise NotImplementedError
+
+
+class OrjsonCodec:
+    """Encodes events as dataclasses, which orjson does natively, to the same
+    payload the schemas encode to."""
+
+    content_type = JSON
+
+    def encode(self, event: IntegrationEvent) -> bytes:
+        return orjson.dumps(event, default=_serialize_uuid)
+
+    def decode(self, data: bytes, schema: EventSchema) -> IntegrationEvent:
+        return schema.decode(orjson.loads(data))
+
+
+class MsgpackCodec:
+    content_type = MSGPACK
+
+    def encode(self, event: IntegrationEvent) -> bytes:
+        return msgpack.packb(event._schema.encode(event))
+
+    def decode(self, data: bytes, schema: EventSchema) -> IntegrationEvent:
+        return schema.decode(msgpack.unpackb(data))
+
+
+CODECS: Dict[str, Codec] = {JSON: OrjsonCodec()}
+if msgpack is not None:
+    CODECS[MSGPACK] = MsgpackCodec()
+
+
+def _serialize_uuid(obj: object) -> Any:
+    # orjson encodes only uuid.UUID itself, not the subclass of uuid6.
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj)}")
+
+
+def register_codec(codec: Codec) -> None:
+    CODECS[codec.content_type] = codec
+
+
+def get_codec(content_type: str) -> Codec:
+    codec = CODECS.get(content_type)
+    if codec is None:
+        raise Exception(f"No codec for content type {content_type}.")
+    return codec
@@ -18,6 +18,7 @@ def convert_telegram_message_received_to_integration(
         media_type=event.media_type,
         reply_to_msg_id=event.reply_to_msg_id,
         forwarded_from=event.forwarded_from,
+        seen_by=event.seen_by,
     )
 
 
@@ -1,30 +1,52 @@
 import logging
+from typing import Optional
 
-import orjson
-from src.infrastructure.logs.processors import additionally_serialize
+from src.infrastructure.message_broker.config import EventBusConfig
 from src.infrastructure.message_broker.message import Message
-from src.infrastructure.message_broker.message_broker import MessageBroker
+from src.infrastructure.outbox.outbox import Outbox
 
+from .codecs import Codec, get_codec
 from .events.base import IntegrationEvent
+from .exchanges import PARTITION_BY, partition
 
 logger = logging.getLogger(__name__)
 
 
 class EventBusImpl:
-    def __init__(self, message_broker: MessageBroker) -> None:
-        self._message_broker = message_broker
+    def __init__(self, outbox: Outbox, config: EventBusConfig) -> None:
+        self._outbox = outbox
+        self._codec = get_codec(config.content_type)
+        if config.partition_by not in PARTITION_BY:
+            raise Exception(f"Unknown partition key {config.partition_by}.")
+        self._config = config
 
     async def publish_event(self, event: IntegrationEvent) -> None:
-        message = self.build_message(event)
-        await self._message_broker.publish_message(
-            message, event._routing_key, event._exchange_name
-        )  # noqa
+        message = self.build_message(event, self._codec)
+        routing_key = event._routing_key
+        n = self.partition(event)
+        if n is not None:
+            routing_key = f"{routing_key}.{n}"
+        await self._outbox.publish_message(
+            message, routing_key, event._exchange_name, partition=n or 0
+        )
         logger.debug("Event published", extra={"event_data": event})
 
+    def partition(self, event: IntegrationEvent) -> Optional[int]:
+        if not self._config.partitions:
+            return None
+        key = event.partition_key(self._config.partition_by)
+        if key is None:
+            return None
+        return partition(key, self._config.partitions)
+
     @staticmethod
-    def build_message(event: IntegrationEvent) -> Message:
+    def build_message(event: IntegrationEvent, codec: Codec) -> Message:
         return Message(
             id=event.event_id,
-            data=orjson.dumps(event, default=additionally_serialize).decode(),
+            data=codec.encode(event),
+            content_type=codec.content_type,
             message_type="event",
+            type=event.event_type,
+            timestamp=event.event_timestamp,
+            headers={"event_version": event.event_version},
         )
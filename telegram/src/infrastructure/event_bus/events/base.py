@@ -6,15 +6,24 @@ from uuid import UUID
 
 from uuid6 import uuid7
 
+from .schema import EventSchema, register_event
+
 
 @dataclass(frozen=True, kw_only=True)
 class IntegrationEvent:
     event_id: UUID = field(default_factory=uuid7)
     event_timestamp: datetime = field(default_factory=datetime.utcnow)
     event_type: ClassVar[str]
+    event_version: ClassVar[int]
+    _schema: ClassVar[EventSchema]
     _exchange_name: ClassVar[str]
     _routing_key: ClassVar[str]
 
+    def partition_key(self, partition_by: str) -> str | None:
+        """The key events are kept in order by, see ``EventBusConfig.partitions``.
+        None routes the event without a partition."""
+        return None
+
 
 EventType = TypeVar("EventType", bound=type[IntegrationEvent])
 
@@ -23,11 +32,19 @@ def integration_event(
     event_type: str,
     exchange: str,
     routing_key: str | None = None,
+    version: int = 1,
 ) -> Callable[[EventType], EventType]:
+    """Registers the event dataclass, so it has to be applied above
+    ``@dataclass``. A change of the fields that consumers can't read the old
+    way needs a new version, events of every registered version can be
+    decoded."""
+
     def _integration_event(cls: EventType) -> EventType:
         cls.event_type = event_type
+        cls.event_version = version
         cls._exchange_name = exchange
         cls._routing_key = routing_key if routing_key is not None else event_type
+        cls._schema = register_event(cls, event_type, version)
         return cls
 
     return _integration_event
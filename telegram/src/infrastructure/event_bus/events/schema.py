@@ -0,0 +1,154 @@
+import types
+import typing
+from collections.abc import Callable
+from dataclasses import MISSING, fields
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+Convert = Callable[[Any], Any]
+
+# Types a payload holds as is, in every codec.
+PLAIN_TYPES = (int, str, bool, float, type(None))
+# Types held as strings, with the converters to and from them.
+STRING_TYPES: Dict[type, Tuple[Convert, Convert]] = {
+    datetime: (datetime.isoformat, datetime.fromisoformat),
+    UUID: (str, UUID),
+}
+
+
+class EventSchema:
+    """How events of a dataclass ``event_cls`` are converted to a flat payload
+    of plain types and back.
+
+    The encoder and decoder are generated once, as single expressions over the
+    fields with a converter call only where a field isn't kept as is. A field
+    of a type without converters fails here, not when an event is published.
+    """
+
+    def __init__(self, event_cls: type, event_type: str, version: int) -> None:
+        if "__dataclass_fields__" not in event_cls.__dict__:
+            raise Exception(
+                f"{event_cls.__name__} is not a dataclass, apply integration_event "
+                f"above @dataclass."
+            )
+        self.event_cls = event_cls
+        self.event_type = event_type
+        self.version = version
+        hints = typing.get_type_hints(event_cls)
+        self._fields = [
+            (field, hints[field.name]) for field in fields(event_cls) if field.init
+        ]
+        for field, tp in self._fields:
+            try:
+                _converters(tp)
+            except TypeError:
+                raise Exception(
+                    f"Can't serialize {event_cls.__name__}.{field.name} of type {tp}."
+                ) from None
+        self.encode = self._compile_encoder()
+        self.decode = self._compile_decoder()
+
+    def _compile_encoder(self) -> Callable[[Any], Dict[str, Any]]:
+        namespace: Dict[str, Any] = {}
+        items = []
+        for n, (field, tp) in enumerate(self._fields):
+            value = f"event.{field.name}"
+            to_plain, _ = _converters(tp)
+            if to_plain is not None:
+                namespace[f"_encode{n}"] = to_plain
+                value = f"_encode{n}({value})"
+            items.append(f"{field.name!r}: {value}")
+        source = f"def encode(event):\n    return {{{', '.join(items)}}}\n"
+        return self._compile(source, namespace)["encode"]
+
+    def _compile_decoder(self) -> Callable[[Dict[str, Any]], Any]:
+        namespace: Dict[str, Any] = {"cls": self.event_cls, "_set": object.__setattr__}
+        items = []
+        for n, (field, tp) in enumerate(self._fields):
+            item = f"payload[{field.name!r}]"
+            _, from_plain = _converters(tp)
+            if from_plain is not None:
+                namespace[f"_decode{n}"] = from_plain
+                item = f"_decode{n}({item})"
+            # A field with a default can be added without a new version,
+            # payloads encoded before lack it.
+            if field.default is not MISSING:
+                namespace[f"_default{n}"] = field.default
+                item = f"({item} if {field.name!r} in payload else _default{n})"
+            elif field.default_factory is not MISSING:
+                namespace[f"_default{n}"] = field.default_factory
+                item = f"({item} if {field.name!r} in payload else _default{n}())"
+            items.append(f"{field.name!r}: {item}")
+        if hasattr(self.event_cls, "__post_init__"):
+            source = f"def decode(payload):\n    return cls(**{{{', '.join(items)}}})\n"
+        else:
+            # Skips __init__, which sets the fields of a frozen dataclass one
+            # by one through object.__setattr__.
+            source = (
+                f"def decode(payload):\n"
+                f"    event = cls.__new__(cls)\n"
+                f"    _set(event, '__dict__', {{{', '.join(items)}}})\n"
+                f"    return event\n"
+            )
+        return self._compile(source, namespace)["decode"]
+
+    def _compile(self, source: str, namespace: Dict[str, Any]) -> Dict[str, Any]:
+        filename = f"<{self.event_type} v{self.version} schema>"
+        exec(compile(source, filename, "exec"), namespace)
+        return namespace
+
+
+_SCHEMAS: Dict[Tuple[str, int], EventSchema] = {}
+
+
+def register_event(cls: type, event_type: str, version: int) -> EventSchema:
+    key = (event_type, version)
+    if key in _SCHEMAS:
+        raise Exception(f"Event {event_type} v{version} is registered already.")
+    schema = EventSchema(cls, event_type, version)
+    _SCHEMAS[key] = schema
+    return schema
+
+
+def get_schema(event_type: str, version: int) -> EventSchema:
+    schema = _SCHEMAS.get((event_type, version))
+    if schema is None:
+        raise Exception(f"Unknown event {event_type} v{version}.")
+    return schema
+
+
+def _converters(tp: Any) -> Tuple[Optional[Convert], Optional[Convert]]:
+    """Returns the converters of a type to plain types and back, None where
+    the value is kept as is. Raises TypeError for types that can't be
+    converted."""
+    if tp in PLAIN_TYPES:
+        return None, None
+    if tp in STRING_TYPES:
+        return STRING_TYPES[tp]
+
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin in (typing.Union, types.UnionType):
+        others = [arg for arg in args if arg is not type(None)]
+        if len(others) != 1:
+            raise TypeError(tp)
+        to_plain, from_plain = _converters(others[0])
+        return _optional(to_plain), _optional(from_plain)
+    if origin is tuple and len(args) == 2 and args[1] is Ellipsis:
+        # Codecs encode tuples as arrays, which decode to lists.
+        to_plain, from_plain = _converters(args[0])
+        return _each(to_plain, list), _each(from_plain, tuple) or tuple
+    raise TypeError(tp)
+
+
+def _optional(convert: Optional[Convert]) -> Optional[Convert]:
+    if convert is None:
+        return None
+    return lambda value: None if value is None else convert(value)
+
+
+def _each(convert: Optional[Convert], collection: type) -> Optional[Convert]:
+    if convert is None:
+        return None
+    return lambda values: collection(convert(value) for value in values)
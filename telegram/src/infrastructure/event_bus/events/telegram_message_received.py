@@ -2,13 +2,13 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-from src.infrastructure.event_bus.exchanges import TELEGRAM_EXCHANGE
+from src.infrastructure.event_bus.exchanges import ACCOUNT, TELEGRAM_EXCHANGE
 
 from .base import IntegrationEvent, integration_event
 
 
-@dataclass(frozen=True)
 @integration_event("TelegramMessageReceived", exchange=TELEGRAM_EXCHANGE)
+@dataclass(frozen=True)
 class TelegramMessageReceived(IntegrationEvent):
     id: int
     message: str
@@ -19,3 +19,10 @@ class TelegramMessageReceived(IntegrationEvent):
     media_type: Optional[str] = None
     reply_to_msg_id: Optional[int] = None
     forwarded_from: Optional[str] = None
+    # Sessions of the accounts that received the message.
+    seen_by: tuple[str, ...] = ()
+
+    def partition_key(self, partition_by: str) -> Optional[str]:
+        if partition_by == ACCOUNT and self.seen_by:
+            return self.seen_by[0]
+        return self.peer_id
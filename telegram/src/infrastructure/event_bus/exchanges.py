@@ -1,7 +1,30 @@
+import zlib
+
+from src.infrastructure.message_broker.config import EventBusConfig
 from src.infrastructure.message_broker.message_broker import MessageBroker
 
 TELEGRAM_EXCHANGE = "telegram"
 
+PEER_ID = "peer_id"
+ACCOUNT = "account"
+PARTITION_BY = (PEER_ID, ACCOUNT)
+
+
+def partition(key: str, partitions: int) -> int:
+    # Stable across processes and restarts, unlike hash().
+    return zlib.crc32(key.encode()) % partitions
+
 
-async def declare_exchanges(message_broker: MessageBroker) -> None:
+async def declare_exchanges(
+    message_broker: MessageBroker, config: EventBusConfig
+) -> None:
     await message_broker.declare_exchange(TELEGRAM_EXCHANGE)
+    # One active consumer per partition keeps its events in order, the others
+    # take over when it goes away.
+    for n in range(config.partitions):
+        await message_broker.declare_queue(
+            f"{TELEGRAM_EXCHANGE}.{n}",
+            TELEGRAM_EXCHANGE,
+            f"*.{n}",
+            arguments={"x-single-active-consumer": True},
+        )
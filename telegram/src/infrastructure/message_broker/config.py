@@ -7,3 +7,15 @@ class EventBusConfig:
     port: int = 5672
     login: str = "admin"
     password: str = "admin"
+    # Codec of the published events, application/json or application/msgpack.
+    content_type: str = "application/json"
+    # Messages of the outbox published per batch, and the seconds between
+    # polls of an empty outbox.
+    outbox_batch_size: int = 500
+    outbox_poll_interval: float = 1.0
+    # Events are routed to "<event type>.<partition>" with the partition a
+    # hash of the chat, "peer_id", or of the account, "account", and a queue
+    # per partition is declared. 0 keeps the event type as the routing key.
+    # Changing the count moves chats between partitions.
+    partitions: int = 0
+    partition_by: str = "peer_id"
@@ -1,4 +1,4 @@
-from typing import Protocol
+from typing import Any, Dict, Optional, Protocol
 
 from .message import Message
 
@@ -14,3 +14,18 @@ class MessageBroker(Protocol):
 
     async def declare_exchange(self, exchange_name: str) -> None:
         raise NotImplementedError
+
+    async def declare_queue(
+        self,
+        queue_name: str,
+        exchange_name: str,
+        routing_key: str,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        raise NotImplementedError
+
+    def discard(self) -> None:
+        raise NotImplementedError
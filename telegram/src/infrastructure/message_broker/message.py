@@ -1,4 +1,6 @@
 from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
 from uuid import UUID
 
 from uuid6 import uuid7
@@ -7,5 +9,11 @@ from uuid6 import uuid7
 @dataclass(frozen=True, kw_only=True)
 class Message:
     id: UUID = field(default_factory=uuid7)
-    data: str = ""
+    # Published as is, encoded according to content_type.
+    data: bytes = b""
+    content_type: str = "application/json"
     message_type: str = "message"
+    # The AMQP type property, e.g. the event type.
+    type: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    headers: Dict[str, Any] = field(default_factory=dict)
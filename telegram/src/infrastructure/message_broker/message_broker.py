@@ -1,7 +1,8 @@
+import asyncio
 import logging
+from typing import Any, Dict, List, Optional, Tuple
 
 import aio_pika
-import orjson
 from aio_pika.abc import AbstractChannel
 
 from .interface import MessageBroker
@@ -9,10 +10,22 @@ from .message import Message
 
 logger = logging.getLogger(__name__)
 
+# Messages published without their confirm received yet, per flush.
+CONFIRM_WINDOW = 1000
+
 
 class MessageBrokerImpl(MessageBroker):
+    """Publishes on a channel in publisher confirms mode.
+
+    Messages are buffered until ``flush``, which pipelines them on the channel
+    with up to ``CONFIRM_WINDOW`` of them awaiting their confirm, and returns
+    once the broker confirmed every one. A flush that raises may have
+    published a part of the messages, publishing them again is at-least-once.
+    """
+
     def __init__(self, channel: AbstractChannel) -> None:
         self._channel = channel
+        self._pending: List[Tuple[aio_pika.Message, str, str]] = []
 
     async def publish_message(
         self,
@@ -21,32 +34,61 @@ class MessageBrokerImpl(MessageBroker):
         exchange_name: str,
     ) -> None:
         rq_message = self.build_message(message)
-        await self._publish_message(rq_message, routing_key, exchange_name)
+        self._pending.append((rq_message, routing_key, exchange_name))
 
     async def declare_exchange(self, exchange_name: str):
         await self._channel.declare_exchange(exchange_name, aio_pika.ExchangeType.TOPIC)
 
+    async def declare_queue(
+        self,
+        queue_name: str,
+        exchange_name: str,
+        routing_key: str,
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        queue = await self._channel.declare_queue(
+            queue_name, durable=True, arguments=arguments
+        )
+        await queue.bind(exchange_name, routing_key=routing_key)
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        exchanges: Dict[str, aio_pika.abc.AbstractExchange] = {}
+        for _, _, exchange_name in pending:
+            if exchange_name not in exchanges:
+                exchanges[exchange_name] = await self._get_exchange(exchange_name)
+
+        window = asyncio.Semaphore(CONFIRM_WINDOW)
+
+        async def publish(
+            rq_message: aio_pika.Message, routing_key: str, exchange_name: str
+        ) -> None:
+            async with window:
+                # Without a bound queue a message is dropped as before, rather
+                # than failing the whole flush.
+                await exchanges[exchange_name].publish(
+                    rq_message, routing_key=routing_key, mandatory=False
+                )
+
+        await asyncio.gather(*(publish(*item) for item in pending))
+        logger.info("Messages sent", extra={"count": len(pending)})
+
+    def discard(self) -> None:
+        self._pending.clear()
+
     @staticmethod
     def build_message(message: Message) -> aio_pika.Message:
         return aio_pika.Message(
-            body=orjson.dumps(
-                {"message_type": message.message_type, "data": message.data}
-            ),
+            body=message.data,
             message_id=str(message.id),
-            content_type="application/json",
+            content_type=message.content_type,
+            type=message.type,
+            timestamp=message.timestamp,
             delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-            headers={},
+            headers={"message_type": message.message_type, **message.headers},
         )
 
-    async def _publish_message(
-        self,
-        rq_message: aio_pika.Message,
-        routing_key: str,
-        exchange_name: str,
-    ) -> None:
-        exchange = await self._get_exchange(exchange_name)
-        await exchange.publish(rq_message, routing_key=routing_key)
-        logger.info("Message sent", extra={"rq_message": rq_message})
-
     async def _get_exchange(self, exchange_name: str) -> aio_pika.abc.AbstractExchange:
         return await self._channel.get_exchange(exchange_name, ensure=False)
@@ -0,0 +1,34 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.infrastructure.db.models.outbox import OutboxMessage
+from src.infrastructure.message_broker.message import Message
+
+
+class Outbox:
+    """Stores messages in the ``outbox`` table of the request's session, they
+    are committed, or rolled back, with the rest of the unit of work and
+    published by ``OutboxRelay``."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def publish_message(
+        self,
+        message: Message,
+        routing_key: str,
+        exchange_name: str,
+        partition: int = 0,
+    ) -> None:
+        self._session.add(
+            OutboxMessage(
+                message_id=message.id,
+                partition=partition,
+                exchange=exchange_name,
+                routing_key=routing_key,
+                content_type=message.content_type,
+                message_type=message.message_type,
+                type=message.type,
+                timestamp=message.timestamp,
+                headers=message.headers,
+                body=message.data,
+            )
+        )
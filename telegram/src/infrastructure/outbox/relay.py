@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import aio_pika
+from aio_pika.pool import Pool
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.infrastructure.db.models.outbox import OutboxMessage
+from src.infrastructure.message_broker.config import EventBusConfig
+from src.infrastructure.message_broker.message import Message
+from src.infrastructure.message_broker.message_broker import MessageBrokerImpl
+
+logger = logging.getLogger(__name__)
+
+# The first key of the advisory locks of the outbox partitions.
+OUTBOX_LOCK_ID = 0x6F7574
+
+
+@dataclass
+class RelayStats:
+    batches: int = 0
+    published: int = 0
+    failures: int = 0
+    # Seconds, of the last batch.
+    batch_latency: float = 0.0
+
+
+class OutboxRelay:
+    """Publishes the ``outbox`` rows, oldest first, ``outbox_batch_size`` at a
+    time.
+
+    Rows are relayed per partition, see ``EventBusConfig.partitions``, the
+    relay of a partition holds a transaction level advisory lock on it. So
+    relays of several processes share the table, while the rows of a
+    partition are only ever published by one of them at a time and in order.
+    A batch is published with publisher confirms and deleted in the same
+    transaction once every message is confirmed. A batch that fails is rolled
+    back and retried before the later rows of its partition, its messages may
+    be published twice. The relay polls every ``outbox_poll_interval``
+    seconds, or right away after ``notify``.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        rq_channel_pool: Pool[aio_pika.abc.AbstractChannel],
+        config: EventBusConfig,
+    ) -> None:
+        self._session_factory = session_factory
+        self._channel_pool = rq_channel_pool
+        self.config = config
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = RelayStats()
+
+    @property
+    def stats(self) -> RelayStats:
+        return self._stats
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def notify(self) -> None:
+        """Wakes the relay up, new messages were committed."""
+        self._wake.set()
+
+    async def close(self) -> None:
+        """Stops the relay, the rows left are published after a restart."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        delay = 1.0
+        while True:
+            self._wake.clear()
+            full = False
+            try:
+                for partition in range(max(self.config.partitions, 1)):
+                    started = time.monotonic()
+                    published = await self._relay_batch(partition)
+                    if published:
+                        self._stats.batches += 1
+                        self._stats.published += published
+                        self._stats.batch_latency = time.monotonic() - started
+                    full = full or published >= self.config.outbox_batch_size
+            except Exception as e:
+                self._stats.failures += 1
+                logger.error(
+                    f"Failed to relay outbox messages, retrying in {delay}s: {e}",
+                    exc_info=True,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            delay = 1.0
+
+            if not full:
+                try:
+                    await asyncio.wait_for(
+                        self._wake.wait(), self.config.outbox_poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _relay_batch(self, partition: int) -> int:
+        t = OutboxMessage
+        async with self._session_factory() as session, session.begin():
+            locked = await session.scalar(
+                select(func.pg_try_advisory_xact_lock(OUTBOX_LOCK_ID, partition))
+            )
+            if not locked:
+                # Another relay has the partition.
+                return 0
+            rows = (
+                await session.execute(
+                    select(
+                        t.id,
+                        t.message_id,
+                        t.exchange,
+                        t.routing_key,
+                        t.content_type,
+                        t.message_type,
+                        t.type,
+                        t.timestamp,
+                        t.headers,
+                        t.body,
+                    )
+                    .where(t.partition == partition)
+                    .order_by(t.id)
+                    .limit(self.config.outbox_batch_size)
+                )
+            ).all()
+            if not rows:
+                return 0
+
+            async with self._channel_pool.acquire() as channel:
+                message_broker = MessageBrokerImpl(channel)
+                for row in rows:
+                    await message_broker.publish_message(
+                        Message(
+                            id=row.message_id,
+                            data=row.body,
+                            content_type=row.content_type,
+                            message_type=row.message_type,
+                            type=row.type,
+                            timestamp=row.timestamp,
+                            headers=row.headers,
+                        ),
+                        row.routing_key,
+                        row.exchange,
+                    )
+                await message_broker.flush()
+
+            await session.execute(delete(t).where(t.id.in_([row.id for row in rows])))
+        return len(rows)
@@ -0,0 +1,206 @@
+import asyncio
+import io
+import itertools
+import logging
+import pickle
+import struct
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, Dict, Optional
+
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!IQ")
+
+# Kinds of response frames. A handler returning an async iterator is answered
+# with one ITEM frame per item and an END frame.
+OK, ERROR, ITEM, END = "ok", "error", "item", "end"
+
+Handler = Callable[[Any], Awaitable[Any]]
+
+
+class _Pickler(pickle.Pickler):
+    def reducer_override(self, obj: Any) -> Any:
+        # Telethon's custom objects (Message, Dialog) keep a reference to their
+        # client, which lives in the worker. They cross the channel detached.
+        if isinstance(obj, TelegramClient):
+            return type(None), ()
+        return NotImplemented
+
+
+def dumps(obj: Any) -> bytes:
+    buffer = io.BytesIO()
+    _Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buffer.getvalue()
+
+
+async def _write_frame(
+    writer: asyncio.StreamWriter, request_id: int, payload: bytes
+) -> None:
+    writer.write(HEADER.pack(len(payload), request_id) + payload)
+    await writer.drain()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    size, request_id = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return request_id, await reader.readexactly(size)
+
+
+class IPCServer:
+    """Serves pickled requests from the supervisor on a unix socket.
+
+    Each request runs in its own task, so one slow query doesn't hold up the
+    others multiplexed on the same connection. Streamed items are written one
+    at a time, so a slow reader pauses the stream instead of buffering it.
+    """
+
+    def __init__(self, path: str, handler: Handler) -> None:
+        self._path = path
+        self._handler = handler
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(self._serve, path=self._path)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                request_id, payload = await _read_frame(reader)
+                task = asyncio.create_task(
+                    self._respond(writer, lock, request_id, payload)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        lock: asyncio.Lock,
+        request_id: int,
+        payload: bytes,
+    ) -> None:
+        async def send(kind: str, value: Any) -> None:
+            try:
+                data = dumps((kind, value))
+            except Exception as e:
+                logger.error(f"Can't serialize IPC response: {e}", exc_info=True)
+                data = dumps((ERROR, Exception(f"Can't serialize IPC response: {e}")))
+            async with lock:
+                await _write_frame(writer, request_id, data)
+
+        try:
+            result = await self._handler(pickle.loads(payload))
+        except Exception as e:
+            await send(ERROR, e)
+            return
+        if not isinstance(result, AsyncIterator):
+            await send(OK, result)
+            return
+
+        try:
+            async for item in result:
+                await send(ITEM, item)
+        except ConnectionError:
+            logger.info(f"IPC stream {request_id} closed by the reader")
+            return
+        except Exception as e:
+            await send(ERROR, e)
+            return
+        finally:
+            aclose = getattr(result, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await send(END, None)
+
+
+class IPCClient:
+    """Multiplexes requests to one worker over a single unix socket."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._ids = itertools.count()
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        # Set once the channel drops, later requests fail instead of waiting for
+        # a response nobody reads anymore.
+        self._closed: Optional[ConnectionError] = None
+
+    async def connect(self) -> None:
+        reader, self._writer = await asyncio.open_unix_connection(self._path)
+        self._reader_task = asyncio.create_task(self._read(reader))
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    async def request(self, obj: Any) -> Any:
+        if self._closed is not None:
+            raise self._closed
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[request_id] = future
+        try:
+            async with self._lock:
+                await _write_frame(self._writer, request_id, dumps(obj))
+            kind, result = await future
+        finally:
+            self._waiters.pop(request_id, None)
+        if kind == ERROR:
+            raise result
+        if kind != OK:
+            raise TypeError("Streamed IPC response, use IPCClient.stream")
+        return result
+
+    async def stream(self, obj: Any) -> AsyncIterator[Any]:
+        """Sends a request answered with a stream, on its own connection.
+
+        The worker only writes as fast as the items are consumed here, so a
+        dedicated connection keeps a slow stream from blocking other requests.
+        """
+        reader, writer = await asyncio.open_unix_connection(self._path)
+        try:
+            await _write_frame(writer, 0, dumps(obj))
+            while True:
+                _, payload = await _read_frame(reader)
+                kind, value = pickle.loads(payload)
+                if kind == ITEM:
+                    yield value
+                elif kind == ERROR:
+                    raise value
+                elif kind == END:
+                    return
+                else:
+                    raise TypeError("Single IPC response, use IPCClient.request")
+        finally:
+            writer.close()
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                request_id, payload = await _read_frame(reader)
+                future = self._waiters.get(request_id)
+                if future is not None and not future.done():
+                    future.set_result(pickle.loads(payload))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            self._closed = ConnectionError(f"IPC channel closed: {e}")
+            for future in self._waiters.values():
+                if not future.done():
+                    future.set_exception(self._closed)
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import List
+
+from di import ScopeState
+from didiator.interface.mediator import Mediator
+from didiator.interface.utils.di_builder import DiBuilder
+from src.application.telegram.commands.messages import PublishEvents, StartListening
+from src.domain.common.event import Event
+from src.domain.telegram.services.listener import TelegramListener
+from src.domain.telegram.services.manager import TelegramClientManager
+from src.domain.telegram.services.pipeline import EventPipeline
+from src.infrastructure.event_bus.exchanges import declare_exchanges
+from src.infrastructure.outbox.relay import OutboxRelay
+from src.main.di.constants import DiScope
+from src.main.mediator.utils import ScopedMediator
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def run_telegram(
+    di_builder: DiBuilder, mediator: Mediator, di_state: ScopeState
+) -> AsyncIterator[ScopedMediator]:
+    """Starts the clients, the event pipeline and the outbox relay, then listens
+    to the accounts, and stops them again on exit.
+
+    Shared by the single process app and the worker processes, so both start
+    the same way. Yields the mediator bound to the APP scope.
+    """
+    async with di_builder.enter_scope(
+        DiScope.REQUEST, state=di_state
+    ) as request_di_state:
+        await di_builder.execute(
+            declare_exchanges, DiScope.REQUEST, state=request_di_state
+        )
+
+    manager = await di_builder.execute(
+        TelegramClientManager, DiScope.APP, state=di_state
+    )
+    try:
+        await manager.start_clients()
+    except Exception as e:
+        # There may be no accounts yet, new sessions are still served.
+        logger.warning(f"Started without clients: {e}")
+
+    scoped_mediator = ScopedMediator(mediator, di_state)
+    pipeline = await di_builder.execute(EventPipeline, DiScope.APP, state=di_state)
+    relay = await di_builder.execute(OutboxRelay, DiScope.APP, state=di_state)
+    relay.start()
+
+    async def publish(events: List[Event]) -> None:
+        await scoped_mediator.send(PublishEvents(events=tuple(events)))
+        relay.notify()
+
+    pipeline.start(publish)
+
+    async def listen() -> None:
+        try:
+            await scoped_mediator.send(StartListening())
+        except Exception as e:
+            logger.error(f"Failed to start listening: {e}", exc_info=True)
+
+    # Catching up on missed updates takes a while, requests are served meanwhile.
+    listening = asyncio.create_task(listen())
+    try:
+        yield scoped_mediator
+    finally:
+        listening.cancel()
+        await asyncio.gather(listening, return_exceptions=True)
+        listener = await di_builder.execute(
+            TelegramListener, DiScope.APP, state=di_state
+        )
+        await listener.close()
+        await pipeline.close()
+        await relay.close()
+        await manager.close_all()
@@ -9,12 +9,36 @@ from didiator.interface.utils.di_builder import DiBuilder
 from didiator.utils.di_builder import DiBuilderImpl
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from src.application.common.interfaces.uow import UnitOfWork
+from src.core.telegram.config import TelegramConfig
+from src.core.telegram.dialogs import DialogStore
+from src.core.telegram.media import MediaCache
+from src.core.telegram.messages import MessageStore
+from src.core.telegram.sessions.my_sqlalchemy import AlchemySessionContainer
+from src.domain.telegram.services.catchup import UpdateCatchUp
+from src.domain.telegram.services.dialogs import DialogIndex
+from src.domain.telegram.services.downloads import MediaDownloader
+from src.domain.telegram.services.listener import TelegramListener
+from src.domain.telegram.services.manager import TelegramClientManager
+from src.domain.telegram.services.messages import MessageHistory
+from src.domain.telegram.services.operations import TelegramOperations
+from src.domain.telegram.services.pipeline import EventPipeline
+from src.domain.telegram.services.scheduler import RequestScheduler
+from src.domain.telegram.services.sessions import SessionMaker
 from src.infrastructure.event_bus.event_bus import EventBusImpl
+from src.infrastructure.message_broker.config import EventBusConfig
 from src.infrastructure.message_broker.interface import MessageBroker
 from src.infrastructure.message_broker.message_broker import MessageBrokerImpl
+from src.infrastructure.outbox.outbox import Outbox
+from src.infrastructure.outbox.relay import OutboxRelay
 from src.main.di.constants import DiScope
 from src.main.di.db import build_sa_session
-from src.main.di.message_broker import build_rq_channel, build_rq_transaction
+from src.main.di.message_broker import build_rq_channel
+from src.main.di.telegram import (
+    build_dialog_index,
+    build_media_cache,
+    build_message_history,
+    build_session_container,
+)
 from src.main.di.uow import build_uow
 from src.main.mediator.utils import get_mediator
 
@@ -33,6 +57,8 @@ def setup_di_builder(
     session_factory: async_sessionmaker[AsyncSession],
     rq_connection_pool: aio_pika.pool.Pool[aio_pika.abc.AbstractConnection],
     rq_channel_pool: aio_pika.pool.Pool[aio_pika.abc.AbstractChannel],
+    event_bus_config: EventBusConfig,
+    telegram_config: TelegramConfig,
 ) -> None:
     di_builder.bind(
         bind_by_type(Dependent(lambda *args: di_builder, scope=DiScope.APP), DiBuilder)
@@ -42,7 +68,10 @@ def setup_di_builder(
     )
     setup_mediator_factory(di_builder, get_mediator, DiScope.REQUEST)
     setup_db_factories(di_builder, di_engine, session_factory)
-    setup_event_bus_factories(di_builder, rq_connection_pool, rq_channel_pool)
+    setup_event_bus_factories(
+        di_builder, rq_connection_pool, rq_channel_pool, event_bus_config
+    )
+    setup_telegram_factories(di_builder, telegram_config)
 
 
 def setup_mediator_factory(
@@ -85,7 +114,14 @@ def setup_event_bus_factories(
     di_builder: DiBuilder,
     rq_connection_pool: aio_pika.pool.Pool[aio_pika.abc.AbstractConnection],
     rq_channel_pool: aio_pika.pool.Pool[aio_pika.abc.AbstractChannel],
+    event_bus_config: EventBusConfig,
 ) -> None:
+    di_builder.bind(
+        bind_by_type(
+            Dependent(lambda *args: event_bus_config, scope=DiScope.APP),
+            EventBusConfig,
+        ),
+    )
     di_builder.bind(
         bind_by_type(
             Dependent(lambda *args: rq_connection_pool, scope=DiScope.APP),
@@ -104,15 +140,75 @@ def setup_event_bus_factories(
             aio_pika.abc.AbstractChannel,
         ),
     )
+    di_builder.bind(
+        bind_by_type(Dependent(MessageBrokerImpl, scope=DiScope.REQUEST), MessageBroker)
+    )
+    di_builder.bind(bind_by_type(Dependent(Outbox, scope=DiScope.REQUEST), Outbox))
+    di_builder.bind(
+        bind_by_type(Dependent(EventBusImpl, scope=DiScope.REQUEST), EventBusImpl)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(OutboxRelay, scope=DiScope.APP), OutboxRelay)
+    )
+
+
+def setup_telegram_factories(
+    di_builder: DiBuilder, telegram_config: TelegramConfig
+) -> None:
     di_builder.bind(
         bind_by_type(
-            Dependent(build_rq_transaction, scope=DiScope.REQUEST),
-            aio_pika.abc.AbstractTransaction,
-        ),
+            Dependent(lambda *args: telegram_config, scope=DiScope.APP),
+            TelegramConfig,
+        )
     )
     di_builder.bind(
-        bind_by_type(Dependent(MessageBrokerImpl, scope=DiScope.REQUEST), MessageBroker)
+        bind_by_type(
+            Dependent(build_session_container, scope=DiScope.APP),
+            AlchemySessionContainer,
+        )
     )
     di_builder.bind(
-        bind_by_type(Dependent(EventBusImpl, scope=DiScope.REQUEST), EventBusImpl)
+        bind_by_type(
+            Dependent(TelegramClientManager, scope=DiScope.APP), TelegramClientManager
+        )
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(RequestScheduler, scope=DiScope.APP), RequestScheduler)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(DialogStore, scope=DiScope.APP), DialogStore)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(build_dialog_index, scope=DiScope.APP), DialogIndex)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(MessageStore, scope=DiScope.APP), MessageStore)
+    )
+    di_builder.bind(
+        bind_by_type(
+            Dependent(build_message_history, scope=DiScope.APP), MessageHistory
+        )
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(MediaDownloader, scope=DiScope.APP), MediaDownloader)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(build_media_cache, scope=DiScope.APP), MediaCache)
+    )
+    di_builder.bind(
+        bind_by_type(
+            Dependent(TelegramOperations, scope=DiScope.APP), TelegramOperations
+        )
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(EventPipeline, scope=DiScope.APP), EventPipeline)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(UpdateCatchUp, scope=DiScope.APP), UpdateCatchUp)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(TelegramListener, scope=DiScope.APP), TelegramListener)
+    )
+    di_builder.bind(
+        bind_by_type(Dependent(SessionMaker, scope=DiScope.APP), SessionMaker)
     )
@@ -0,0 +1,60 @@
+import asyncio
+import os
+from collections.abc import AsyncGenerator
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.core.telegram.config import TelegramConfig
+from src.core.telegram.dialogs import DialogStore
+from src.core.telegram.media import MediaCache
+from src.core.telegram.sessions.my_sqlalchemy import AlchemySessionContainer
+from src.core.telegram.messages import MessageStore
+from src.domain.telegram.services.dialogs import DialogIndex
+from src.domain.telegram.services.messages import MessageHistory
+from src.domain.telegram.services.scheduler import RequestScheduler
+
+
+async def build_session_container(
+    db_engine: AsyncEngine,
+) -> AsyncGenerator[AlchemySessionContainer, None]:
+    # Account bookkeeping stays on the ORM session, Telethon sessions are
+    # stored through the AsyncEngine so they never block the event loop.
+    sync_engine = create_engine(db_engine.url.set(drivername="postgresql+psycopg2"))
+    session_container = AlchemySessionContainer(
+        engine=sync_engine, manage_tables=False, async_engine=db_engine
+    )
+    await session_container.start()
+    yield session_container
+
+    await session_container.close()
+    sync_engine.dispose()
+
+
+async def build_dialog_index(
+    store: DialogStore, scheduler: RequestScheduler, config: TelegramConfig
+) -> AsyncGenerator[DialogIndex, None]:
+    dialog_index = DialogIndex(store, scheduler, config)
+    await dialog_index.start()
+    yield dialog_index
+
+    await dialog_index.close()
+
+
+async def build_message_history(
+    store: MessageStore, scheduler: RequestScheduler, config: TelegramConfig
+) -> AsyncGenerator[MessageHistory, None]:
+    message_history = MessageHistory(store, scheduler, config)
+    await message_history.start()
+    yield message_history
+
+    await message_history.close()
+
+
+async def build_media_cache(config: TelegramConfig) -> AsyncGenerator[MediaCache, None]:
+    directory = config.media_cache_dir
+    if config.worker_id is not None:
+        # Each worker accounts for the size of its own files.
+        directory = os.path.join(directory, f"worker-{config.worker_id}")
+    media_cache = MediaCache(directory, config.media_cache_size)
+    await asyncio.to_thread(media_cache.load)
+    yield media_cache
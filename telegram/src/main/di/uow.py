@@ -2,11 +2,11 @@ from collections.abc import Sequence
 
 from src.application.common.interfaces.uow import UnitOfWork
 from src.infrastructure.db.uow import SQLAlchemyUoW
-from src.infrastructure.message_broker.uow import RabbitMQUoW
 
 
-def build_uow(db_uow: SQLAlchemyUoW, rq_uow: RabbitMQUoW) -> UnitOfWork:
-    uow = UnitOfWorkImpl((db_uow, rq_uow))
+def build_uow(db_uow: SQLAlchemyUoW) -> UnitOfWork:
+    # Events go through the outbox table, committed with the session.
+    uow = UnitOfWorkImpl((db_uow,))
     return uow
 
 
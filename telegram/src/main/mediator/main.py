@@ -11,6 +11,8 @@ from didiator.interface.utils.di_builder import DiBuilder
 from didiator.middlewares.di import DiMiddleware, DiScopes
 from didiator.middlewares.logging import LoggingMiddleware
 from src.application.telegram.commands.messages import (
+    PublishEvents,
+    PublishEventsHandler,
     StartListening,
     StartListeningHandler,
 )
@@ -33,8 +35,18 @@ from src.application.telegram.query.dialogs import (
     GetTelegramDialogByEntityHandler,
     GetTelegramDialogsByPhone,
     GetTelegramDialogsByPhoneHandler,
+    GetTelegramDialogsDelta,
+    GetTelegramDialogsDeltaHandler,
+)
+from src.application.telegram.query.media import (
+    DownloadTelegramPhoto,
+    DownloadTelegramPhotoHandler,
+    GetCachedTelegramPhoto,
+    GetCachedTelegramPhotoHandler,
 )
 from src.application.telegram.query.messages import (
+    ExportTelegramMessages,
+    ExportTelegramMessagesHandler,
     GetTelegramMessagesByEntityByPhone,
     GetTelegramMessagesByEntityByPhoneHandler,
 )
@@ -59,6 +71,7 @@ def init_mediator(di_builder: DiBuilder) -> Mediator:
 
 def setup_mediator(mediator: Mediator) -> None:
     mediator.register_command_handler(StartListening, StartListeningHandler)
+    mediator.register_command_handler(PublishEvents, PublishEventsHandler)
     mediator.register_command_handler(
         CreateTelegramSession, CreateTelegramSessionHandler
     )
@@ -72,12 +85,22 @@ def setup_mediator(mediator: Mediator) -> None:
     mediator.register_query_handler(
         GetTelegramMessagesByEntityByPhone, GetTelegramMessagesByEntityByPhoneHandler
     )
+    mediator.register_query_handler(
+        ExportTelegramMessages, ExportTelegramMessagesHandler
+    )
     mediator.register_query_handler(
         GetTelegramDialogByEntity, GetTelegramDialogByEntityHandler
     )
     mediator.register_query_handler(
         GetTelegramDialogsByPhone, GetTelegramDialogsByPhoneHandler
     )
+    mediator.register_query_handler(
+        GetTelegramDialogsDelta, GetTelegramDialogsDeltaHandler
+    )
     mediator.register_query_handler(GetTelegramAccounts, GetTelegramAccountsHandler)
+    mediator.register_query_handler(DownloadTelegramPhoto, DownloadTelegramPhotoHandler)
+    mediator.register_query_handler(
+        GetCachedTelegramPhoto, GetCachedTelegramPhotoHandler
+    )
     mediator.register_event_handler(Event, EventLogger)
     mediator.register_event_handler(Event, EventHandlerPublisher)
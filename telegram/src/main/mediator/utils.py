@@ -1,5 +1,26 @@
+from typing import Any
+
+from di import ScopeState
+from didiator.interface.entities.command import Command
+from didiator.interface.entities.query import Query
 from didiator.interface.mediator import Mediator
 
 
 def get_mediator() -> Mediator:
     raise NotImplementedError
+
+
+class ScopedMediator:
+    """Mediator bound to the APP scope, so callers don't pass ``di_state``."""
+
+    def __init__(self, mediator: Mediator, di_state: ScopeState) -> None:
+        self._mediator = mediator
+        self._di_state = di_state
+
+    async def send(self, command: Command, *args: Any, **kwargs: Any) -> Any:
+        kwargs.setdefault("di_state", self._di_state)
+        return await self._mediator.send(command, *args, **kwargs)
+
+    async def query(self, query: Query, *args: Any, **kwargs: Any) -> Any:
+        kwargs.setdefault("di_state", self._di_state)
+        return await self._mediator.query(query, *args, **kwargs)
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+from dataclasses import replace
+from typing import Any, List
+
+from didiator.interface.entities.command import Command
+from src.application.common.query import StreamQuery
+from src.domain.telegram.services.sharding import HashRing
+from src.domain.telegram.value_objects.phone import PhoneNumber, WrongPhoneValueError
+from src.infrastructure.db.main import build_sa_engine, build_sa_session_factory
+from src.infrastructure.logs.main import configure_logging
+from src.infrastructure.message_broker.main import (
+    build_rq_channel_pool,
+    build_rq_connection_pool,
+)
+from src.infrastructure.sharding.ipc import IPCClient, IPCServer
+from src.main.bootstrap import run_telegram
+from src.main.di.constants import DiScope
+from src.main.di.main import init_di_builder, setup_di_builder
+from src.main.mediator.main import init_mediator, setup_mediator
+from src.presentation.api.config import Config
+from src.presentation.api.main import init_api, run_api
+from src.presentation.api.providers import setup_providers
+
+logger = logging.getLogger(__name__)
+
+WORKER_CONNECT_TIMEOUT = 60.0
+
+
+def shard_key(phone: Any) -> str:
+    """Returns the session id the phone is stored under."""
+    try:
+        return PhoneNumber(str(phone)).normalized
+    except WrongPhoneValueError:
+        return str(phone)
+
+
+class ShardRouter:
+    """Mediator facade that forwards requests to the worker owning the account.
+
+    Requests with a ``phone`` go to a single worker, the others are sent to
+    every worker and their list results are concatenated. Stream queries are
+    answered with an async iterator read from the owning worker.
+    """
+
+    def __init__(self, clients: List[IPCClient], ring: HashRing) -> None:
+        self._clients = clients
+        self._ring = ring
+
+    async def send(self, command: Command, *args: Any, **kwargs: Any) -> Any:
+        return await self._dispatch(command)
+
+    async def query(self, query: Any, *args: Any, **kwargs: Any) -> Any:
+        return await self._dispatch(query)
+
+    async def _dispatch(self, request: Any) -> Any:
+        phone = getattr(request, "phone", None)
+        if phone is not None:
+            client = self._clients[self._ring.owner(shard_key(phone))]
+            if isinstance(request, StreamQuery):
+                return client.stream(request)
+            return await client.request(request)
+        if isinstance(request, StreamQuery):
+            raise Exception("Stream queries must be routed by phone.")
+
+        results = await asyncio.gather(
+            *(client.request(request) for client in self._clients)
+        )
+        if all(isinstance(result, list) for result in results):
+            return [item for result in results for item in result]
+        return results[0]
+
+
+async def worker_main(config: Config, worker_id: int, socket_path: str) -> None:
+    configure_logging(config.logging)
+    telegram_config = replace(config.telegram, worker_id=worker_id)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    async with (
+        build_sa_engine(config.db) as db_engine,
+        build_rq_connection_pool(config.event_bus) as rq_connection_pool,
+        build_rq_channel_pool(rq_connection_pool) as rq_channel_pool,
+    ):
+        session_factory = build_sa_session_factory(db_engine)
+        di_builder = init_di_builder()
+        setup_di_builder(
+            di_builder,
+            db_engine,
+            session_factory,
+            rq_connection_pool,
+            rq_channel_pool,
+            config.event_bus,
+            telegram_config,
+        )
+
+        mediator = init_mediator(di_builder)
+        setup_mediator(mediator)
+
+        async with (
+            di_builder.enter_scope(DiScope.APP) as di_state,
+            run_telegram(di_builder, mediator, di_state) as scoped_mediator,
+        ):
+
+            async def handle(request: Any) -> Any:
+                if isinstance(request, Command):
+                    return await scoped_mediator.send(request)
+                return await scoped_mediator.query(request)
+
+            server = IPCServer(socket_path, handle)
+            await server.start()
+            logger.info(f"Worker {worker_id} is serving on {socket_path}")
+            try:
+                await stop.wait()
+            finally:
+                await server.close()
+
+
+def run_worker(config: Config, worker_id: int, socket_path: str) -> None:
+    asyncio.run(worker_main(config, worker_id, socket_path))
+
+
+async def connect_worker(
+    path: str, process: multiprocessing.Process, timeout: float
+) -> IPCClient:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        if not process.is_alive():
+            raise Exception(f"Worker {process.name} exited on startup")
+        if os.path.exists(path):
+            client = IPCClient(path)
+            try:
+                await client.connect()
+                return client
+            except (ConnectionError, FileNotFoundError):
+                pass
+        if asyncio.get_running_loop().time() > deadline:
+            raise Exception(f"Worker {process.name} didn't start in {timeout}s")
+        await asyncio.sleep(0.1)
+
+
+async def run_supervisor(config: Config) -> None:
+    """Runs the API and ``config.telegram.workers`` worker processes.
+
+    Every worker runs the clients of the accounts the hash ring assigns to it,
+    the API forwards mediator requests to them over unix sockets.
+    """
+    workers = config.telegram.workers
+    socket_dir = tempfile.mkdtemp(prefix="telegram-workers-")
+    # Workers set up their own loop, engine and pools, nothing is inherited.
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    clients: List[IPCClient] = []
+
+    logger.info(f"Starting {workers} telegram workers")
+    try:
+        for worker_id in range(workers):
+            socket_path = os.path.join(socket_dir, f"worker-{worker_id}.sock")
+            process = context.Process(
+                target=run_worker,
+                args=(config, worker_id, socket_path),
+                name=f"telegram-worker-{worker_id}",
+                daemon=True,
+            )
+            process.start()
+            processes.append((process, socket_path))
+
+        for process, socket_path in processes:
+            clients.append(
+                await connect_worker(socket_path, process, WORKER_CONNECT_TIMEOUT)
+            )
+
+        app = init_api(config.api.debug)
+        setup_providers(app, ShardRouter(clients, HashRing(workers)))
+        await run_api(app, config.api)
+    finally:
+        for client in clients:
+            await client.close()
+        for process, _ in processes:
+            process.terminate()
+        for process, _ in processes:
+            await asyncio.to_thread(process.join)
+        shutil.rmtree(socket_dir, ignore_errors=True)
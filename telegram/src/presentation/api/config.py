@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 
+from src.core.telegram.config import TelegramConfig
 from src.infrastructure.db.config import DBConfig
 from src.infrastructure.logs.config import LoggingConfig
 from src.infrastructure.message_broker.config import EventBusConfig
@@ -18,3 +19,4 @@ class Config:
     logging: LoggingConfig = field(default_factory=LoggingConfig)
     api: APIConfig = field(default_factory=APIConfig)
     event_bus: EventBusConfig = field(default_factory=EventBusConfig)
+    telegram: TelegramConfig = field(default_factory=TelegramConfig)
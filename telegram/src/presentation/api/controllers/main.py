@@ -3,9 +3,13 @@ from fastapi import FastAPI
 from .default import default_router
 from .exceptions import setup_exception_handlers
 from .healthcheck import healthcheck_router
+from .media import media_router
+from .messages import messages_router
 
 
 def setup_controllers(app: FastAPI) -> None:
     app.include_router(default_router)
     app.include_router(healthcheck_router)
+    app.include_router(messages_router)
+    app.include_router(media_router)
     setup_exception_handlers(app)
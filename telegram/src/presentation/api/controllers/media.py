@@ -0,0 +1,163 @@
+from collections.abc import AsyncIterator
+from typing import Optional, Tuple
+
+from didiator import QueryMediator
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from src.application.telegram.query.media import (
+    DownloadTelegramPhoto,
+    GetCachedTelegramPhoto,
+)
+from src.core.telegram.media import MediaFile
+from src.presentation.api.providers.stub import Stub
+from starlette import status
+from starlette.types import Receive, Scope, Send
+
+media_router = APIRouter(
+    prefix="/media",
+    tags=["media"],
+)
+
+# A photo size never changes once uploaded.
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def parse_range(
+    header: Optional[str], size: Optional[int]
+) -> Optional[Tuple[int, Optional[int]]]:
+    """Parses a single ``bytes=`` range into ``(start, end)``, end inclusive.
+
+    Returns None when the whole file should be sent: no header, several
+    ranges, or a range that can't be resolved without the file size. Raises
+    ValueError for a range outside of the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes=") :].strip().partition("-")
+    if not (first or last) or not (first or "0").isdigit():
+        return None
+    if last and not last.isdigit():
+        return None
+    if first:
+        if not last and size is None:
+            # Open ended, where the file ends isn't known.
+            return None
+        start, end = int(first), int(last) if last else None
+        if end is not None and end < start:
+            return None
+    elif size is None:
+        return None
+    else:
+        # A suffix range, the last bytes of the file.
+        start, end = max(size - int(last), 0), None
+    if size is not None:
+        if start >= size:
+            raise ValueError(f"Range start {start} is past the file size {size}")
+        end = size - 1 if end is None else min(end, size - 1)
+    return start, end
+
+
+class CachedFileResponse(FileResponse):
+    """Sends a file of the media cache and releases it, however the response
+    ends."""
+
+    def __init__(self, file: MediaFile, **kwargs) -> None:
+        super().__init__(file.path, **kwargs)
+        self.file = file
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.file.release()
+
+
+async def prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        yield first
+        async for chunk in rest:
+            yield chunk
+    finally:
+        await rest.aclose()
+
+
+@media_router.get("/{phone}/photos/{photo_id}")
+async def download_photo(
+    phone: str,
+    photo_id: int,
+    access_hash: int,
+    dc_id: int,
+    file_reference: str = "",
+    thumb_size: str = "y",
+    size: Optional[int] = None,
+    mime_type: str = "image/jpeg",
+    cache: bool = True,
+    range_: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    mediator: QueryMediator = Depends(Stub(QueryMediator)),
+) -> Response:
+    """Sends a photo size, honouring a single HTTP ``Range``.
+
+    ``file_reference`` is hex encoded. The photo is served from the media
+    cache, or with ``cache=false`` streamed from Telegram. There ``size``, the
+    byte size of the photo size, lets a large photo be downloaded over several
+    parallel chunk streams and is needed for open ended and suffix ranges.
+    """
+    etag = f'"{photo_id}-{thumb_size}"'
+    headers = {"ETag": etag, "Cache-Control": PHOTO_CACHE_CONTROL}
+    if if_none_match is not None and etag in if_none_match.split(", "):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if cache:
+        file = await mediator.query(
+            GetCachedTelegramPhoto(
+                phone=phone,
+                photo_id=photo_id,
+                access_hash=access_hash,
+                dc_id=dc_id,
+                file_reference=bytes.fromhex(file_reference),
+                thumb_size=thumb_size,
+            )
+        )
+        # FileResponse answers Range requests itself.
+        return CachedFileResponse(file, media_type=mime_type, headers=headers)
+
+    headers["Accept-Ranges"] = "bytes"
+    try:
+        byte_range = parse_range(range_, size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers=headers,
+        )
+
+    start, end = byte_range or (0, size - 1 if size else None)
+    chunks = await mediator.query(
+        DownloadTelegramPhoto(
+            phone=phone,
+            photo_id=photo_id,
+            access_hash=access_hash,
+            dc_id=dc_id,
+            file_reference=bytes.fromhex(file_reference),
+            thumb_size=thumb_size,
+            offset=start,
+            end=end,
+        )
+    )
+    # Errors of the first request, an expired file reference for one, are
+    # still reported with a status code instead of a cut off body.
+    first = await anext(chunks, b"")
+
+    status_code = status.HTTP_200_OK
+    if byte_range is not None and end is not None:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size or '*'}"
+    if size is not None:
+        headers["Content-Length"] = str(end + 1 - start)
+    return StreamingResponse(
+        prepend(first, chunks),
+        status_code=status_code,
+        media_type=mime_type,
+        headers=headers,
+    )
@@ -0,0 +1,55 @@
+import base64
+from collections.abc import AsyncIterator
+from typing import Any, Optional
+
+import orjson
+from didiator import QueryMediator
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from src.application.telegram.query.messages import ExportTelegramMessages
+from src.presentation.api.providers.stub import Stub
+from telethon.tl.types import Message
+
+messages_router = APIRouter(
+    prefix="/messages",
+    tags=["messages"],
+)
+
+
+def parse_entity(entity: str) -> int | str:
+    return int(entity) if entity.lstrip("-").isdigit() else entity
+
+
+def serialize_default(obj: Any) -> Any:
+    if isinstance(obj, bytes):
+        return base64.b64encode(obj).decode()
+    raise TypeError
+
+
+async def to_ndjson(messages: AsyncIterator[Message]) -> AsyncIterator[bytes]:
+    async for message in messages:
+        yield orjson.dumps(
+            message.to_dict(),
+            default=serialize_default,
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+@messages_router.get("/{phone}/{entity}/export")
+async def export_messages(
+    phone: str,
+    entity: str,
+    offset_id: int = 0,
+    limit: Optional[int] = None,
+    mediator: QueryMediator = Depends(Stub(QueryMediator)),
+) -> StreamingResponse:
+    """Streams the chat history as NDJSON, one message per line, newest first."""
+    messages = await mediator.query(
+        ExportTelegramMessages(
+            entity=parse_entity(entity),
+            phone=phone,
+            offset_id=offset_id,
+            limit=limit,
+        )
+    )
+    return StreamingResponse(to_ndjson(messages), media_type="application/x-ndjson")
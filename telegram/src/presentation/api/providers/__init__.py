@@ -0,0 +1,3 @@
+from .main import setup_providers
+
+__all__ = ("setup_providers",)
@@ -0,0 +1,9 @@
+from didiator import CommandMediator, Mediator, QueryMediator
+from fastapi import FastAPI
+
+from .stub import Stub
+
+
+def setup_providers(app: FastAPI, mediator: Mediator) -> None:
+    for dependency in (Mediator, QueryMediator, CommandMediator):
+        app.dependency_overrides[Stub(dependency)] = lambda: mediator
@@ -0,0 +1,35 @@
+from collections.abc import Callable
+from typing import Any
+
+
+class Stub:
+    """Placeholder dependency, replaced with the real one in setup_providers.
+
+    Controllers declare ``Depends(Stub(Mediator))`` and stay unaware of whether
+    the mediator runs in this process or behind the shard router.
+    """
+
+    def __init__(self, dependency: Callable[..., Any], **kwargs: Any) -> None:
+        self._dependency = dependency
+        self._kwargs = kwargs
+
+    def __call__(self) -> None:
+        raise NotImplementedError
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Stub):
+            return (
+                self._dependency == other._dependency and self._kwargs == other._kwargs
+            )
+        if not self._kwargs:
+            return self._dependency == other
+        return False
+
+    def __hash__(self) -> int:
+        if not self._kwargs:
+            return hash(self._dependency)
+        serial = (
+            self._dependency,
+            *self._kwargs.items(),
+        )
+        return hash(serial)
@@ -0,0 +1,67 @@
+import pytest
+from src.domain.telegram.services import dedup
+from src.domain.telegram.services.dedup import MessageDeduplicator
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(dedup.time, "monotonic", clock)
+    return clock
+
+
+def test_key_packs_peer_and_message_ids():
+    key = MessageDeduplicator.key
+
+    assert key(1, 2) != key(2, 1)
+    assert key(1, 0) != key(0, 2**32 - 1)
+    assert key(-1001234, 5) != key(-1001235, 5)
+
+
+def test_seen_remembers_a_key(clock):
+    seen = MessageDeduplicator(ttl=60.0, buckets=6)
+
+    assert not seen.seen(1)
+    assert seen.seen(1)
+    assert not seen.seen(2)
+    assert seen.stats.hits == 1
+    assert seen.stats.keys == 2
+
+
+def test_key_is_remembered_for_the_ttl_less_a_bucket(clock):
+    seen = MessageDeduplicator(ttl=60.0, buckets=6)
+    seen.seen(1)
+
+    clock.now += 49.0
+    assert seen.seen(1)
+    clock.now += 11.0
+    assert not seen.seen(1)
+
+
+def test_rotation_drops_the_oldest_bucket_only(clock):
+    seen = MessageDeduplicator(ttl=60.0, buckets=6)
+    seen.seen(1)
+    clock.now += 10.0
+    seen.seen(2)
+
+    clock.now += 50.0
+    assert not seen.seen(1)
+    assert seen.seen(2)
+
+
+def test_idle_longer_than_the_ttl_forgets_everything(clock):
+    seen = MessageDeduplicator(ttl=60.0, buckets=6)
+    seen.seen(1)
+
+    clock.now += 600.0
+    assert seen.stats.keys == 1
+    assert not seen.seen(1)
+    assert seen.stats.keys == 1
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from src.core.telegram.config import TelegramConfig
+from src.domain.telegram.services.dialogs import DialogIndex
+from src.domain.telegram.services.scheduler import RequestScheduler
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def dialog(peer_id: int, minutes: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=peer_id,
+        pinned=False,
+        date=START + timedelta(minutes=minutes),
+        message=None,
+        dialog=SimpleNamespace(peer=None, top_message=0),
+    )
+
+
+def make_index(**kwargs) -> DialogIndex:
+    config = TelegramConfig(**kwargs)
+    return DialogIndex(None, RequestScheduler(config), config)
+
+
+def ids(dialogs) -> list:
+    return [d.id for d in dialogs]
+
+
+def test_no_delta_before_the_dialogs_are_loaded():
+    index = make_index()
+    index.put("a", [dialog(1)])
+
+    assert index.delta("a", 0) is None
+    assert index.delta("b", 0) is None
+
+
+def test_delta_has_the_changes_since_a_version():
+    index = make_index()
+    index.load("a", [dialog(1), dialog(2)])
+    first = index.delta("a", 0)
+    index.put("a", [dialog(2, minutes=5)])
+    index.load("a", [dialog(2, minutes=5), dialog(3, minutes=1)])
+
+    delta = index.delta("a", first.version, first.epoch)
+
+    assert not delta.full
+    assert delta.epoch == first.epoch
+    assert ids(delta.dialogs) == [2, 3]
+    assert delta.removed == [1]
+    assert index.delta("a", delta.version, delta.epoch).dialogs == []
+
+
+def test_another_epoch_gets_every_dialog():
+    index = make_index()
+    index.load("a", [dialog(1), dialog(2, minutes=1)])
+    version = index.delta("a", 0).version
+
+    delta = index.delta("a", version, "stale")
+
+    assert delta.full
+    assert ids(delta.dialogs) == [2, 1]
+    assert delta.removed == []
+
+
+def test_epoch_differs_per_account():
+    index = make_index()
+    index.load("a", [dialog(1)])
+    index.load("b", [dialog(1)])
+
+    assert index.delta("a", 0).epoch != index.delta("b", 0).epoch
+
+
+def test_version_never_reached_gets_every_dialog():
+    index = make_index()
+    index.load("a", [dialog(1)])
+    current = index.delta("a", 0)
+
+    delta = index.delta("a", current.version + 1, current.epoch)
+
+    assert delta.full
+    assert ids(delta.dialogs) == [1]
+
+
+def test_version_older_than_the_removals_kept_gets_every_dialog():
+    index = make_index(dialog_delta_history=1)
+    index.load("a", [dialog(1), dialog(2), dialog(3)])
+    first = index.delta("a", 0)
+    index.load("a", [dialog(2), dialog(3)])
+    second = index.delta("a", 0)
+    index.load("a", [dialog(3)])
+
+    delta = index.delta("a", first.version, first.epoch)
+    assert delta.full
+    assert ids(delta.dialogs) == [3]
+
+    delta = index.delta("a", second.version, second.epoch)
+    assert not delta.full
+    assert delta.removed == [2]
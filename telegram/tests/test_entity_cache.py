@@ -0,0 +1,95 @@
+import pytest
+from src.core.telegram.sessions import cache
+from src.core.telegram.sessions.cache import EntityCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def row(id: int, username=None, phone=None, name=None):
+    return id, id * 10, username, phone, name
+
+
+def test_lookups_by_id_and_index(clock):
+    entities = EntityCache()
+    entities.put("a", [row(1, username="alice", phone=123, name="Alice")])
+
+    assert entities.get_by_id("a", 2, 1) == (1, 10)
+    assert entities.get_by("a", "username", "alice") == (1, 10)
+    assert entities.get_by("a", "phone", "123") == (1, 10)
+    assert entities.get_by("a", "name", "ALICE") == (1, 10)
+    assert entities.get_by_id("b", 1) is None
+
+
+def test_changed_username_replaces_the_old_key(clock):
+    entities = EntityCache()
+    entities.put("a", [row(1, username="old")])
+    entities.put("a", [row(1, username="new")])
+
+    assert entities.get_by("a", "username", "old") is None
+    assert entities.get_by("a", "username", "new") == (1, 10)
+
+
+def test_least_recently_used_row_is_evicted(clock):
+    entities = EntityCache(max_size=2)
+    entities.put("a", [row(1, username="one"), row(2)])
+    entities.get_by_id("a", 1)
+    entities.put("a", [row(3)])
+
+    assert entities.get_by_id("a", 2) is None
+    assert entities.get_by_id("a", 1) == (1, 10)
+    assert entities.get_by_id("a", 3) == (3, 30)
+    assert entities.stats.evictions == 1
+    assert entities.stats.size == 2
+
+
+def test_evicted_row_leaves_the_index(clock):
+    entities = EntityCache(max_size=1)
+    entities.put("a", [row(1, username="one")])
+    entities.put("a", [row(2)])
+
+    assert entities.get_by("a", "username", "one") is None
+
+
+def test_rows_expire_after_the_ttl(clock):
+    entities = EntityCache(ttl=60.0)
+    entities.put("a", [row(1, username="one")])
+
+    clock.now += 59.0
+    assert entities.get_by_id("a", 1) == (1, 10)
+    clock.now += 2.0
+    assert entities.get_by_id("a", 1) is None
+    assert entities.get_by("a", "username", "one") is None
+    assert entities.stats.size == 0
+
+
+def test_hit_rate(clock):
+    entities = EntityCache()
+    entities.put("a", [row(1)])
+    entities.get_by_id("a", 1)
+    entities.get_by_id("a", 2)
+
+    assert entities.stats.hit_rate == 0.5
+
+
+def test_discard_drops_the_rows_of_a_session(clock):
+    entities = EntityCache()
+    entities.put("a", [row(1, username="one")])
+    entities.put("b", [row(1, username="one")])
+
+    entities.discard("a")
+
+    assert entities.get_by("a", "username", "one") is None
+    assert entities.get_by("b", "username", "one") == (1, 10)
@@ -0,0 +1,92 @@
+import typing
+from dataclasses import MISSING, fields
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import pytest
+from src.infrastructure.event_bus import events  # noqa: F401, registers the events
+from src.infrastructure.event_bus.codecs import CODECS, get_codec
+from src.infrastructure.event_bus.events.schema import _SCHEMAS, get_schema
+
+SAMPLES = {
+    int: 123456,
+    str: "Hello, world!",
+    bool: True,
+    float: 1.5,
+    datetime: datetime(2025, 5, 1, 12, 30, 15, 123456),
+    UUID: uuid4(),
+}
+
+
+def sample(tp):
+    if tp in SAMPLES:
+        return SAMPLES[tp]
+    args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+    if typing.get_origin(tp) is tuple:
+        return (sample(args[0]), sample(args[0]))
+    # Optional.
+    return sample(args[0])
+
+
+def make_event(schema, defaults: bool):
+    """Sets every field, or only the ones without a default."""
+    hints = typing.get_type_hints(schema.event_cls)
+    values = {
+        field.name: sample(hints[field.name])
+        for field in fields(schema.event_cls)
+        if field.init
+        and not (
+            defaults
+            and (field.default is not MISSING or field.default_factory is not MISSING)
+        )
+    }
+    return schema.event_cls(**values)
+
+
+SCHEMAS = sorted(_SCHEMAS.values(), key=lambda schema: schema.event_type)
+
+
+def test_events_are_registered():
+    assert SCHEMAS
+
+
+@pytest.mark.parametrize("content_type", sorted(CODECS))
+@pytest.mark.parametrize("defaults", [False, True], ids=["set", "defaults"])
+@pytest.mark.parametrize(
+    "schema", SCHEMAS, ids=[f"{s.event_type}-v{s.version}" for s in SCHEMAS]
+)
+def test_round_trip(schema, defaults, content_type):
+    codec = get_codec(content_type)
+    event = make_event(schema, defaults)
+
+    decoded = codec.decode(codec.encode(event), schema)
+
+    assert type(decoded) is schema.event_cls
+    assert decoded == event
+
+
+@pytest.mark.parametrize(
+    "schema", SCHEMAS, ids=[f"{s.event_type}-v{s.version}" for s in SCHEMAS]
+)
+def test_schema_payload_is_plain(schema):
+    payload = schema.encode(make_event(schema, defaults=False))
+
+    for value in payload.values():
+        if isinstance(value, (list, tuple)):
+            assert all(isinstance(item, (int, str, bool, float)) for item in value)
+        else:
+            assert isinstance(value, (int, str, bool, float, type(None)))
+
+
+def test_missing_fields_with_defaults_decode_to_the_default():
+    schema = get_schema("TelegramMessageReceived", 1)
+    event = make_event(schema, defaults=True)
+    payload = schema.encode(event)
+    del payload["seen_by"], payload["from_id"]
+
+    assert schema.decode(payload) == event
+
+
+def test_unknown_event():
+    with pytest.raises(Exception):
+        get_schema("TelegramMessageReceived", 0)
@@ -0,0 +1,45 @@
+import pytest
+from src.domain.telegram.services.sharding import HashRing
+
+SESSIONS = [f"session-{n}" for n in range(2000)]
+
+
+def owners(ring: HashRing) -> dict:
+    return {session_id: ring.owner(session_id) for session_id in SESSIONS}
+
+
+def test_owner_is_stable():
+    assert owners(HashRing(4)) == owners(HashRing(4))
+
+
+def test_every_worker_owns_sessions():
+    counts = {}
+    for worker in owners(HashRing(4)).values():
+        counts[worker] = counts.get(worker, 0) + 1
+
+    assert sorted(counts) == [0, 1, 2, 3]
+    assert min(counts.values()) > len(SESSIONS) / 4 / 2
+
+
+def test_adding_a_worker_only_moves_sessions_to_it():
+    before, after = owners(HashRing(4)), owners(HashRing(5))
+
+    moved = [
+        session_id for session_id in SESSIONS if before[session_id] != after[session_id]
+    ]
+    assert all(after[session_id] == 4 for session_id in moved)
+    assert len(moved) < len(SESSIONS) / 5 * 1.5
+
+
+def test_removing_a_worker_only_moves_its_sessions():
+    before, after = owners(HashRing(5)), owners(HashRing(4))
+
+    moved = [
+        session_id for session_id in SESSIONS if before[session_id] != after[session_id]
+    ]
+    assert all(before[session_id] == 4 for session_id in moved)
+
+
+def test_needs_a_worker():
+    with pytest.raises(ValueError):
+        HashRing(0)
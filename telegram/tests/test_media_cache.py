@@ -0,0 +1,122 @@
+import asyncio
+import os
+
+from src.core.telegram.media import MediaCache
+
+
+def chunks(*data: bytes):
+    async def download():
+        for chunk in data:
+            await asyncio.sleep(0)
+            yield chunk
+
+    return download
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def make_cache(tmp_path, max_size: int = 1024) -> MediaCache:
+    cache = MediaCache(str(tmp_path), max_size)
+    cache.load()
+    return cache
+
+
+def test_fetch_downloads_once(tmp_path):
+    cache = make_cache(tmp_path)
+
+    async def main():
+        first = await cache.fetch("a", chunks(b"12", b"34"))
+        second = await cache.fetch("a", chunks(b"other"))
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert read(first.path) == read(second.path) == b"1234"
+    assert first.path != second.path
+    assert first.size == 4
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+
+
+def test_concurrent_fetches_share_the_download(tmp_path):
+    cache = make_cache(tmp_path)
+    downloads = []
+
+    def download():
+        downloads.append(None)
+        return chunks(b"data")()
+
+    async def main():
+        return await asyncio.gather(*(cache.fetch("a", download) for _ in range(5)))
+
+    files = asyncio.run(main())
+    assert len(downloads) == 1
+    assert all(read(file.path) == b"data" for file in files)
+    assert cache.stats.shared == 4
+
+
+def test_failed_download_leaves_nothing(tmp_path):
+    cache = make_cache(tmp_path)
+
+    async def download():
+        yield b"part"
+        raise ConnectionError("lost")
+
+    async def main():
+        try:
+            await cache.fetch("a", download)
+        except ConnectionError:
+            pass
+        return await cache.fetch("a", chunks(b"whole"))
+
+    file = asyncio.run(main())
+    assert read(file.path) == b"whole"
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_size=10)
+
+    async def main():
+        await cache.fetch("a", chunks(b"aaaa"))
+        await cache.fetch("b", chunks(b"bbbb"))
+        cache.get("a")
+        await cache.fetch("c", chunks(b"cccc"))
+
+    asyncio.run(main())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats.evictions == 1
+    assert cache.stats.size == 8
+
+
+def test_evicted_file_stays_whole_until_released(tmp_path):
+    cache = make_cache(tmp_path, max_size=4)
+
+    async def main():
+        served = await cache.fetch("a", chunks(b"aaaa"))
+        await cache.fetch("b", chunks(b"bbbb"))
+        return served
+
+    served = asyncio.run(main())
+    assert cache.get("a") is None
+    assert read(served.path) == b"aaaa"
+    served.release()
+    assert not os.path.exists(served.path)
+
+
+def test_load_indexes_the_files_of_a_previous_run(tmp_path):
+    async def fill(cache: MediaCache):
+        await cache.fetch("b", chunks(b"bbbb"))
+        # Never released, like a response cut short by a restart.
+        return await cache.fetch("a", chunks(b"aaaa"))
+
+    served = asyncio.run(fill(make_cache(tmp_path)))
+    cache = make_cache(tmp_path)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is not None
+    assert cache.stats.size == 8
+    assert not os.path.exists(served.path)
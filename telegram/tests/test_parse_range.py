@@ -0,0 +1,36 @@
+import pytest
+from src.presentation.api.controllers.media import parse_range
+
+
+@pytest.mark.parametrize(
+    ("header", "size", "expected"),
+    [
+        ("bytes=0-99", 1000, (0, 99)),
+        ("bytes=0-99", None, (0, 99)),
+        ("bytes=900-2000", 1000, (900, 999)),
+        # Open ended.
+        ("bytes=100-", 1000, (100, 999)),
+        ("bytes=100-", None, None),
+        # Suffix.
+        ("bytes=-100", 1000, (900, 999)),
+        ("bytes=-2000", 1000, (0, 999)),
+        ("bytes=-100", None, None),
+        # Sent whole.
+        (None, 1000, None),
+        ("", 1000, None),
+        ("items=0-99", 1000, None),
+        ("bytes=0-9,20-29", 1000, None),
+        ("bytes=-", 1000, None),
+        ("bytes=a-9", 1000, None),
+        ("bytes=0-b", 1000, None),
+        ("bytes=99-0", 1000, None),
+    ],
+)
+def test_parse_range(header, size, expected):
+    assert parse_range(header, size) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1999", "bytes=5000-"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
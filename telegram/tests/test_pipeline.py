@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from src.core.telegram.config import TelegramConfig
+from src.domain.telegram.services.pipeline import EventPipeline
+
+
+def make_pipeline(**kwargs) -> EventPipeline:
+    kwargs.setdefault("event_batch_window", 0.01)
+    return EventPipeline(TelegramConfig(**kwargs))
+
+
+class Publisher:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.batches = []
+
+    async def __call__(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("broker is down")
+        self.batches.append(list(events))
+
+
+def run(pipeline: EventPipeline, publish: Publisher, events) -> list:
+    async def main():
+        results = [await pipeline.put(event) for event in events]
+        pipeline.start(publish)
+        await pipeline.close()
+        return results
+
+    return asyncio.run(main())
+
+
+def test_unknown_drop_policy():
+    with pytest.raises(Exception):
+        make_pipeline(event_drop_policy="drop_all")
+
+
+def test_events_are_published_in_batches():
+    pipeline = make_pipeline(event_batch_size=2)
+    publish = Publisher()
+
+    assert run(pipeline, publish, range(5)) == [True] * 5
+    assert publish.batches == [[0, 1], [2, 3], [4]]
+    assert pipeline.stats.published == 5
+    assert pipeline.stats.batches == 3
+    assert pipeline.stats.max_depth == 5
+
+
+def test_block_drops_after_the_timeout():
+    pipeline = make_pipeline(
+        event_queue_size=2, event_drop_policy="block", event_block_timeout=0.01
+    )
+    publish = Publisher()
+
+    assert run(pipeline, publish, range(3)) == [True, True, False]
+    assert publish.batches == [[0, 1]]
+    assert pipeline.stats.dropped == 1
+
+
+def test_drop_newest():
+    pipeline = make_pipeline(event_queue_size=2, event_drop_policy="drop_newest")
+    publish = Publisher()
+
+    assert run(pipeline, publish, range(3)) == [True, True, False]
+    assert publish.batches == [[0, 1]]
+    assert pipeline.stats.dropped == 1
+
+
+def test_drop_oldest():
+    pipeline = make_pipeline(event_queue_size=2, event_drop_policy="drop_oldest")
+    publish = Publisher()
+
+    assert run(pipeline, publish, range(4)) == [True] * 4
+    assert publish.batches == [[2, 3]]
+    assert pipeline.stats.dropped == 2
+
+
+def test_failed_batch_is_retried(monkeypatch):
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    pipeline = make_pipeline()
+    publish = Publisher(failures=3)
+
+    run(pipeline, publish, range(3))
+
+    assert publish.batches == [[0, 1, 2]]
+    assert sleeps == [1.0, 2.0, 4.0]
+    assert pipeline.stats.failures == 3
+    assert pipeline.stats.published == 3
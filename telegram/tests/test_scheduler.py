@@ -0,0 +1,135 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from src.core.telegram.config import TelegramConfig
+from src.domain.telegram.services import scheduler as scheduler_module
+from src.domain.telegram.services.scheduler import RequestScheduler
+from telethon.errors import FloodWaitError
+
+
+def flood_wait(seconds: int) -> FloodWaitError:
+    return FloodWaitError(None, capture=seconds)
+
+
+def make_scheduler(**kwargs) -> RequestScheduler:
+    return RequestScheduler(TelegramConfig(**kwargs))
+
+
+@pytest.fixture
+def sleeps(monkeypatch: pytest.MonkeyPatch) -> list:
+    """Makes the flood waits of the scheduler pass at once, recording them."""
+    sleeps = []
+    offset = 0.0
+    real_sleep = asyncio.sleep
+
+    def monotonic() -> float:
+        return time.monotonic() + offset
+
+    async def sleep(delay: float) -> None:
+        nonlocal offset
+        sleeps.append(delay)
+        offset += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(scheduler_module, "time", SimpleNamespace(monotonic=monotonic))
+    monkeypatch.setattr(scheduler_module.asyncio, "sleep", sleep)
+    return sleeps
+
+
+def test_call_retries_after_a_flood_wait(sleeps):
+    scheduler = make_scheduler(flood_max_wait=5.0, flood_retries=1)
+    calls = []
+
+    async def request():
+        calls.append(None)
+        if len(calls) == 1:
+            raise flood_wait(1)
+        return "ok"
+
+    assert asyncio.run(scheduler.call("a", "get_me", request)) == "ok"
+    assert len(calls) == 2
+    assert len(sleeps) == 1 and 0 < sleeps[0] <= 1
+    stats = scheduler.stats()["a"]["get_me"]
+    assert stats.calls == 2
+    assert stats.flood_waits == 1
+
+
+def test_call_gives_up_after_the_retries(sleeps):
+    scheduler = make_scheduler(flood_max_wait=5.0, flood_retries=1)
+
+    async def request():
+        raise flood_wait(1)
+
+    with pytest.raises(FloodWaitError):
+        asyncio.run(scheduler.call("a", "get_me", request))
+    assert scheduler.stats()["a"]["get_me"].calls == 2
+
+
+def test_wait_longer_than_max_wait_is_not_retried():
+    scheduler = make_scheduler(flood_max_wait=5.0, flood_retries=3)
+    calls = []
+
+    async def request():
+        calls.append(None)
+        raise flood_wait(60)
+
+    with pytest.raises(FloodWaitError):
+        asyncio.run(scheduler.call("a", "get_me", request))
+    assert len(calls) == 1
+
+
+def test_callers_are_rejected_during_a_long_flood_wait():
+    scheduler = make_scheduler(flood_max_wait=5.0, flood_retries=0)
+
+    async def flooded():
+        raise flood_wait(60)
+
+    async def request():
+        return "ok"
+
+    async def main():
+        with pytest.raises(FloodWaitError):
+            await scheduler.call("a", "get_me", flooded)
+        with pytest.raises(FloodWaitError) as e:
+            await scheduler.call("a", "get_me", request)
+        assert e.value.seconds >= 59
+        # Other methods and accounts aren't blocked.
+        assert await scheduler.call("a", "get_dialogs", request) == "ok"
+        assert await scheduler.call("b", "get_me", request) == "ok"
+
+    asyncio.run(main())
+    assert scheduler.stats()["a"]["get_me"].rejected == 1
+
+
+def test_calls_are_paced_per_method():
+    scheduler = make_scheduler(request_rate=100.0, request_burst=1)
+
+    async def request():
+        return None
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(5):
+            await scheduler.call("a", "get_me", request)
+        return loop.time() - started
+
+    assert asyncio.run(main()) >= 0.035
+
+
+def test_unpaced_calls_take_no_token():
+    scheduler = make_scheduler(request_rate=0.001, request_burst=1)
+
+    async def request():
+        return None
+
+    async def main():
+        await scheduler.acquire("a", "download_file")
+        for _ in range(5):
+            await asyncio.wait_for(
+                scheduler.call_unpaced("a", "download_file", request), 1.0
+            )
+
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from src.core.telegram.sessions.my_sqlalchemy import AlchemySessionContainer
+
+
+def make_container(create_tables: bool = True) -> AlchemySessionContainer:
+    container = AlchemySessionContainer("sqlite://", session=False, manage_tables=False)
+    if create_tables:
+        container.UpdateState.__table__.create(container.db_engine)
+    return container
+
+
+def make_state(pts: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        pts=pts,
+        qts=0,
+        date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        seq=0,
+        unread_count=0,
+    )
+
+
+def stored(container: AlchemySessionContainer) -> dict:
+    t = container.UpdateState.__table__
+    with container.db_engine.connect() as conn:
+        rows = conn.execute(select(t.c.session_id, t.c.entity_id, t.c.pts))
+        return {(row[0], row[1]): row[2] for row in rows}
+
+
+def test_put_keeps_the_latest_state_per_key():
+    buffer = make_container().update_state_buffer
+
+    buffer.put("a", 0, make_state(1))
+    buffer.put("a", 0, make_state(2))
+    buffer.put("a", 1, make_state(3))
+    buffer.put("b", 0, make_state(4))
+
+    assert buffer.get("a", 0)["pts"] == 2
+    assert buffer.stats.pending == 3
+    assert buffer.stats.coalesced_rows == 1
+
+
+def test_flush_writes_every_pending_row_once():
+    container = make_container()
+    buffer = container.update_state_buffer
+    buffer.put("a", 0, make_state(1))
+    buffer.put("a", 0, make_state(2))
+    buffer.put("b", 0, make_state(3))
+
+    buffer.flush()
+
+    assert stored(container) == {("a", 0): 2, ("b", 0): 3}
+    assert buffer.stats.pending == 0
+    assert buffer.stats.flushes == 1
+    assert buffer.stats.flushed_rows == 2
+
+
+def test_flush_replaces_the_stored_state():
+    container = make_container()
+    buffer = container.update_state_buffer
+    buffer.put("a", 0, make_state(1))
+    buffer.flush()
+    buffer.put("a", 0, make_state(5))
+    buffer.flush()
+
+    assert stored(container) == {("a", 0): 5}
+
+
+def test_failed_flush_keeps_the_rows():
+    buffer = make_container(create_tables=False).update_state_buffer
+    buffer.put("a", 0, make_state(1))
+
+    buffer.flush()
+
+    assert buffer.get("a", 0)["pts"] == 1
+    assert buffer.stats.failed_flushes == 1
+
+
+def test_discard_drops_the_rows_of_a_session():
+    buffer = make_container().update_state_buffer
+    buffer.put("a", 0, make_state(1))
+    buffer.put("b", 0, make_state(2))
+
+    buffer.discard("a")
+
+    assert buffer.get("a", 0) is None
+    assert buffer.get("b", 0) is not None